@@ -0,0 +1,673 @@
+/*
+ * _rencode.c
+ *
+ * Copyright (C) 2026 agent <agent@local>
+ *
+ * C implementation of deluge/rencode.py.  It produces and accepts exactly
+ * the same wire format as the pure Python module, which remains the
+ * reference implementation and is used whenever this extension is not
+ * available.
+ *
+ * This program is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This program is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with deluge.    If not, write to:
+ *  The Free Software Foundation, Inc.,
+ *  51 Franklin Street, Fifth Floor
+ *  Boston, MA  02110-1301, USA.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#define DEFAULT_FLOAT_BITS 32
+#define MAX_INT_LENGTH 64
+
+#define CHR_LIST    59
+#define CHR_DICT    60
+#define CHR_INT     61
+#define CHR_INT1    62
+#define CHR_INT2    63
+#define CHR_INT4    64
+#define CHR_INT8    65
+#define CHR_FLOAT32 66
+#define CHR_FLOAT64 44
+#define CHR_TRUE    67
+#define CHR_FALSE   68
+#define CHR_NONE    69
+#define CHR_TERM    127
+
+#define INT_POS_FIXED_START 0
+#define INT_POS_FIXED_COUNT 44
+
+#define DICT_FIXED_START 102
+#define DICT_FIXED_COUNT 25
+
+#define INT_NEG_FIXED_START 70
+#define INT_NEG_FIXED_COUNT 32
+
+#define STR_FIXED_START 128
+#define STR_FIXED_COUNT 64
+
+#define LIST_FIXED_START (STR_FIXED_START + STR_FIXED_COUNT)
+#define LIST_FIXED_COUNT 64
+
+/* Encoding */
+
+typedef struct {
+    char *data;
+    Py_ssize_t len;
+    Py_ssize_t size;
+} buffer_t;
+
+static int
+buffer_grow(buffer_t *buf, Py_ssize_t needed)
+{
+    Py_ssize_t size = buf->size;
+    char *data;
+
+    while (size < buf->len + needed) {
+        if (size > PY_SSIZE_T_MAX / 2) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        size *= 2;
+    }
+    data = PyMem_Realloc(buf->data, size);
+    if (data == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    buf->data = data;
+    buf->size = size;
+    return 0;
+}
+
+static int
+buffer_write(buffer_t *buf, const char *data, Py_ssize_t len)
+{
+    if (buf->len + len > buf->size && buffer_grow(buf, len) < 0)
+        return -1;
+    memcpy(buf->data + buf->len, data, len);
+    buf->len += len;
+    return 0;
+}
+
+static int
+buffer_write_char(buffer_t *buf, unsigned char c)
+{
+    if (buf->len + 1 > buf->size && buffer_grow(buf, 1) < 0)
+        return -1;
+    buf->data[buf->len++] = (char)c;
+    return 0;
+}
+
+static int
+buffer_write_be(buffer_t *buf, unsigned char typecode, PY_LONG_LONG x, int n)
+{
+    char out[9];
+    unsigned PY_LONG_LONG v = (unsigned PY_LONG_LONG)x;
+    int i;
+
+    out[0] = (char)typecode;
+    for (i = n; i > 0; i--) {
+        out[i] = (char)(v & 0xff);
+        v >>= 8;
+    }
+    return buffer_write(buf, out, n + 1);
+}
+
+static int encode(buffer_t *buf, PyObject *x, int float_bits);
+
+static int
+encode_long_long(buffer_t *buf, PY_LONG_LONG x)
+{
+    if (0 <= x && x < INT_POS_FIXED_COUNT)
+        return buffer_write_char(buf, (unsigned char)(INT_POS_FIXED_START + x));
+    if (-INT_NEG_FIXED_COUNT <= x && x < 0)
+        return buffer_write_char(buf, (unsigned char)(INT_NEG_FIXED_START - 1 - x));
+    if (-128 <= x && x < 128)
+        return buffer_write_be(buf, CHR_INT1, x, 1);
+    if (-32768 <= x && x < 32768)
+        return buffer_write_be(buf, CHR_INT2, x, 2);
+    if (-2147483648LL <= x && x < 2147483648LL)
+        return buffer_write_be(buf, CHR_INT4, x, 4);
+    return buffer_write_be(buf, CHR_INT8, x, 8);
+}
+
+static int
+encode_big_long(buffer_t *buf, PyObject *x)
+{
+    PyObject *s;
+    int ret = -1;
+
+    s = PyObject_Str(x);
+    if (s == NULL)
+        return -1;
+    if (PyString_GET_SIZE(s) >= MAX_INT_LENGTH) {
+        PyErr_SetString(PyExc_ValueError, "overflow");
+    }
+    else if (buffer_write_char(buf, CHR_INT) == 0 &&
+             buffer_write(buf, PyString_AS_STRING(s), PyString_GET_SIZE(s)) == 0 &&
+             buffer_write_char(buf, CHR_TERM) == 0) {
+        ret = 0;
+    }
+    Py_DECREF(s);
+    return ret;
+}
+
+static int
+encode_string(buffer_t *buf, const char *data, Py_ssize_t len)
+{
+    char header[32];
+    int n;
+
+    if (len < STR_FIXED_COUNT) {
+        if (buffer_write_char(buf, (unsigned char)(STR_FIXED_START + len)) < 0)
+            return -1;
+    }
+    else {
+        n = PyOS_snprintf(header, sizeof(header), "%" PY_FORMAT_SIZE_T "d:", len);
+        if (buffer_write(buf, header, n) < 0)
+            return -1;
+    }
+    return buffer_write(buf, data, len);
+}
+
+static int
+encode_float(buffer_t *buf, PyObject *x, int float_bits)
+{
+    unsigned char out[9];
+    double d = PyFloat_AS_DOUBLE(x);
+
+    if (float_bits == 32) {
+        out[0] = CHR_FLOAT32;
+        if (_PyFloat_Pack4(d, out + 1, 0) < 0)
+            return -1;
+        return buffer_write(buf, (char *)out, 5);
+    }
+    out[0] = CHR_FLOAT64;
+    if (_PyFloat_Pack8(d, out + 1, 0) < 0)
+        return -1;
+    return buffer_write(buf, (char *)out, 9);
+}
+
+static int
+encode_sequence(buffer_t *buf, PyObject *x, int float_bits)
+{
+    PyObject **items;
+    Py_ssize_t len, i;
+
+    len = PySequence_Fast_GET_SIZE(x);
+    items = PySequence_Fast_ITEMS(x);
+    if (len < LIST_FIXED_COUNT) {
+        if (buffer_write_char(buf, (unsigned char)(LIST_FIXED_START + len)) < 0)
+            return -1;
+    }
+    else if (buffer_write_char(buf, CHR_LIST) < 0) {
+        return -1;
+    }
+    for (i = 0; i < len; i++) {
+        if (encode(buf, items[i], float_bits) < 0)
+            return -1;
+    }
+    if (len >= LIST_FIXED_COUNT)
+        return buffer_write_char(buf, CHR_TERM);
+    return 0;
+}
+
+static int
+encode_dict(buffer_t *buf, PyObject *x, int float_bits)
+{
+    PyObject *key, *value;
+    Py_ssize_t len, pos = 0;
+
+    len = PyDict_Size(x);
+    if (len < DICT_FIXED_COUNT) {
+        if (buffer_write_char(buf, (unsigned char)(DICT_FIXED_START + len)) < 0)
+            return -1;
+    }
+    else if (buffer_write_char(buf, CHR_DICT) < 0) {
+        return -1;
+    }
+    while (PyDict_Next(x, &pos, &key, &value)) {
+        if (encode(buf, key, float_bits) < 0 || encode(buf, value, float_bits) < 0)
+            return -1;
+    }
+    if (len >= DICT_FIXED_COUNT)
+        return buffer_write_char(buf, CHR_TERM);
+    return 0;
+}
+
+static int
+encode(buffer_t *buf, PyObject *x, int float_bits)
+{
+    int ret;
+
+    if (x == Py_None)
+        return buffer_write_char(buf, CHR_NONE);
+    if (x == Py_True)
+        return buffer_write_char(buf, CHR_TRUE);
+    if (x == Py_False)
+        return buffer_write_char(buf, CHR_FALSE);
+    if (PyString_CheckExact(x))
+        return encode_string(buf, PyString_AS_STRING(x), PyString_GET_SIZE(x));
+    if (PyInt_CheckExact(x))
+        return encode_long_long(buf, PyInt_AS_LONG(x));
+    if (PyLong_CheckExact(x)) {
+        int overflow;
+        PY_LONG_LONG v = PyLong_AsLongLongAndOverflow(x, &overflow);
+        if (overflow)
+            return encode_big_long(buf, x);
+        if (v == -1 && PyErr_Occurred())
+            return -1;
+        return encode_long_long(buf, v);
+    }
+    if (PyFloat_CheckExact(x))
+        return encode_float(buf, x, float_bits);
+    if (PyUnicode_CheckExact(x)) {
+        PyObject *s = PyUnicode_AsUTF8String(x);
+        if (s == NULL)
+            return -1;
+        ret = encode_string(buf, PyString_AS_STRING(s), PyString_GET_SIZE(s));
+        Py_DECREF(s);
+        return ret;
+    }
+    if (PyList_CheckExact(x) || PyTuple_CheckExact(x) || PyDict_CheckExact(x)) {
+        if (Py_EnterRecursiveCall(" in rencode.dumps"))
+            return -1;
+        if (PyDict_CheckExact(x))
+            ret = encode_dict(buf, x, float_bits);
+        else
+            ret = encode_sequence(buf, x, float_bits);
+        Py_LeaveRecursiveCall();
+        return ret;
+    }
+
+    /* The pure Python module dispatches on type(x) */
+    PyErr_SetObject(PyExc_KeyError, (PyObject *)Py_TYPE(x));
+    return -1;
+}
+
+static PyObject *
+rencode_dumps(PyObject *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"x", "float_bits", NULL};
+    PyObject *x, *result = NULL;
+    int float_bits = DEFAULT_FLOAT_BITS;
+    buffer_t buf;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|i:dumps", kwlist,
+                                     &x, &float_bits))
+        return NULL;
+
+    if (float_bits != 32 && float_bits != 64) {
+        PyErr_Format(PyExc_ValueError, "Float bits (%d) is not 32 or 64",
+                     float_bits);
+        return NULL;
+    }
+
+    buf.len = 0;
+    buf.size = 1024;
+    buf.data = PyMem_Malloc(buf.size);
+    if (buf.data == NULL)
+        return PyErr_NoMemory();
+
+    if (encode(&buf, x, float_bits) == 0)
+        result = PyString_FromStringAndSize(buf.data, buf.len);
+    PyMem_Free(buf.data);
+    return result;
+}
+
+/* Decoding */
+
+typedef struct {
+    const unsigned char *data;
+    Py_ssize_t len;
+    Py_ssize_t pos;
+} decoder_t;
+
+static PyObject *decode(decoder_t *d);
+
+static PyObject *
+decode_error(void)
+{
+    PyErr_SetNone(PyExc_ValueError);
+    return NULL;
+}
+
+static int
+check_available(decoder_t *d, Py_ssize_t n)
+{
+    if (n < 0 || d->len - d->pos < n) {
+        PyErr_SetNone(PyExc_ValueError);
+        return -1;
+    }
+    return 0;
+}
+
+static PY_LONG_LONG
+read_be(decoder_t *d, int n)
+{
+    unsigned PY_LONG_LONG v = 0;
+    int i;
+
+    for (i = 0; i < n; i++)
+        v = (v << 8) | d->data[d->pos + i];
+    d->pos += n;
+    /* Sign extend */
+    if (n < 8 && (v & (1ULL << (n * 8 - 1))))
+        v |= ~0ULL << (n * 8);
+    return (PY_LONG_LONG)v;
+}
+
+static PyObject *
+make_string(decoder_t *d, Py_ssize_t n)
+{
+    const unsigned char *s;
+    Py_ssize_t i;
+
+    if (check_available(d, n) < 0)
+        return NULL;
+    s = d->data + d->pos;
+    d->pos += n;
+    /* Strings are returned as unicode only when they contain multibyte
+       utf8 sequences, otherwise as str */
+    for (i = 0; i < n; i++) {
+        if (s[i] & 0x80)
+            return PyUnicode_DecodeUTF8((const char *)s, n, "strict");
+    }
+    return PyString_FromStringAndSize((const char *)s, n);
+}
+
+static PyObject *
+decode_number(decoder_t *d, Py_ssize_t start, Py_ssize_t end)
+{
+    char digits[MAX_INT_LENGTH + 1];
+    char *parse_end;
+    PyObject *n;
+
+    memcpy(digits, d->data + start, end - start);
+    digits[end - start] = '\0';
+    n = PyInt_FromString(digits, &parse_end, 10);
+    if (n == NULL) {
+        if (PyErr_ExceptionMatches(PyExc_ValueError))
+            PyErr_SetNone(PyExc_ValueError);
+        return NULL;
+    }
+    return n;
+}
+
+static PyObject *
+decode_int(decoder_t *d)
+{
+    const unsigned char *term;
+    Py_ssize_t start = d->pos + 1, end;
+    PyObject *n;
+
+    term = memchr(d->data + start, CHR_TERM, d->len - start);
+    if (term == NULL)
+        return decode_error();
+    end = term - d->data;
+    if (end - start >= MAX_INT_LENGTH) {
+        PyErr_SetString(PyExc_ValueError, "overflow");
+        return NULL;
+    }
+    if (end == start)
+        return decode_error();
+    if (d->data[start] == '-') {
+        if (end - start > 1 && d->data[start + 1] == '0')
+            return decode_error();
+    }
+    else if (d->data[start] == '0' && end != start + 1) {
+        return decode_error();
+    }
+    n = decode_number(d, start, end);
+    if (n != NULL)
+        d->pos = end + 1;
+    return n;
+}
+
+static PyObject *
+decode_string(decoder_t *d)
+{
+    const unsigned char *colon;
+    Py_ssize_t start = d->pos, end, i, n = 0;
+
+    colon = memchr(d->data + start, ':', d->len - start);
+    if (colon == NULL)
+        return decode_error();
+    end = colon - d->data;
+    if (end - start >= MAX_INT_LENGTH)
+        return decode_error();
+    if (d->data[start] == '0' && end != start + 1)
+        return decode_error();
+    for (i = start; i < end; i++) {
+        if (d->data[i] < '0' || d->data[i] > '9')
+            return decode_error();
+        if (n > (PY_SSIZE_T_MAX - 9) / 10)
+            return decode_error();
+        n = n * 10 + (d->data[i] - '0');
+    }
+    d->pos = end + 1;
+    return make_string(d, n);
+}
+
+static PyObject *
+decode_list(decoder_t *d, Py_ssize_t count)
+{
+    PyObject *list, *item, *result;
+
+    list = PyList_New(0);
+    if (list == NULL)
+        return NULL;
+    for (;;) {
+        if (count < 0) {
+            if (check_available(d, 1) < 0)
+                goto error;
+            if (d->data[d->pos] == CHR_TERM) {
+                d->pos++;
+                break;
+            }
+        }
+        else if (PyList_GET_SIZE(list) == count) {
+            break;
+        }
+        item = decode(d);
+        if (item == NULL)
+            goto error;
+        if (PyList_Append(list, item) < 0) {
+            Py_DECREF(item);
+            goto error;
+        }
+        Py_DECREF(item);
+    }
+    result = PyList_AsTuple(list);
+    Py_DECREF(list);
+    return result;
+
+error:
+    Py_DECREF(list);
+    return NULL;
+}
+
+static PyObject *
+decode_dict(decoder_t *d, Py_ssize_t count)
+{
+    PyObject *dict, *key, *value;
+    Py_ssize_t i = 0;
+
+    dict = PyDict_New();
+    if (dict == NULL)
+        return NULL;
+    for (;; i++) {
+        if (count < 0) {
+            if (check_available(d, 1) < 0)
+                goto error;
+            if (d->data[d->pos] == CHR_TERM) {
+                d->pos++;
+                break;
+            }
+        }
+        else if (i == count) {
+            break;
+        }
+        key = decode(d);
+        if (key == NULL)
+            goto error;
+        value = decode(d);
+        if (value == NULL) {
+            Py_DECREF(key);
+            goto error;
+        }
+        if (PyDict_SetItem(dict, key, value) < 0) {
+            Py_DECREF(key);
+            Py_DECREF(value);
+            goto error;
+        }
+        Py_DECREF(key);
+        Py_DECREF(value);
+    }
+    return dict;
+
+error:
+    Py_DECREF(dict);
+    return NULL;
+}
+
+static PyObject *
+decode(decoder_t *d)
+{
+    unsigned char typecode;
+    PyObject *result;
+    double f;
+
+    if (check_available(d, 1) < 0)
+        return NULL;
+    typecode = d->data[d->pos];
+
+    if (typecode >= STR_FIXED_START && typecode < STR_FIXED_START + STR_FIXED_COUNT) {
+        d->pos++;
+        return make_string(d, typecode - STR_FIXED_START);
+    }
+    if (typecode < INT_POS_FIXED_START + INT_POS_FIXED_COUNT) {
+        d->pos++;
+        return PyInt_FromLong(typecode - INT_POS_FIXED_START);
+    }
+    if (typecode >= INT_NEG_FIXED_START && typecode < INT_NEG_FIXED_START + INT_NEG_FIXED_COUNT) {
+        d->pos++;
+        return PyInt_FromLong(-1 - (typecode - INT_NEG_FIXED_START));
+    }
+    if (typecode >= '0' && typecode <= '9')
+        return decode_string(d);
+
+    if ((typecode >= LIST_FIXED_START) ||
+        (typecode >= DICT_FIXED_START && typecode < DICT_FIXED_START + DICT_FIXED_COUNT) ||
+        typecode == CHR_LIST || typecode == CHR_DICT) {
+        if (Py_EnterRecursiveCall(" in rencode.loads"))
+            return NULL;
+        d->pos++;
+        if (typecode >= LIST_FIXED_START)
+            result = decode_list(d, typecode - LIST_FIXED_START);
+        else if (typecode == CHR_LIST)
+            result = decode_list(d, -1);
+        else if (typecode == CHR_DICT)
+            result = decode_dict(d, -1);
+        else
+            result = decode_dict(d, typecode - DICT_FIXED_START);
+        Py_LeaveRecursiveCall();
+        return result;
+    }
+
+    switch (typecode) {
+    case CHR_INT:
+        return decode_int(d);
+    case CHR_INT1:
+    case CHR_INT2:
+    case CHR_INT4:
+    case CHR_INT8: {
+        int n = 1 << (typecode - CHR_INT1);
+        PY_LONG_LONG v;
+        if (check_available(d, n + 1) < 0)
+            return NULL;
+        d->pos++;
+        v = read_be(d, n);
+        if (v < LONG_MIN || v > LONG_MAX)
+            return PyLong_FromLongLong(v);
+        return PyInt_FromLong((long)v);
+    }
+    case CHR_FLOAT32:
+        if (check_available(d, 5) < 0)
+            return NULL;
+        f = _PyFloat_Unpack4(d->data + d->pos + 1, 0);
+        if (f == -1.0 && PyErr_Occurred())
+            return NULL;
+        d->pos += 5;
+        return PyFloat_FromDouble(f);
+    case CHR_FLOAT64:
+        if (check_available(d, 9) < 0)
+            return NULL;
+        f = _PyFloat_Unpack8(d->data + d->pos + 1, 0);
+        if (f == -1.0 && PyErr_Occurred())
+            return NULL;
+        d->pos += 9;
+        return PyFloat_FromDouble(f);
+    case CHR_TRUE:
+        d->pos++;
+        Py_RETURN_TRUE;
+    case CHR_FALSE:
+        d->pos++;
+        Py_RETURN_FALSE;
+    case CHR_NONE:
+        d->pos++;
+        Py_RETURN_NONE;
+    }
+    return decode_error();
+}
+
+static PyObject *
+rencode_loads(PyObject *self, PyObject *args)
+{
+    PyObject *result;
+    decoder_t d;
+    const char *data;
+    Py_ssize_t len;
+
+    if (!PyArg_ParseTuple(args, "s#:loads", &data, &len))
+        return NULL;
+
+    d.data = (const unsigned char *)data;
+    d.len = len;
+    d.pos = 0;
+
+    result = decode(&d);
+    if (result != NULL && d.pos != d.len) {
+        Py_DECREF(result);
+        return decode_error();
+    }
+    return result;
+}
+
+static PyMethodDef rencode_methods[] = {
+    {"dumps", (PyCFunction)rencode_dumps, METH_VARARGS | METH_KEYWORDS,
+     "dumps(x, float_bits=32) -> str\n\nDump data structure to str."},
+    {"loads", rencode_loads, METH_VARARGS,
+     "loads(x) -> object\n\nLoad data structure from str."},
+    {NULL, NULL, 0, NULL}
+};
+
+PyMODINIT_FUNC
+init_rencode(void)
+{
+    Py_InitModule3("_rencode", rencode_methods,
+                   "C implementation of deluge.rencode");
+}
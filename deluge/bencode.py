@@ -68,6 +68,158 @@ def bdecode(x):
 
     return r
 
+# The lazy decoder below works on the offsets of the values in the original
+# string instead of building the whole structure up front.  Values are only
+# decoded when they are accessed, and the bencoded form of any value can be
+# taken straight from the original string, eg. to compute the info hash.
+
+def skip_int(x, f):
+    newf = x.index('e', f + 1)
+    int(x[f + 1:newf])
+    return newf + 1
+
+def skip_string(x, f):
+    colon = x.index(':', f)
+    n = int(x[f:colon])
+    if n < 0 or colon + 1 + n > len(x):
+        raise ValueError
+    return colon + 1 + n
+
+def skip_list(x, f):
+    f += 1
+    while x[f] != 'e':
+        f = skip_func[x[f]](x, f)
+    return f + 1
+
+def skip_dict(x, f):
+    f += 1
+    while x[f] != 'e':
+        f = skip_string(x, f)
+        f = skip_func[x[f]](x, f)
+    return f + 1
+
+skip_func = {}
+for c in decode_func:
+    skip_func[c] = skip_string
+skip_func['l'] = skip_list
+skip_func['d'] = skip_dict
+skip_func['i'] = skip_int
+
+def decode_lazy(x, f):
+    if x[f] == 'd':
+        r = LazyDict(x, f)
+    elif x[f] == 'l':
+        r = LazyList(x, f)
+    else:
+        return decode_func[x[f]](x, f)
+    return (r, r.end)
+
+class LazyDict(object):
+    """
+    A bencoded dictionary that only decodes its values when they are
+    accessed.  Nested dictionaries and lists are lazy as well.
+    """
+    def __init__(self, x, f):
+        self.data = x
+        self.start = f
+        self.__spans = {}
+        self.__values = {}
+        f += 1
+        while x[f] != 'e':
+            k, f = decode_string(x, f)
+            if x[f] in 'ld':
+                # These have to be scanned anyway, so keep their offsets
+                self.__values[k], end = decode_lazy(x, f)
+            else:
+                end = skip_func[x[f]](x, f)
+            self.__spans[k] = (f, end)
+            f = end
+        self.end = f + 1
+
+    def __getitem__(self, key):
+        if key not in self.__values:
+            start, end = self.__spans[key]
+            self.__values[key] = decode_lazy(self.data, start)[0]
+        return self.__values[key]
+
+    def __contains__(self, key):
+        return key in self.__spans
+
+    has_key = __contains__
+
+    def __iter__(self):
+        return iter(self.__spans)
+
+    def __len__(self):
+        return len(self.__spans)
+
+    def get(self, key, default=None):
+        if key in self.__spans:
+            return self[key]
+        return default
+
+    def keys(self):
+        return self.__spans.keys()
+
+    def span(self, key):
+        """Returns the (start, end) offsets of the value of key"""
+        return self.__spans[key]
+
+    def raw(self, key):
+        """Returns the value of key as it is bencoded in the original string"""
+        start, end = self.__spans[key]
+        return self.data[start:end]
+
+    def decode(self):
+        """Returns the dictionary fully decoded, as bdecode() would"""
+        return decode_dict(self.data, self.start)[0]
+
+class LazyList(object):
+    """
+    A bencoded list that decodes its items when they are accessed.  The
+    items themselves are fully decoded, as they are usually small, eg. the
+    entries of a torrent's files list.
+    """
+    def __init__(self, x, f):
+        self.data = x
+        self.start = f
+        self.__offsets = []
+        f += 1
+        while x[f] != 'e':
+            self.__offsets.append(f)
+            f = skip_func[x[f]](x, f)
+        self.end = f + 1
+
+    def __iter__(self):
+        x = self.data
+        for f in self.__offsets:
+            yield decode_func[x[f]](x, f)[0]
+
+    def __len__(self):
+        return len(self.__offsets)
+
+    def __getitem__(self, index):
+        f = self.__offsets[index]
+        return decode_func[self.data[f]](self.data, f)[0]
+
+    def decode(self):
+        """Returns the list fully decoded, as bdecode() would"""
+        return decode_list(self.data, self.start)[0]
+
+def bdecode_lazy(x):
+    """
+    Decodes a bencoded string lazily.  The structure of the whole string is
+    checked while it is scanned for offsets, but a dictionary or list is
+    returned as a :class:`LazyDict` or :class:`LazyList` that decodes its
+    contents on access.
+    """
+    try:
+        r, l = decode_lazy(x, 0)
+    except (IndexError, KeyError, ValueError):
+        raise Exception("not a valid bencoded string")
+
+    return r
+
 from types import StringType, IntType, LongType, DictType, ListType, TupleType
 
 
@@ -38,6 +38,7 @@
 
 import os
 import time
+import itertools
 import subprocess
 import platform
 import chardet
@@ -535,6 +536,45 @@ def path_join(*parts):
             path += '/' + part
     return path
 
+def encode_pieces_runs(pieces):
+    """
+    Run-length encodes a sequence of piece states, as used by the
+    `pieces_runs` status key.
+
+    :param pieces: the state of every piece
+    :type pieces: iterable of int
+    :returns: the state and number of pieces of every run, one after the
+        other, ie. [state, count, state, count, ...]
+    :rtype: list
+
+    **Usage**
+
+    >>> encode_pieces_runs([3, 3, 3, 0, 2, 2])
+    [3, 3, 0, 1, 2, 2]
+
+    """
+    runs = []
+    for state, group in itertools.groupby(pieces):
+        runs.append(state)
+        runs.append(sum(1 for _ in group))
+    return runs
+
+def decode_pieces_runs(runs):
+    """
+    Expands the runs returned by :func:`encode_pieces_runs` back in to the
+    state of every piece.
+
+    :param runs: the runs
+    :type runs: list
+    :returns: the state of every piece
+    :rtype: list
+
+    """
+    pieces = []
+    for i in xrange(0, len(runs), 2):
+        pieces.extend([runs[i]] * runs[i + 1])
+    return pieces
+
 XML_ESCAPES = (
     ('&', '&amp;'),
     ('<', '&lt;'),
@@ -65,12 +65,22 @@
 this can only be done for the 'config file version' and not for the 'format'
 version as this will be done internally.
 
+Saving
+
+A config is only written when its serialized content differs from what was
+last loaded or saved, which is checked against a hash held in memory so the
+file does not have to be read back.  The writing itself is done by a
+background thread, see :class:`ConfigWriter`.
+
 """
 
 import cPickle as pickle
 import logging
 import shutil
 import os
+import atexit
+import threading
+from hashlib import sha1
 
 import deluge.common
 
@@ -123,6 +133,138 @@ def find_json_objects(s):
     return objects
 
 
+class ConfigWriter(object):
+    """
+    Writes config files in a thread so that the reactor never waits on the
+    disk.  If a file is saved again before its previous data was written, only
+    the latest data is written.
+    """
+    def __init__(self):
+        # The data waiting to be written {filename: (data, errback)}
+        self.pending = {}
+        # The file being written by the thread
+        self.writing = None
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def write(self, filename, data, errback=None):
+        """
+        Queues data to be written to a file.
+
+        :param filename: the path of the file
+        :type filename: str
+        :param data: the contents of the file
+        :type data: str
+        :param errback: called from the writer thread if the write fails
+        :type errback: callable
+
+        """
+        self.condition.acquire()
+        try:
+            self.pending[filename] = (data, errback)
+            if self.thread is None or not self.thread.isAlive():
+                self.thread = threading.Thread(target=self.run, name="ConfigWriter")
+                self.thread.setDaemon(True)
+                self.thread.start()
+            self.condition.notifyAll()
+        finally:
+            self.condition.release()
+
+    def flush(self, filename=None):
+        """
+        Waits until the data queued for a file has been written.
+
+        :param filename: the path of the file, if None waits for all files
+        :type filename: str
+
+        """
+        self.condition.acquire()
+        try:
+            while self.is_pending(filename):
+                self.condition.wait()
+        finally:
+            self.condition.release()
+
+    def is_pending(self, filename=None):
+        if filename is None:
+            return bool(self.pending) or self.writing is not None
+        return filename in self.pending or self.writing == filename
+
+    def run(self):
+        while True:
+            self.condition.acquire()
+            try:
+                while not self.pending:
+                    self.condition.wait()
+                filename, (data, errback) = self.pending.popitem()
+                self.writing = filename
+            finally:
+                self.condition.release()
+
+            try:
+                try:
+                    success = write_config_file(filename, data)
+                except Exception, e:
+                    log.exception(e)
+                    success = False
+                if not success and errback:
+                    errback()
+            except Exception, e:
+                log.exception(e)
+            finally:
+                self.condition.acquire()
+                try:
+                    self.writing = None
+                    self.condition.notifyAll()
+                finally:
+                    self.condition.release()
+
+def write_config_file(filename, data):
+    """
+    Writes a config file, keeping a backup of the previous one.
+
+    :param filename: the path of the file
+    :type filename: str
+    :param data: the contents of the file
+    :type data: str
+
+    :returns: whether or not the write succeeded
+    :rtype: bool
+
+    """
+    # Save the new config and make sure it's written to disk
+    try:
+        log.debug("Saving new config file %s", filename + ".new")
+        f = open(filename + ".new", "wb")
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+    except (IOError, OSError), e:
+        log.error("Error writing new config file: %s", e)
+        return False
+
+    # Make a backup of the old config
+    try:
+        log.debug("Backing up old config file to %s~", filename)
+        shutil.move(filename, filename + "~")
+    except Exception, e:
+        log.error("Error backing up old config..")
+
+    # The new config file has been written successfully, so let's move it over
+    # the existing one.
+    try:
+        log.debug("Moving new config file %s to %s..", filename + ".new", filename)
+        shutil.move(filename + ".new", filename)
+    except Exception, e:
+        log.error("Error moving new config file: %s", e)
+        return False
+    return True
+
+writer = ConfigWriter()
+# Make sure nothing queued is lost when the process exits
+atexit.register(writer.flush)
+
 class Config(object):
     """
     This class is used to access/create/modify config files
@@ -147,6 +289,11 @@ def __init__(self, filename, defaults=None, config_dir=None):
         # is set.
         self._save_timer = None
 
+        # The hash of the config as it was last loaded or saved
+        self.__saved_hash = None
+        # Set when a value has been set or deleted since then
+        self.__dirty = True
+
         if defaults:
             for key, value in defaults.iteritems():
                 self.set_item(key, value)
@@ -196,6 +343,7 @@ def set_item(self, key, value):
 
         if not self.__config.has_key(key):
             self.__config[key] = value
+            self.__dirty = True
             log.debug("Setting '%s' to %s of %s", key, value, type(value))
             return
 
@@ -218,6 +366,7 @@ def set_item(self, key, value):
         log.debug("Setting '%s' to %s of %s", key, value, type(value))
 
         self.__config[key] = value
+        self.__dirty = True
         # Run the set_function for this key if any
         from twisted.internet import reactor
         try:
@@ -287,6 +436,7 @@ def del_item(self, key):
         >>> del config["test"]
         """
         del self.__config[key]
+        self.__dirty = True
         # We set the save_timer for 5 seconds if not already set
         from twisted.internet import reactor
         if not self._save_timer or not self._save_timer.active():
@@ -382,6 +532,9 @@ def load(self, filename=None):
         if not filename:
             filename = self.__config_file
 
+        # Do not read the file while it is still being written
+        writer.flush(filename)
+
         try:
             data = open(filename, "rb").read()
         except IOError, e:
@@ -413,71 +566,84 @@ def load(self, filename=None):
             except Exception, e:
                 log.exception(e)
                 log.warning("Unable to load config file: %s", filename)
+            else:
+                if filename == self.__config_file:
+                    self.__saved_hash = sha1(self.__serialize()).digest()
+                    self.__dirty = False
 
         log.debug("Config %s version: %s.%s loaded: %s", filename,
             self.__version["format"], self.__version["file"], self.__config)
 
-    def save(self, filename=None):
+    def save(self, filename=None, sync=False):
         """
         Save configuration to disk
 
+        The config is only written if it has changed since it was last loaded
+        or saved.  The file is written in the background, a new Config object
+        for the same file will wait for it to be written before loading.
+
         :param filename: if None, uses filename set in object initiliazation
+        :param sync: if True, wait for the file to be written
         :rtype bool:
-        :return: whether or not the save succeeded.
+        :return: whether or not the save succeeded, if not `sync` only whether
+            it could be queued
 
         """
-        if not filename:
-            filename = self.__config_file
-        # Check to see if the current config differs from the one on disk
-        # We will only write a new config file if there is a difference
-        try:
-            data = open(filename, "rb").read()
-            objects = find_json_objects(data)
-            start, end = objects[0]
-            version = json.loads(data[start:end])
-            start, end = objects[1]
-            loaded_data = json.loads(data[start:end])
-            if self.__config == loaded_data and self.__version == version:
-                # The config has not changed so lets just return
-                if self._save_timer and self._save_timer.active():
-                    self._save_timer.cancel()
-                return True
-        except IOError, e:
-            log.warning("Unable to open config file: %s because: %s", filename, e)
-
-        # Save the new config and make sure it's written to disk
-        try:
-            log.debug("Saving new config file %s", filename + ".new")
-            f = open(filename + ".new", "wb")
-            json.dump(self.__version, f, indent=2)
-            json.dump(self.__config, f, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
-            f.close()
-        except IOError, e:
-            log.error("Error writing new config file: %s", e)
-            return False
+        if self._save_timer and self._save_timer.active():
+            self._save_timer.cancel()
 
-        # Make a backup of the old config
-        try:
-            log.debug("Backing up old config file to %s~", filename)
-            shutil.move(filename, filename + "~")
-        except Exception, e:
-            log.error("Error backing up old config..")
+        if filename and filename != self.__config_file:
+            try:
+                data = self.__serialize()
+            except Exception, e:
+                log.error("Error serializing config: %s", e)
+                return False
+            failed = []
+            writer.write(filename, data, lambda: failed.append(True))
+            if sync:
+                writer.flush(filename)
+            return not failed
+
+        if sync:
+            # A write still pending could fail and has to be retried
+            writer.flush(self.__config_file)
+
+        # Values can only change unnoticed inside nested containers, without
+        # those the config does not have to be serialized to be compared
+        if not self.__dirty and not self.__has_containers():
+            return True
 
-        # The new config file has been written successfully, so let's move it over
-        # the existing one.
         try:
-            log.debug("Moving new config file %s to %s..", filename + ".new", filename)
-            shutil.move(filename + ".new", filename)
+            data = self.__serialize()
         except Exception, e:
-            log.error("Error moving new config file: %s", e)
+            log.error("Error serializing config: %s", e)
             return False
-        else:
+        self.__dirty = False
+
+        data_hash = sha1(data).digest()
+        if data_hash == self.__saved_hash:
             return True
-        finally:
-            if self._save_timer and self._save_timer.active():
-                self._save_timer.cancel()
+
+        self.__saved_hash = data_hash
+        writer.write(self.__config_file, data, self.__save_failed)
+        if sync:
+            writer.flush(self.__config_file)
+            return self.__saved_hash == data_hash
+        return True
+
+    def __has_containers(self):
+        for value in self.__config.itervalues():
+            if isinstance(value, (dict, list)):
+                return True
+        return False
+
+    def __serialize(self):
+        return json.dumps(self.__version, indent=2) + json.dumps(self.__config, indent=2)
+
+    def __save_failed(self):
+        # Make sure the next save writes the config again
+        self.__saved_hash = None
+        self.__dirty = True
 
     def run_converter(self, input_range, output_version, func):
         """
@@ -510,6 +676,7 @@ def run_converter(self, input_range, output_version, func):
             raise e
         else:
             self.__version["file"] = output_version
+            self.__dirty = True
             self.save()
 
     @property
@@ -520,6 +687,8 @@ def config_file(self):
     def config():
         """The config dictionary"""
         def fget(self):
+            # The dict can be changed directly from here on
+            self.__dirty = True
             return self.__config
         def fdel(self):
             return self.save()
@@ -41,6 +41,7 @@
 
 """
 
+import time
 import logging
 from twisted.internet import reactor
 
@@ -49,6 +50,14 @@
 
 log = logging.getLogger(__name__)
 
+# The alerts that only the last one of matters when several are popped at
+# once for the same torrent, and the alert attribute that also has to match
+COALESCED_ALERTS = {
+    "state_changed_alert": None,
+    "tracker_announce_alert": "url",
+    "tracker_reply_alert": "url",
+}
+
 class AlertManager(component.Component):
     def __init__(self):
         log.debug("AlertManager initialized..")
@@ -69,6 +78,11 @@ def __init__(self):
 
         self.delayed_calls = []
 
+        # The number of alerts popped and coalesced {"alert_type": [popped, coalesced]}
+        self.alert_counts = {}
+        # The time spent in the handlers {"Class.method": [calls, total time, max time]}
+        self.handler_times = {}
+
     def update(self):
         self.delayed_calls = [dc for dc in self.delayed_calls if dc.active()]
         self.handle_alerts()
@@ -108,26 +122,125 @@ def deregister_handler(self, handler):
                 # Handler is in this alert type list
                 value.remove(handler)
 
+    def pop_alerts(self):
+        """
+        Pops all the alerts in the session queue.
+
+        :returns: the alerts, oldest first
+        :rtype: list
+        """
+        if hasattr(self.session, "pop_alerts"):
+            return self.session.pop_alerts()
+
+        alerts = []
+        alert = self.session.pop_alert()
+        while alert is not None:
+            alerts.append(alert)
+            alert = self.session.pop_alert()
+        return alerts
+
     def handle_alerts(self, wait=False):
         """
         Pops all libtorrent alerts in the session queue and handles them
         appropriately.
 
+        The alerts are handled together in a single call scheduled on the
+        reactor, and of the alerts in :data:`COALESCED_ALERTS` only the last
+        one for each torrent is handled.
+
         :param wait: bool, if True then the handler functions will be run right
             away and waited to return before processing the next alert
         """
-        alert = self.session.pop_alert()
-        # Loop through all alerts in the queue
-        while alert is not None:
+        alerts = self.pop_alerts()
+        if not alerts:
+            return
+
+        debug = log.isEnabledFor(logging.DEBUG)
+        batch = []
+        seen = set()
+        # Go through the alerts newest first so the last of each is kept
+        for alert in reversed(alerts):
             alert_type = type(alert).__name__
-            # Display the alert message
-            log.debug("%s: %s", alert_type, alert.message())
-            # Call any handlers for this alert type
-            if alert_type in self.handlers:
-                for handler in self.handlers[alert_type]:
-                    if not wait:
-                        self.delayed_calls.append(reactor.callLater(0, handler, alert))
-                    else:
-                        handler(alert)
+            counts = self.alert_counts.setdefault(alert_type, [0, 0])
+            counts[0] += 1
+            if debug:
+                # Display the alert message
+                log.debug("%s: %s", alert_type, alert.message())
+
+            if not self.handlers.get(alert_type):
+                continue
+
+            if alert_type in COALESCED_ALERTS:
+                try:
+                    key = (alert_type, str(alert.handle.info_hash()))
+                    attribute = COALESCED_ALERTS[alert_type]
+                    if attribute:
+                        key += (getattr(alert, attribute),)
+                except RuntimeError:
+                    # The torrent is gone, the handlers will find that out
+                    key = None
+                if key is not None:
+                    if key in seen:
+                        counts[1] += 1
+                        continue
+                    seen.add(key)
+            batch.append((alert_type, alert))
+        batch.reverse()
+
+        if not batch:
+            return
+        if wait:
+            self.dispatch_alerts(batch)
+        else:
+            self.delayed_calls.append(reactor.callLater(0, self.dispatch_alerts, batch))
+
+    def dispatch_alerts(self, batch):
+        """
+        Calls the handlers of the alerts.
 
-            alert = self.session.pop_alert()
+        :param batch: the alerts to handle
+        :type batch: list of (alert_type, alert)
+        """
+        for alert_type, alert in batch:
+            # Copy as a handler can deregister itself
+            for handler in list(self.handlers.get(alert_type, ())):
+                start = time.time()
+                try:
+                    handler(alert)
+                except Exception, e:
+                    log.exception(e)
+                elapsed = time.time() - start
+
+                name = getattr(handler, "__name__", repr(handler))
+                if hasattr(handler, "im_self"):
+                    name = "%s.%s" % (handler.im_self.__class__.__name__, name)
+                times = self.handler_times.get(name)
+                if times is None:
+                    times = self.handler_times[name] = [0, 0.0, 0.0]
+                times[0] += 1
+                times[1] += elapsed
+                if elapsed > times[2]:
+                    times[2] = elapsed
+
+    def get_stats(self):
+        """
+        Returns the number of alerts of each type popped and coalesced, and
+        the time spent in each handler.
+
+        :returns: {"alerts": {"alert_type": {"count": int, "coalesced": int}},
+            "handlers": {"handler": {"calls": int, "total_time": float,
+            "max_time": float}}}
+        :rtype: dict
+        """
+        alerts = {}
+        for alert_type, (count, coalesced) in self.alert_counts.iteritems():
+            alerts[alert_type] = {"count": count, "coalesced": coalesced}
+
+        handlers = {}
+        for name, (calls, total_time, max_time) in self.handler_times.iteritems():
+            handlers[name] = {
+                "calls": calls,
+                "total_time": total_time,
+                "max_time": max_time
+            }
+        return {"alerts": alerts, "handlers": handlers}
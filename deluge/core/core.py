@@ -60,6 +60,7 @@
 from deluge.core.pluginmanager import PluginManager
 from deluge.core.alertmanager import AlertManager
 from deluge.core.filtermanager import FilterManager
+from deluge.core.subscriptionmanager import SubscriptionManager
 from deluge.core.preferencesmanager import PreferencesManager
 from deluge.core.authmanager import AuthManager
 from deluge.core.eventmanager import EventManager
@@ -113,6 +114,7 @@ def __init__(self, listen_interface=None):
         self.pluginmanager = PluginManager(self)
         self.torrentmanager = TorrentManager()
         self.filtermanager = FilterManager(self)
+        self.subscriptionmanager = SubscriptionManager(self)
         self.authmanager = AuthManager()
 
         # New release check information
@@ -134,8 +136,13 @@ def start(self):
         """Starts the core"""
         # New release check information
         self.__new_release = None
+        # Set on shutdown to stop creating torrents
+        self.create_torrent_cancel = threading.Event()
 
     def stop(self):
+        # Don't wait for torrents being created to be hashed
+        self.create_torrent_cancel.set()
+
         # Save the DHT state if necessary
         if self.config["dht"]:
             self.save_dht_state()
@@ -349,6 +356,18 @@ def get_session_status(self, keys):
 
         return status
 
+    @export
+    def get_alert_stats(self):
+        """
+        Returns the number of libtorrent alerts handled by type and the time
+        spent in their handlers.
+
+        :returns: the alert stats, see AlertManager.get_stats
+        :rtype: dict
+
+        """
+        return self.alertmanager.get_stats()
+
     @export
     def get_cache_status(self):
         """
@@ -453,6 +472,38 @@ def get_torrents_status(self, filter_dict, keys, diff=False):
 
         return status_dict
 
+    @export
+    def subscribe_torrents_status(self, filter_dict, keys, interval=1):
+        """
+        Subscribes to the status of the torrents matching filter_dict.  The
+        changes are sent as TorrentsStatusUpdateEvents with the subscription
+        id, starting with the full status of the matching torrents, so
+        register a handler for it before subscribing.
+
+        :param filter_dict: the filter, as used by get_torrents_status
+        :type filter_dict: dict
+        :param keys: the status keys, at least one is required
+        :type keys: list
+        :param interval: the minimum number of seconds between updates
+        :type interval: float
+
+        :returns: the subscription id
+        :rtype: int
+
+        """
+        return self.subscriptionmanager.subscribe(filter_dict, keys, interval)
+
+    @export
+    def unsubscribe_torrents_status(self, subscription_id):
+        """
+        Stops the updates of a subscription made with subscribe_torrents_status.
+
+        :returns: True if the subscription was removed
+        :rtype: bool
+
+        """
+        return self.subscriptionmanager.unsubscribe(subscription_id)
+
     @export
     def get_filter_tree(self , show_zero_hits=True, hide_cat=None):
         """
@@ -667,16 +718,22 @@ def create_torrent(self, path, tracker, piece_length, comment, target,
     def _create_torrent_thread(self, path, tracker, piece_length, comment, target,
                     webseeds, private, created_by, trackers, add_to_session):
         import deluge.metafile
-        deluge.metafile.make_meta_file(
-            path,
-            tracker,
-            piece_length,
-            comment=comment,
-            target=target,
-            webseeds=webseeds,
-            private=private,
-            created_by=created_by,
-            trackers=trackers)
+        from deluge.maketorrent import HashingCancelled
+        try:
+            deluge.metafile.make_meta_file(
+                path,
+                tracker,
+                piece_length,
+                comment=comment,
+                target=target,
+                webseeds=webseeds,
+                private=private,
+                created_by=created_by,
+                trackers=trackers,
+                cancel_event=self.create_torrent_cancel)
+        except HashingCancelled:
+            log.debug("torrent creation cancelled")
+            return
         log.debug("torrent created!")
         if add_to_session:
             options = {}
@@ -38,6 +38,13 @@
 
 STATE_SORT = ["All", "Downloading", "Seeding", "Active", "Paused", "Queued"]
 
+#tree fields that are kept in an index instead of being read from each
+#torrent's status on every query.
+INDEXED_FIELDS = ["state", "tracker_host", "owner"]
+
+#the number of torrents added to the search indexes on each update.
+SEARCH_INDEX_BATCH = 100
+
 log = logging.getLogger(__name__)
 
 #special purpose filters:
@@ -56,67 +63,100 @@ def filter_one_keyword(torrent_ids, keyword):
     search torrent on keyword.
     searches title,state,tracker-status,tracker,files
     """
-    all_torrents = component.get("TorrentManager").torrents
-    #filter:
-    found = False
+    matches = component.get("FilterManager").search_keyword(keyword)
     for torrent_id in torrent_ids:
-        torrent = all_torrents[torrent_id]
-        if keyword in torrent.filename.lower():
-            yield torrent_id
-        elif keyword in torrent.state.lower():
-            yield torrent_id
-        elif torrent.trackers and keyword in torrent.trackers[0]["url"]:
+        if torrent_id in matches:
             yield torrent_id
-        elif keyword in torrent_id:
-            yield torrent_id
-        #i want to find broken torrents (search on "error", or "unregistered")
-        elif keyword in torrent.tracker_status.lower():
-            yield torrent_id
-        else:
-            for t_file in torrent.get_files():
-                if keyword in t_file["path"].lower():
-                    yield torrent_id
-                    break
 
 def filter_by_name(torrent_ids, search_string):
-    all_torrents = component.get("TorrentManager").torrents
+    filtermanager = component.get("FilterManager")
     try:
         search_string, match_case = search_string[0].split('::match')
     except ValueError:
         search_string = search_string[0]
         match_case = False
 
-    if match_case is False:
-        search_string = search_string.lower()
-
+    matches = filtermanager.search_name(search_string, match_case is not False)
     for torrent_id in torrent_ids:
-        torrent_name = all_torrents[torrent_id].get_name()
-        if match_case is False:
-            torrent_name = all_torrents[torrent_id].get_name().lower()
-        else:
-            torrent_name = all_torrents[torrent_id].get_name()
-
-        if search_string in torrent_name:
+        if torrent_id in matches:
             yield torrent_id
 
 def tracker_error_filter(torrent_ids, values):
-    filtered_torrent_ids = []
-    tm = component.get("TorrentManager")
+    filtermanager = component.get("FilterManager")
 
     # If this is a tracker_host, then we need to filter on it
     if values[0] != "Error":
-        for torrent_id in torrent_ids:
-            if values[0] == tm[torrent_id].get_status(["tracker_host"])["tracker_host"]:
-                filtered_torrent_ids.append(torrent_id)
-        return filtered_torrent_ids
+        matches = filtermanager.index["tracker_host"].get(values[0], ())
+    else:
+        # Only return the torrent_ids that have 'Error:' in their tracker_status
+        matches = filtermanager.tracker_errors
 
-    # Check all the torrent's tracker_status for 'Error:' and only return torrent_ids
-    # that have this substring in their tracker_status
-    for torrent_id in torrent_ids:
-        if "Error:" in tm[torrent_id].get_status(["tracker_status"])["tracker_status"]:
-            filtered_torrent_ids.append(torrent_id)
+    return [torrent_id for torrent_id in torrent_ids if torrent_id in matches]
 
-    return filtered_torrent_ids
+def _to_unicode(text):
+    if isinstance(text, str):
+        return text.decode("utf8", "ignore")
+    return text
+
+class TextIndex(object):
+    """
+    A trigram index over a lowercased text for each torrent, so that substring
+    searches only have to look at the torrents that contain every trigram of
+    the search string.
+    """
+    def __init__(self):
+        # {torrent_id: text}
+        self.texts = {}
+        # {trigram: set(torrent_ids)}
+        self.trigrams = {}
+
+    def _get_trigrams(self, text):
+        return set(text[i:i + 3] for i in xrange(len(text) - 2))
+
+    def add(self, torrent_id, texts):
+        """Indexes the list of strings `texts` for torrent_id, replacing any
+        previously indexed text"""
+        text = u"\n".join(_to_unicode(t) for t in texts).lower()
+        if self.texts.get(torrent_id) == text:
+            return
+        self.remove(torrent_id)
+        self.texts[torrent_id] = text
+        for trigram in self._get_trigrams(text):
+            self.trigrams.setdefault(trigram, set()).add(torrent_id)
+
+    def remove(self, torrent_id):
+        text = self.texts.pop(torrent_id, None)
+        if text is None:
+            return
+        for trigram in self._get_trigrams(text):
+            bucket = self.trigrams[trigram]
+            bucket.discard(torrent_id)
+            if not bucket:
+                del self.trigrams[trigram]
+
+    def search(self, keyword):
+        """
+        Returns the set of torrent_ids whose text contains keyword, which is
+        expected to be lowercase.
+        """
+        keyword = _to_unicode(keyword)
+        candidates = None
+        for trigram in sorted(self._get_trigrams(keyword),
+                              key=lambda t: len(self.trigrams.get(t, ()))):
+            bucket = self.trigrams.get(trigram)
+            if not bucket:
+                return set()
+            if candidates is None:
+                candidates = set(bucket)
+            else:
+                candidates &= bucket
+
+        if candidates is None:
+            # The keyword is too short to have a trigram
+            candidates = self.texts
+
+        return set(torrent_id for torrent_id in candidates
+                   if keyword in self.texts[torrent_id])
 
 class FilterManager(component.Component):
     """FilterManager
@@ -143,6 +183,186 @@ def _init_users_tree():
             return {"": 0}
         self.register_tree_field("owner", _init_users_tree)
 
+        # The torrent_ids for each value of the indexed fields
+        # {field: {value: set(torrent_ids)}}
+        self.index = dict((field, {}) for field in INDEXED_FIELDS)
+        # The values each torrent is indexed under {torrent_id: {field: value}}
+        self.torrent_index = {}
+        # The torrent_ids that have an error in their tracker_status
+        self.tracker_errors = set()
+
+        component.get("EventManager").register_event_handler(
+            "TorrentAddedEvent", self.on_torrent_added)
+        component.get("EventManager").register_event_handler(
+            "TorrentRemovedEvent", self.on_torrent_removed)
+
+        # Search indexes for the keyword and name filters.  The file list
+        # only changes on metadata and renames, so it is indexed lazily
+        # from self.search_dirty.
+        self.files_index = TextIndex()
+        self.name_index = TextIndex()
+        self.tracker_index = TextIndex()
+        self.search_dirty = set()
+
+        component.get("EventManager").register_event_handler(
+            "TorrentFileRenamedEvent", self.on_torrent_file_renamed)
+        component.get("EventManager").register_event_handler(
+            "TorrentFolderRenamedEvent", self.on_torrent_folder_renamed)
+        component.get("AlertManager").register_handler(
+            "metadata_received_alert", self.on_alert_metadata_received)
+
+    def update(self):
+        # Index some of the new or changed torrents in the background
+        self._update_search_index(SEARCH_INDEX_BATCH)
+
+    def on_torrent_added(self, torrent_id, from_state):
+        torrent = self.torrents[torrent_id]
+        self.torrent_index[torrent_id] = {}
+        self.update_index(torrent_id, "state", torrent.state)
+        self.update_index(torrent_id, "owner", torrent.owner)
+        self.update_tracker_index(torrent_id)
+        self.search_dirty.add(torrent_id)
+
+    def on_torrent_removed(self, torrent_id):
+        for field, value in self.torrent_index.pop(torrent_id, {}).iteritems():
+            self._remove_from_bucket(field, value, torrent_id)
+        self.tracker_errors.discard(torrent_id)
+        self.files_index.remove(torrent_id)
+        self.name_index.remove(torrent_id)
+        self.tracker_index.remove(torrent_id)
+        self.search_dirty.discard(torrent_id)
+
+    def on_torrent_file_renamed(self, torrent_id, index, name):
+        if torrent_id in self.torrent_index:
+            self.search_dirty.add(torrent_id)
+
+    def on_torrent_folder_renamed(self, torrent_id, old, new):
+        if torrent_id in self.torrent_index:
+            self.search_dirty.add(torrent_id)
+
+    def on_alert_metadata_received(self, alert):
+        torrent_id = str(alert.handle.info_hash())
+        if torrent_id in self.torrent_index:
+            self.search_dirty.add(torrent_id)
+
+    def update_index(self, torrent_id, field, value):
+        """
+        Moves a torrent to the `value` bucket of an indexed field.  Torrents
+        that have not been added to the index yet are ignored.
+
+        :param torrent_id: the torrent that changed
+        :type torrent_id: string
+        :param field: the indexed field, ie, "state"
+        :type field: string
+        :param value: the new value of the field for this torrent
+
+        """
+        if torrent_id not in self.torrent_index:
+            return
+
+        values = self.torrent_index[torrent_id]
+        if field in values:
+            if values[field] == value:
+                return
+            self._remove_from_bucket(field, values[field], torrent_id)
+
+        values[field] = value
+        self.index[field].setdefault(value, set()).add(torrent_id)
+
+    def update_tracker_index(self, torrent_id):
+        """Updates the tracker_host and tracker error index for a torrent"""
+        if torrent_id not in self.torrent_index:
+            return
+
+        torrent = self.torrents[torrent_id]
+        self.update_index(torrent_id, "tracker_host", torrent.get_tracker_host())
+        if "Error:" in torrent.tracker_status:
+            self.tracker_errors.add(torrent_id)
+        else:
+            self.tracker_errors.discard(torrent_id)
+
+        tracker_texts = [torrent.tracker_status]
+        if torrent.trackers:
+            tracker_texts.append(torrent.trackers[0]["url"])
+        self.tracker_index.add(torrent_id, tracker_texts)
+
+    def _update_search_index(self, limit=None):
+        """
+        Indexes the name and files of the torrents in self.search_dirty
+
+        :param limit: the maximum number of torrents to index, all if None
+        :type limit: int
+
+        """
+        while self.search_dirty and limit != 0:
+            torrent_id = self.search_dirty.pop()
+            self.files_index.add(torrent_id, self._get_file_texts(torrent_id))
+            self.name_index.add(torrent_id, [self.torrents[torrent_id].get_name()])
+            if limit is not None:
+                limit -= 1
+
+    def _get_file_texts(self, torrent_id):
+        """Returns the texts the keyword filter searches besides the tracker"""
+        torrent = self.torrents[torrent_id]
+        texts = [torrent.filename, torrent_id]
+        texts.extend(f["path"] for f in torrent.get_files())
+        return texts
+
+    def _search_dirty(self, matches, search_string, get_texts):
+        """
+        Searches the torrents not indexed yet one by one, as indexing all of
+        them at once would block the reactor.  Their out of date entries in
+        the index are removed from matches.
+        """
+        matches.difference_update(self.search_dirty)
+        search_string = _to_unicode(search_string)
+        for torrent_id in self.search_dirty:
+            text = u"\n".join(_to_unicode(t) for t in get_texts(torrent_id))
+            if search_string in text.lower():
+                matches.add(torrent_id)
+
+    def search_keyword(self, keyword):
+        """
+        Returns the set of torrent_ids with keyword in their filename, state,
+        tracker, tracker status, torrent_id or file paths.
+
+        :param keyword: the lowercase keyword to search for
+        :type keyword: string
+
+        """
+        matches = self.files_index.search(keyword)
+        self._search_dirty(matches, keyword, self._get_file_texts)
+        matches.update(self.tracker_index.search(keyword))
+        for state, bucket in self.index["state"].iteritems():
+            if keyword in state.lower():
+                matches.update(bucket)
+        return matches
+
+    def search_name(self, search_string, match_case=False):
+        """
+        Returns the set of torrent_ids with search_string in their name
+
+        :param search_string: the string to search for
+        :type search_string: string
+        :param match_case: if True, the search is case sensitive
+        :type match_case: bool
+
+        """
+        search_string = _to_unicode(search_string)
+        matches = self.name_index.search(search_string.lower())
+        self._search_dirty(matches, search_string.lower(),
+                           lambda torrent_id: [self.torrents[torrent_id].get_name()])
+        if match_case:
+            matches = set(torrent_id for torrent_id in matches
+                if search_string in self.torrents[torrent_id].get_name())
+        return matches
+
+    def _remove_from_bucket(self, field, value, torrent_id):
+        bucket = self.index[field][value]
+        bucket.discard(torrent_id)
+        if not bucket:
+            del self.index[field][value]
+
     def filter_torrent_ids(self, filter_dict):
         """
         returns a list of torrent_id's matching filter_dict.
@@ -192,15 +412,30 @@ def filter_torrent_ids(self, filter_dict):
             return torrent_ids
 
         #leftover filter arguments:
+        #indexed fields are filtered on the union of their value buckets.
+        for field, values in filter_dict.items():
+            if field in self.index:
+                matches = set()
+                for value in values:
+                    matches.update(self.index[field].get(value, ()))
+                torrent_ids = [t_id for t_id in torrent_ids if t_id in matches]
+                del filter_dict[field]
+
+        if not filter_dict: #return if there's  nothing more to filter
+            return torrent_ids
+
         #default filter on status fields.
         status_func = self.core.get_torrent_status #premature optimalisation..
-        for torrent_id in list(torrent_ids):
+        filtered_torrent_ids = []
+        for torrent_id in torrent_ids:
             status = status_func(torrent_id, filter_dict.keys()) #status={key:value}
             for field, values in filter_dict.iteritems():
-                if (not status[field] in values) and torrent_id in torrent_ids:
-                    torrent_ids.remove(torrent_id)
+                if not status[field] in values:
+                    break
+            else:
+                filtered_torrent_ids.append(torrent_id)
 
-        return torrent_ids
+        return filtered_torrent_ids
 
     def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
         """
@@ -216,12 +451,30 @@ def get_filter_tree(self, show_zero_hits=True, hide_cat=None):
 
         items = dict( (field, self.tree_fields[field]()) for field in tree_keys)
 
-        #count status fields.
-        for torrent_id in list(torrent_ids):
-            status = status_func(torrent_id, tree_keys) #status={key:value}
-            for field in tree_keys:
-                value = status[field]
-                items[field][value] = items[field].get(value, 0) + 1
+        #the session may be limited to the torrents this user can see.
+        if len(torrent_ids) == len(self.torrent_index):
+            visible_torrent_ids = None
+        else:
+            visible_torrent_ids = set(torrent_ids)
+
+        #count indexed fields from the size of their buckets.
+        scan_keys = []
+        for field in tree_keys:
+            if field not in self.index:
+                scan_keys.append(field)
+                continue
+            for value, bucket in self.index[field].iteritems():
+                if visible_torrent_ids is not None:
+                    bucket = bucket & visible_torrent_ids
+                items[field][value] = items[field].get(value, 0) + len(bucket)
+
+        #count the other status fields.
+        if scan_keys:
+            for torrent_id in torrent_ids:
+                status = status_func(torrent_id, scan_keys) #status={key:value}
+                for field in scan_keys:
+                    value = status[field]
+                    items[field][value] = items[field].get(value, 0) + 1
 
         if "tracker_host" in items:
             items["tracker_host"]["All"] = len(torrent_ids)
@@ -265,14 +518,12 @@ def deregister_tree_field(self, field):
             del self.tree_fields[field]
 
     def filter_state_active(self, torrent_ids):
-        get_status = self.core.get_torrent_status
-        for torrent_id in list(torrent_ids):
-            status = get_status(torrent_id, ["download_payload_rate", "upload_payload_rate"])
-            if status["download_payload_rate"] or status["upload_payload_rate"]:
-                pass #ok
-            else:
-                torrent_ids.remove(torrent_id)
-        return torrent_ids
+        active_torrent_ids = []
+        for torrent_id in torrent_ids:
+            status = self.torrents[torrent_id].status
+            if status.download_payload_rate or status.upload_payload_rate:
+                active_torrent_ids.append(torrent_id)
+        return active_torrent_ids
 
     def _hide_state_items(self, state_items):
         "for hide(show)-zero hits"
@@ -140,7 +140,8 @@
     "geoip_db_location": "/usr/share/GeoIP/GeoIP.dat",
     "cache_size": 512,
     "cache_expiry": 60,
-    "shared": False
+    "shared": False,
+    "status_update_interval": 1.0
 }
 
 class PreferencesManager(component.Component):
@@ -36,7 +36,6 @@
 """RPCServer Module"""
 
 import sys
-import zlib
 import os
 import stat
 import logging
@@ -48,13 +47,9 @@
 from OpenSSL import crypto, SSL
 from types import FunctionType
 
-try:
-    import rencode
-except ImportError:
-    import deluge.rencode as rencode
-
 import deluge.component as component
 import deluge.configmanager
+from deluge import transfer
 from deluge.core.authmanager import (AUTH_LEVEL_NONE, AUTH_LEVEL_DEFAULT,
                                      AUTH_LEVEL_ADMIN)
 from deluge.error import (DelugeError, NotAuthorizedError, WrappedException,
@@ -135,7 +130,8 @@ def getContext(self):
         return ctx
 
 class DelugeRPCProtocol(Protocol):
-    __buffer = None
+    # Set when the client has asked for framed messages
+    framed = False
 
     def dataReceived(self, data):
         """
@@ -144,36 +140,26 @@ def dataReceived(self, data):
         If the RPC Request message is valid, then the method is called in
         :meth:`dispatch`.
 
-        :param data: the data from the client. It should be a zlib compressed
-            rencoded string.
+        :param data: the data from the client. It should be framed or zlib
+            compressed rencoded messages, see :mod:`deluge.transfer`.
         :type data: str
 
         """
-        if self.__buffer:
-            # We have some data from the last dataReceived() so lets prepend it
-            data = self.__buffer + data
-            self.__buffer = None
-
-        while data:
-            dobj = zlib.decompressobj()
-            try:
-                request = rencode.loads(dobj.decompress(data))
-            except Exception, e:
-                #log.debug("Received possible invalid message (%r): %s", data, e)
-                # This could be cut-off data, so we'll save this in the buffer
-                # and try to prepend it on the next dataReceived()
-                self.__buffer = data
-                return
-            else:
-                data = dobj.unused_data
+        try:
+            requests = self.decoder.feed(data)
+        except ValueError, e:
+            log.warning("Received invalid message from client: %s", e)
+            self.transport.loseConnection()
+            return
 
+        for request in requests:
             if type(request) is not tuple:
                 log.debug("Received invalid message: type is not tuple")
-                return
+                continue
 
             if len(request) < 1:
                 log.debug("Received invalid message: there are no items")
-                return
+                continue
 
             for call in request:
                 if len(call) != 4:
@@ -192,7 +178,7 @@ def sendData(self, data):
         :type data: object
 
         """
-        self.transport.write(zlib.compress(rencode.dumps(data)))
+        self.transport.write(transfer.encode_message(data, self.framed))
 
     def connectionMade(self):
         """
@@ -201,6 +187,7 @@ def connectionMade(self):
         peer = self.transport.getPeer()
         log.info("Deluge Client connection made from: %s:%s",
                  peer.host, peer.port)
+        self.decoder = transfer.MessageDecoder()
         # Set the initial auth level of this session to AUTH_LEVEL_NONE
         self.factory.authorized_sessions[self.transport.sessionno] = AUTH_LEVEL_NONE
 
@@ -269,6 +256,11 @@ def sendError():
 
         if method == "daemon.info":
             # This is a special case and used in the initial connection process
+            # Clients that support framed messages say so here, older daemons
+            # ignore the keyword.  The reply is already framed, which tells
+            # the client it can send framed messages too.
+            if kwargs.get("framing", 0) >= transfer.FRAMING_VERSION:
+                self.framed = True
             self.sendData((RPC_RESPONSE, request_id, deluge.common.get_version()))
             return
         elif method == "daemon.login":
@@ -535,6 +527,24 @@ def emit_event(self, event):
                     (RPC_EVENT, event.name, event.args)
                 )
 
+    def emit_event_for_session_id(self, session_id, event):
+        """
+        Emits the event to a specific session, whether or not it registered
+        an interest in it.
+
+        :param session_id: the session to send the event to
+        :type session_id: int
+        :param event: the event to emit
+        :type event: :class:`deluge.event.DelugeEvent`
+        """
+        if session_id not in self.factory.session_protocols:
+            log.debug("Session %s is not connected, not emitting %s",
+                      session_id, event.name)
+            return
+        self.factory.session_protocols[session_id].sendData(
+            (RPC_EVENT, event.name, event.args)
+        )
+
 def check_ssl_keys():
     """
     Check for SSL cert/key and create them if necessary
@@ -0,0 +1,221 @@
+#
+# subscriptionmanager.py
+#
+# Copyright (C) 2026 agent <agent@local>
+#
+# Deluge is free software.
+#
+# You may redistribute it and/or modify it under the terms of the
+# GNU General Public License, as published by the Free Software
+# Foundation; either version 3 of the License, or (at your option)
+# any later version.
+#
+# deluge is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with deluge.    If not, write to:
+# 	The Free Software Foundation, Inc.,
+# 	51 Franklin Street, Fifth Floor
+# 	Boston, MA  02110-1301, USA.
+#
+#    In addition, as a special exception, the copyright holders give
+#    permission to link the code of portions of this program with the OpenSSL
+#    library.
+#    You must obey the GNU General Public License in all respects for all of
+#    the code used other than OpenSSL. If you modify file(s) with this
+#    exception, you may extend this exception to your version of the file(s),
+#    but you are not obligated to do so. If you do not wish to do so, delete
+#    this exception statement from your version. If you delete this exception
+#    statement from all source files in the program, then also delete it here.
+#
+#
+
+"""
+The SubscriptionManager pushes torrent status changes to the clients that
+subscribed to them, instead of every client polling get_torrents_status.
+"""
+
+import time
+import logging
+
+import deluge.component as component
+from deluge.event import TorrentsStatusUpdateEvent
+from deluge.error import DelugeError
+
+log = logging.getLogger(__name__)
+
+class Subscription(object):
+    """
+    A client's interest in the status of the torrents matching a filter.
+    """
+    def __init__(self, subscription_id, session_id, filter_dict, keys, interval):
+        self.subscription_id = subscription_id
+        self.session_id = session_id
+        self.filter_dict = filter_dict
+        self.keys = keys
+        self.interval = interval
+        # The time of the last update sent, 0 until the first one
+        self.last_sent = 0
+        # The torrent_ids the subscriber has the status of
+        self.torrent_ids = set()
+        # The changes not yet sent {torrent_id: {key: value}}
+        self.pending = {}
+
+    def select(self, status):
+        """Returns the part of a status dict this subscription is for"""
+        return dict((key, status[key]) for key in self.keys if key in status)
+
+class SubscriptionManager(component.Component):
+    """
+    Every tick the status of the torrents sent to any subscription is
+    fetched once, for all the keys any subscription is interested in, and
+    compared to the previous tick.  The changes are then queued on every subscription and sent to
+    each client as a :class:`TorrentsStatusUpdateEvent` at the rate the
+    client asked for.
+    """
+    def __init__(self, core):
+        component.Component.__init__(self, "SubscriptionManager", interval=1,
+                                     depend=["TorrentManager", "FilterManager"])
+        log.debug("SubscriptionManager init..")
+        self.core = core
+        self.subscriptions = {}
+        self.next_subscription_id = 0
+        # The status fetched on the last tick {torrent_id: {key: value}}
+        self.previous = {}
+
+    def start(self):
+        # The RPCServer is created after the core
+        self.rpcserver = component.get("RPCServer")
+
+    def stop(self):
+        self.subscriptions = {}
+        self.previous = {}
+
+    def subscribe(self, filter_dict, keys, interval):
+        """
+        Subscribes the current RPC session to status updates.
+
+        :param filter_dict: the filter the torrents must match, as used by
+            get_torrents_status
+        :type filter_dict: dict
+        :param keys: the status keys
+        :type keys: list
+        :param interval: the minimum number of seconds between updates
+        :type interval: float
+
+        :returns: the subscription id
+        :rtype: int
+
+        :raises DelugeError: if no keys are given
+
+        """
+        if not keys:
+            # Pushing every key of every torrent would cost more than polling
+            raise DelugeError("The status keys to subscribe to are required")
+
+        subscription_id = self.next_subscription_id
+        self.next_subscription_id += 1
+        self.subscriptions[subscription_id] = Subscription(
+            subscription_id, self.rpcserver.get_session_id(), dict(filter_dict),
+            list(keys), interval)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id):
+        """
+        Removes a subscription of the current RPC session.
+
+        :param subscription_id: the id returned by :meth:`subscribe`
+        :type subscription_id: int
+
+        :returns: True if the subscription was removed
+        :rtype: bool
+
+        """
+        subscription = self.subscriptions.get(subscription_id)
+        if subscription and subscription.session_id == self.rpcserver.get_session_id():
+            del self.subscriptions[subscription_id]
+            return True
+        return False
+
+    def update(self):
+        for subscription_id, subscription in self.subscriptions.items():
+            if not self.rpcserver.is_session_valid(subscription.session_id):
+                del self.subscriptions[subscription_id]
+
+        if not self.subscriptions:
+            self.previous = {}
+            return
+
+        # The status is only fetched once for all the subscriptions, and only
+        # for the torrents they have been sent
+        keys = set()
+        torrent_ids = set()
+        for subscription in self.subscriptions.itervalues():
+            keys.update(subscription.keys)
+            torrent_ids.update(subscription.torrent_ids)
+        keys = list(keys)
+
+        torrents = self.core.torrentmanager.torrents
+        current = {}
+        changes = {}
+        for torrent_id in torrent_ids:
+            if torrent_id not in torrents:
+                continue
+            status = self.core.get_torrent_status(torrent_id, keys)
+            current[torrent_id] = status
+            previous = self.previous.get(torrent_id)
+            if previous is None:
+                continue
+            changed = dict((key, value) for key, value in status.iteritems()
+                           if key not in previous or previous[key] != value)
+            if changed:
+                changes[torrent_id] = changed
+        self.previous = current
+
+        now = time.time()
+        for subscription in self.subscriptions.values():
+            for torrent_id, changed in changes.iteritems():
+                if torrent_id in subscription.torrent_ids:
+                    changed = subscription.select(changed)
+                    if changed:
+                        subscription.pending.setdefault(torrent_id, {}).update(changed)
+
+            if now - subscription.last_sent >= subscription.interval:
+                self.send_update(subscription, keys, now)
+
+    def send_update(self, subscription, keys, now):
+        # Filter as the subscriber's session so it only sees its torrents
+        session_id = self.rpcserver.factory.session_id
+        self.rpcserver.factory.session_id = subscription.session_id
+        try:
+            torrent_ids = set(self.core.filtermanager.filter_torrent_ids(
+                dict(subscription.filter_dict)))
+        finally:
+            self.rpcserver.factory.session_id = session_id
+
+        torrents = self.core.torrentmanager.torrents
+        torrent_ids.intersection_update(torrents)
+        status = {}
+        for torrent_id in torrent_ids:
+            if torrent_id not in subscription.torrent_ids:
+                # New torrents are sent in full, and compared from now on
+                if torrent_id not in self.previous:
+                    self.previous[torrent_id] = self.core.get_torrent_status(
+                        torrent_id, keys)
+                status[torrent_id] = subscription.select(self.previous[torrent_id])
+            elif torrent_id in subscription.pending:
+                status[torrent_id] = subscription.pending[torrent_id]
+        removed = list(subscription.torrent_ids - torrent_ids)
+
+        subscription.torrent_ids = torrent_ids
+        subscription.pending = {}
+        subscription.last_sent = now
+
+        # An update is sent even if nothing changed, so the client knows the
+        # subscription is still active and its status can be trusted
+        self.rpcserver.emit_event_for_session_id(
+            subscription.session_id,
+            TorrentsStatusUpdateEvent(subscription.subscription_id, status, removed))
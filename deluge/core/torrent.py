@@ -200,6 +200,9 @@ def __init__(self, handle, options, state=None, filename=None, magnet=None, owne
         self.forcing_recheck = False
         self.forcing_recheck_paused = False
 
+        # Create the getters used by get_status
+        self._create_status_funcs()
+
         log.debug("Torrent object created.")
 
     ## Options methods ##
@@ -226,10 +229,11 @@ def get_options(self):
         return self.options
 
     def get_name(self):
-        if self.handle.has_metadata():
-            name = self.torrent_info.file_at(0).path.split("/", 1)[0]
+        torrent_info = self.get_torrent_info()
+        if torrent_info:
+            name = torrent_info.file_at(0).path.split("/", 1)[0]
             if not name:
-                name = self.torrent_info.name()
+                name = torrent_info.name()
             try:
                 return name.decode("utf8", "ignore")
             except UnicodeDecodeError:
@@ -251,6 +255,7 @@ def get_name(self):
 
     def set_owner(self, account):
         self.owner = account
+        component.get("FilterManager").update_index(self.torrent_id, "owner", account)
 
     def set_max_connections(self, max_connections):
         self.options["max_connections"] = int(max_connections)
@@ -366,6 +371,7 @@ def set_trackers(self, trackers):
                 trackers.append(tracker)
             self.trackers = trackers
             self.tracker_host = None
+            component.get("FilterManager").update_tracker_index(self.torrent_id)
             return
 
         log.debug("Setting trackers for %s: %s", self.torrent_id, trackers)
@@ -387,6 +393,7 @@ def set_trackers(self, trackers):
             self.force_reannounce()
 
         self.tracker_host = None
+        component.get("FilterManager").update_tracker_index(self.torrent_id)
 
     ### End Options methods ###
 
@@ -396,12 +403,27 @@ def set_save_path(self, save_path):
     def set_tracker_status(self, status):
         """Sets the tracker status"""
         self.tracker_status = self.get_tracker_host() + ": " + status
+        component.get("FilterManager").update_tracker_index(self.torrent_id)
+
+    def _get_state(self):
+        return self._state
+
+    def _set_state(self, state):
+        if state != getattr(self, "_state", None):
+            component.get("FilterManager").update_index(self.torrent_id, "state", state)
+        self._state = state
+
+    state = property(_get_state, _set_state, doc="""
+        The torrent's state, ie, "Paused", "Seeding", etc.  Setting it keeps
+        the FilterManager's state index up to date.""")
 
     def update_state(self):
         """Updates the state based on what libtorrent's state for the torrent is"""
         # Set the initial state based on the lt state
         LTSTATE = deluge.common.LT_TORRENT_STATE
-        ltstate = int(self.handle.status().state)
+        # Refresh the status snapshot since the state is about to change
+        self.update_status()
+        ltstate = int(self.status.state)
 
         # Set self.state to the ltstate right away just incase we don't hit some
         # of the logic below
@@ -415,10 +437,10 @@ def update_state(self):
 
         # First we check for an error from libtorrent, and set the state to that
         # if any occurred.
-        if len(self.handle.status().error) > 0:
+        if len(self.status.error) > 0:
             # This is an error'd torrent
             self.state = "Error"
-            self.set_status_message(self.handle.status().error)
+            self.set_status_message(self.status.error)
             if self.handle.is_paused():
                 self.handle.auto_managed(False)
             return
@@ -497,11 +519,7 @@ def get_ratio(self):
 
     def get_files(self):
         """Returns a list of files this torrent contains"""
-        if self.torrent_info == None and self.handle.has_metadata():
-            torrent_info = self.handle.get_torrent_info()
-        else:
-            torrent_info = self.torrent_info
-
+        torrent_info = self.get_torrent_info()
         if not torrent_info:
             return []
 
@@ -616,157 +634,192 @@ def get_last_seen_complete(self):
         self.calculate_last_seen_complete()
         return self._last_seen_complete
 
-    def get_status(self, keys, diff=False):
+    def get_torrent_info(self):
         """
-        Returns the status of the torrent based on the keys provided
-
-        :param keys: the keys to get the status on
-        :type keys: list of str
-        :param diff: if True, will return a diff of the changes since the last
-        call to get_status based on the session_id
-        :type diff: bool
-
-        :returns: a dictionary of the status keys and their values
-        :rtype: dict
-
+        Returns the libtorrent torrent_info for this torrent, or None if the
+        metadata has not been received yet.  The torrent_info is only fetched
+        from the handle once.
         """
-
-        # Create the full dictionary
-        self.status = self.handle.status()
-        if self.handle.has_metadata():
+        if self.torrent_info is None and self.handle.has_metadata():
             self.torrent_info = self.handle.get_torrent_info()
+        return self.torrent_info
 
-        # Adjust progress to be 0-100 value
-        progress = self.status.progress * 100
+    def update_status(self, status=None):
+        """
+        Updates the cached libtorrent torrent_status used by the status getters
 
-        # Adjust status.distributed_copies to return a non-negative value
-        distributed_copies = self.status.distributed_copies
-        if distributed_copies < 0:
-            distributed_copies = 0.0
+        :param status: a torrent_status, if None it will be fetched from the handle
+        :type status: lt.torrent_status
 
-        # Calculate the seeds:peers ratio
-        if self.status.num_incomplete == 0:
-            # Use -1.0 to signify infinity
-            seeds_peers_ratio = -1.0
-        else:
-            seeds_peers_ratio = self.status.num_complete / float(self.status.num_incomplete)
-
-        full_status = {
-            "active_time": self.status.active_time,
-            "all_time_download": self.status.all_time_download,
-            "compact": self.options["compact_allocation"],
-            "distributed_copies": distributed_copies,
-            "download_payload_rate": self.status.download_payload_rate,
-            "file_priorities": self.options["file_priorities"],
-            "hash": self.torrent_id,
-            "is_auto_managed": self.options["auto_managed"],
-            "is_finished": self.is_finished,
-            "max_connections": self.options["max_connections"],
-            "max_download_speed": self.options["max_download_speed"],
-            "max_upload_slots": self.options["max_upload_slots"],
-            "max_upload_speed": self.options["max_upload_speed"],
-            "message": self.statusmsg,
-            "move_on_completed_path": self.options["move_completed_path"],
-            "move_on_completed": self.options["move_completed"],
-            "move_completed_path": self.options["move_completed_path"],
-            "move_completed": self.options["move_completed"],
-            "next_announce": self.status.next_announce.seconds,
-            "num_peers": self.status.num_peers - self.status.num_seeds,
-            "num_seeds": self.status.num_seeds,
-            "owner": self.owner,
-            "paused": self.status.paused,
-            "prioritize_first_last": self.options["prioritize_first_last_pieces"],
-            "sequential_download": self.options["sequential_download"],
-            "progress": progress,
-            "shared": self.options["shared"],
-            "remove_at_ratio": self.options["remove_at_ratio"],
-            "save_path": self.options["download_location"],
-            "seeding_time": self.status.seeding_time,
-            "seeds_peers_ratio": seeds_peers_ratio,
-            "seed_rank": self.status.seed_rank,
-            "state": self.state,
-            "stop_at_ratio": self.options["stop_at_ratio"],
-            "stop_ratio": self.options["stop_ratio"],
-            "time_added": self.time_added,
-            "total_done": self.status.total_done,
-            "total_payload_download": self.status.total_payload_download,
-            "total_payload_upload": self.status.total_payload_upload,
-            "total_peers": self.status.num_incomplete,
-            "total_seeds":  self.status.num_complete,
-            "total_uploaded": self.status.all_time_upload,
-            "total_wanted": self.status.total_wanted,
-            "tracker": self.status.current_tracker,
-            "trackers": self.trackers,
-            "tracker_status": self.tracker_status,
-            "upload_payload_rate": self.status.upload_payload_rate
-        }
+        """
+        if status is None:
+            status = self.handle.status()
+        self.status = status
+
+    def _create_status_funcs(self):
+        """Creates the getters for each of the keys get_status can return"""
+        def progress():
+            # Adjust progress to be 0-100 value
+            return self.status.progress * 100
+
+        def distributed_copies():
+            # Adjust status.distributed_copies to return a non-negative value
+            distributed_copies = self.status.distributed_copies
+            if distributed_copies < 0:
+                return 0.0
+            return distributed_copies
+
+        def seeds_peers_ratio():
+            if self.status.num_incomplete == 0:
+                # Use -1.0 to signify infinity
+                return -1.0
+            return self.status.num_complete / float(self.status.num_incomplete)
 
         def ti_comment():
-            if self.handle.has_metadata():
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
                 try:
-                    return self.torrent_info.comment().decode("utf8", "ignore")
+                    return torrent_info.comment().decode("utf8", "ignore")
                 except UnicodeDecodeError:
-                    return self.torrent_info.comment()
+                    return torrent_info.comment()
             return ""
 
         def ti_priv():
-            if self.handle.has_metadata():
-                return self.torrent_info.priv()
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
+                return torrent_info.priv()
             return False
         def ti_total_size():
-            if self.handle.has_metadata():
-                return self.torrent_info.total_size()
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
+                return torrent_info.total_size()
             return 0
         def ti_num_files():
-            if self.handle.has_metadata():
-                return self.torrent_info.num_files()
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
+                return torrent_info.num_files()
             return 0
         def ti_num_pieces():
-            if self.handle.has_metadata():
-                return self.torrent_info.num_pieces()
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
+                return torrent_info.num_pieces()
             return 0
         def ti_piece_length():
-            if self.handle.has_metadata():
-                return self.torrent_info.piece_length()
+            torrent_info = self.get_torrent_info()
+            if torrent_info:
+                return torrent_info.piece_length()
             return 0
         def ti_pieces_info():
-            if self.handle.has_metadata():
+            if self.get_torrent_info():
                 return self.get_pieces_info()
             return None
+        def ti_pieces_runs():
+            if self.get_torrent_info():
+                return self.get_pieces_runs()
+            return None
 
-        fns = {
-            "comment": ti_comment,
+        # These keys are read from the lt torrent_status snapshot
+        self.lt_status_funcs = {
+            "active_time": lambda: self.status.active_time,
+            "all_time_download": lambda: self.status.all_time_download,
+            "distributed_copies": distributed_copies,
+            "download_payload_rate": lambda: self.status.download_payload_rate,
             "eta": self.get_eta,
+            "last_seen_complete": self.get_last_seen_complete,
+            "next_announce": lambda: self.status.next_announce.seconds,
+            "num_peers": lambda: self.status.num_peers - self.status.num_seeds,
+            "num_seeds": lambda: self.status.num_seeds,
+            "paused": lambda: self.status.paused,
+            "progress": progress,
+            "ratio": self.get_ratio,
+            "seeding_time": lambda: self.status.seeding_time,
+            "seeds_peers_ratio": seeds_peers_ratio,
+            "seed_rank": lambda: self.status.seed_rank,
+            "total_done": lambda: self.status.total_done,
+            "total_payload_download": lambda: self.status.total_payload_download,
+            "total_payload_upload": lambda: self.status.total_payload_upload,
+            "total_peers": lambda: self.status.num_incomplete,
+            "total_seeds": lambda: self.status.num_complete,
+            "total_uploaded": lambda: self.status.all_time_upload,
+            "total_wanted": lambda: self.status.total_wanted,
+            "tracker": lambda: self.status.current_tracker,
+            "tracker_host": self.get_tracker_host,
+            "upload_payload_rate": lambda: self.status.upload_payload_rate
+        }
+
+        self.status_funcs = {
+            "comment": ti_comment,
+            "compact": lambda: self.options["compact_allocation"],
+            "file_priorities": lambda: self.options["file_priorities"],
             "file_progress": self.get_file_progress,
             "files": self.get_files,
+            "hash": lambda: self.torrent_id,
+            "is_auto_managed": lambda: self.options["auto_managed"],
+            "is_finished": lambda: self.is_finished,
             "is_seed": self.handle.is_seed,
+            "max_connections": lambda: self.options["max_connections"],
+            "max_download_speed": lambda: self.options["max_download_speed"],
+            "max_upload_slots": lambda: self.options["max_upload_slots"],
+            "max_upload_speed": lambda: self.options["max_upload_speed"],
+            "message": lambda: self.statusmsg,
+            "move_on_completed_path": lambda: self.options["move_completed_path"],
+            "move_on_completed": lambda: self.options["move_completed"],
+            "move_completed_path": lambda: self.options["move_completed_path"],
+            "move_completed": lambda: self.options["move_completed"],
             "name": self.get_name,
             "num_files": ti_num_files,
             "num_pieces": ti_num_pieces,
-            "pieces": ti_pieces_info,
+            "owner": lambda: self.owner,
             "peers": self.get_peers,
             "piece_length": ti_piece_length,
+            "pieces": ti_pieces_info,
+            "pieces_runs": ti_pieces_runs,
+            "prioritize_first_last": lambda: self.options["prioritize_first_last_pieces"],
             "private": ti_priv,
             "queue": self.handle.queue_position,
-            "ratio": self.get_ratio,
+            "remove_at_ratio": lambda: self.options["remove_at_ratio"],
+            "save_path": lambda: self.options["download_location"],
+            "sequential_download": lambda: self.options["sequential_download"],
+            "shared": lambda: self.options["shared"],
+            "state": lambda: self.state,
+            "stop_at_ratio": lambda: self.options["stop_at_ratio"],
+            "stop_ratio": lambda: self.options["stop_ratio"],
+            "time_added": lambda: self.time_added,
             "total_size": ti_total_size,
-            "tracker_host": self.get_tracker_host,
-            "last_seen_complete": self.get_last_seen_complete
+            "trackers": lambda: self.trackers,
+            "tracker_status": lambda: self.tracker_status
         }
+        self.status_funcs.update(self.lt_status_funcs)
 
-        # Create the desired status dictionary and return it
-        status_dict = {}
+    def get_status(self, keys, diff=False, update=False):
+        """
+        Returns the status of the torrent based on the keys provided
+
+        :param keys: the keys to get the status on
+        :type keys: list of str
+        :param diff: if True, will return a diff of the changes since the last
+        call to get_status based on the session_id
+        :type diff: bool
+        :param update: if True, the lt torrent_status will be fetched from
+        the handle instead of using the snapshot the TorrentManager refreshes
+        every tick
+        :type update: bool
 
+        :returns: a dictionary of the status keys and their values
+        :rtype: dict
+
+        """
         if len(keys) == 0:
-            status_dict = full_status
-            for key in fns:
-                status_dict[key] = fns[key]()
-        else:
-            for key in keys:
-                if key in full_status:
-                    status_dict[key] = full_status[key]
-                elif key in fns:
-                    status_dict[key] = fns[key]()
+            keys = self.status_funcs.keys()
+
+        if update:
+            self.update_status()
+
+        # Create the desired status dictionary and return it
+        status_dict = {}
+        for key in keys:
+            if key in self.status_funcs:
+                status_dict[key] = self.status_funcs[key]()
 
         session_id = self.rpcserver.get_session_id()
         if diff:
@@ -999,38 +1052,40 @@ def calculate_last_seen_complete(self):
                   self.torrent_id)
         self._last_seen_complete = time.time()
 
-    def get_pieces_info(self):
-        pieces = {}
-        # First get the pieces availability.
-        availability = self.handle.piece_availability()
-        # Pieces from connected peers
+    def iter_piece_states(self):
+        """
+        Yields the state of every piece, in order.  The states are:
+        0 missing, 1 available from peers, 2 downloading and 3 completed.
+        """
+        # Pieces being downloaded from connected peers
+        downloading = set()
         for peer_info in self.handle.get_peer_info():
-            if peer_info.downloading_piece_index < 0:
-                # No piece index, then we're not downloading anything from
-                # this peer
-                continue
-            pieces[peer_info.downloading_piece_index] = 2
+            if peer_info.downloading_piece_index >= 0:
+                downloading.add(peer_info.downloading_piece_index)
 
-        # Now, the rest of the pieces
+        availability = self.handle.piece_availability()
         for idx, piece in enumerate(self.handle.status().pieces):
-            if idx in pieces:
-                # Piece beeing downloaded, handled above
-                continue
+            if idx in downloading:
+                yield 2
             elif piece:
                 # Completed Piece
-                pieces[idx] = 3
-                continue
+                yield 3
             elif availability[idx] > 0:
                 # Piece not downloaded nor beeing downloaded but available
-                pieces[idx] = 1
-                continue
-            # If we reached here, it means the piece is missing, ie, there's
-            # no known peer with this piece, or this piece has not been asked
-            # for so far.
-            pieces[idx] = 0
-
-        sorted_indexes = pieces.keys()
-        sorted_indexes.sort()
-        # Return only the piece states, no need for the piece index
-        # Keep the order
-        return [pieces[idx] for idx in sorted_indexes]
+                yield 1
+            else:
+                # The piece is missing, ie, there's no known peer with this
+                # piece, or this piece has not been asked for so far.
+                yield 0
+
+    def get_pieces_info(self):
+        """Returns the state of every piece, see :meth:`iter_piece_states`"""
+        return list(self.iter_piece_states())
+
+    def get_pieces_runs(self):
+        """
+        Returns the state of the pieces run-length encoded, see
+        :func:`deluge.common.encode_pieces_runs`.  This is much smaller than
+        the `pieces` list for most torrents.
+        """
+        return deluge.common.encode_pieces_runs(self.iter_piece_states())
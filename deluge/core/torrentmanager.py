@@ -43,8 +43,11 @@
 import operator
 import logging
 import re
+import threading
+import Queue
 
-from twisted.internet.task import LoopingCall
+from twisted.internet import threads
+from twisted.internet.task import LoopingCall, TaskStopped, cooperate
 
 from deluge._libtorrent import lt
 
@@ -60,6 +63,101 @@
 
 log = logging.getLogger(__name__)
 
+# The number of torrents read from the state folder at a time on startup
+LOAD_STATE_BATCH = 50
+
+# The journal is compacted once it holds this many times more records than
+# there are torrents in the session
+STATE_JOURNAL_COMPACT_RATIO = 2
+
+class ResumeDataWriter(threading.Thread):
+    """
+    Writes the resume data of each torrent to its own file in the
+    state/resume directory, so that saving the resume data of one torrent
+    does not rewrite the resume data of the whole session.  The files are
+    written in this thread, and only the latest resume data of a torrent is
+    written if it is updated again before being written.
+    """
+    def __init__(self, path):
+        threading.Thread.__init__(self, name="ResumeDataWriter")
+        self.setDaemon(True)
+        self.path = path
+        # The torrent_ids with resume data waiting to be written
+        self.queue = Queue.Queue()
+        # {torrent_id: bencoded resume data, or None to delete it}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def get_path(self, torrent_id):
+        return os.path.join(self.path, torrent_id + ".fastresume")
+
+    def write(self, torrent_id, resume_data):
+        """
+        Queues the resume data of a torrent to be written
+
+        :param torrent_id: the torrent
+        :type torrent_id: string
+        :param resume_data: the bencoded resume data, or None to delete it
+        :type resume_data: string
+
+        """
+        self.lock.acquire()
+        try:
+            queued = torrent_id in self.pending
+            self.pending[torrent_id] = resume_data
+        finally:
+            self.lock.release()
+
+        if not queued:
+            self.queue.put(torrent_id)
+
+    def stop(self):
+        """Writes all the queued resume data and stops the thread"""
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        while True:
+            torrent_id = self.queue.get()
+            if torrent_id is None:
+                break
+
+            self.lock.acquire()
+            try:
+                resume_data = self.pending.pop(torrent_id)
+            finally:
+                self.lock.release()
+
+            if resume_data is None:
+                try:
+                    os.remove(self.get_path(torrent_id))
+                except OSError:
+                    pass
+                continue
+
+            self.write_file(torrent_id, resume_data)
+
+    def write_file(self, torrent_id, resume_data):
+        """
+        Writes the resume data of a torrent to its file right away
+
+        :returns: True if the resume data was written
+        :rtype: bool
+
+        """
+        path = self.get_path(torrent_id)
+        try:
+            resume_file = open(path + ".new", "wb")
+            resume_file.write(resume_data)
+            resume_file.flush()
+            os.fsync(resume_file.fileno())
+            resume_file.close()
+            shutil.move(path + ".new", path)
+        except (IOError, OSError), e:
+            log.warning("Unable to save resume data for %s: %s", torrent_id, e)
+            return False
+        return True
+
 class TorrentState:
     def __init__(self,
             torrent_id=None,
@@ -155,11 +253,31 @@ def __init__(self):
         # and that their resume data has been written.
         self.shutdown_torrent_pause_list = []
 
-        # self.num_resume_data used to save resume_data in bulk
-        self.num_resume_data = 0
-
-        # Keeps track of resume data that needs to be saved to disk
-        self.resume_data = {}
+        # The resume data of each torrent is kept in its own file
+        self.resume_data_path = os.path.join(get_config_dir(), "state", "resume")
+        if not os.path.exists(self.resume_data_path):
+            os.makedirs(self.resume_data_path)
+        self.resume_data_writer = None
+
+        # The last state saved to the journal for each torrent
+        # {torrent_id: (sequence, pickled TorrentState)}
+        self.saved_state = {}
+        # The sequence number of the next journal record
+        self.state_sequence = 0
+        # The number of records in the journal file
+        self.state_journal_records = 0
+        # The cooperative task adding the torrents from the state on startup
+        self.load_state_task = None
+        # Set once all the torrents in the state have been added
+        self.state_loaded = False
+
+        # Used to make sure only one save_state() runs at a time
+        self.saving_state = None
+        self.save_state_pending = False
+        # Writes of an older generation are dropped, this is used to discard
+        # writes still queued in a thread after a synchronous save
+        self.state_journal_generation = 0
+        self.state_journal_lock = threading.Lock()
 
         # Register set functions
         self.config.register_set_function("max_connections_per_torrent",
@@ -170,6 +288,8 @@ def __init__(self):
             self.on_set_max_upload_speed_per_torrent)
         self.config.register_set_function("max_download_speed_per_torrent",
             self.on_set_max_download_speed_per_torrent)
+        self.config.register_set_function("status_update_interval",
+            self.on_set_status_update_interval, apply_now=False)
 
         # Register alert functions
         self.alerts.register_handler("torrent_finished_alert",
@@ -204,6 +324,11 @@ def __init__(self):
             self.on_alert_file_error)
         self.alerts.register_handler("file_completed_alert",
             self.on_alert_file_completed)
+        self.alerts.register_handler("state_update_alert",
+            self.on_alert_state_update)
+
+        # Refreshes the torrent_status snapshot of the torrents every tick
+        self.status_update_timer = LoopingCall(self.update_torrents_status)
 
     def start(self):
         # Get the pluginmanager reference
@@ -212,6 +337,10 @@ def start(self):
         # Run the old state upgrader before loading state
         deluge.core.oldstateupgrader.OldStateUpgrader()
 
+        # Start the thread that writes the resume data
+        self.resume_data_writer = ResumeDataWriter(self.resume_data_path)
+        self.resume_data_writer.start()
+
         # Try to load the state from file
         self.load_state()
 
@@ -220,11 +349,16 @@ def start(self):
         self.save_state_timer.start(200, False)
         self.save_resume_data_timer = LoopingCall(self.save_resume_data)
         self.save_resume_data_timer.start(190)
+        self.status_update_timer.start(self.config["status_update_interval"])
 
         if self.last_seen_complete_loop:
             self.last_seen_complete_loop.start(60)
 
     def stop(self):
+        # Stop adding torrents from the state if it is still loading
+        if self.load_state_task:
+            self.load_state_task.stop()
+
         # Stop timers
         if self.save_state_timer.running:
             self.save_state_timer.stop()
@@ -232,11 +366,14 @@ def stop(self):
         if self.save_resume_data_timer.running:
             self.save_resume_data_timer.stop()
 
+        if self.status_update_timer.running:
+            self.status_update_timer.stop()
+
         if self.last_seen_complete_loop:
             self.last_seen_complete_loop.stop()
 
         # Save state on shutdown
-        self.save_state()
+        self.save_state(sync=True)
 
         # Make another list just to make sure all paused torrents will be
         # passed to self.save_resume_data(). With
@@ -272,6 +409,9 @@ def stop(self):
             # Wait for all alerts
             self.alerts.handle_alerts(True)
 
+        # Write out the resume data that is still queued
+        self.resume_data_writer.stop()
+
     def update(self):
         for torrent_id, torrent in self.torrents.items():
             if torrent.options["stop_at_ratio"] and torrent.state not in (
@@ -289,6 +429,21 @@ def update(self):
                     if not torrent.handle.is_paused():
                         torrent.pause()
 
+    def update_torrents_status(self):
+        """
+        Refreshes the lt torrent_status snapshot that Torrent.get_status reads
+        from, so that all the RPC sessions share one status query per tick.
+
+        If libtorrent supports it, the session is asked to post a
+        state_update_alert with only the torrents that changed since the last
+        tick, otherwise every torrent's status is fetched.
+        """
+        if hasattr(self.session, "post_torrent_updates"):
+            self.session.post_torrent_updates()
+        else:
+            for torrent in self.torrents.itervalues():
+                torrent.update_status()
+
     def __getitem__(self, torrent_id):
         """Return the Torrent with torrent_id"""
         return self.torrents[torrent_id]
@@ -355,7 +510,7 @@ def add(self, torrent_info=None, state=None, options=None, save_state=True,
         log.debug("torrentmanager.add")
         add_torrent_params = {}
 
-        if filedump is not None:
+        if filedump is not None and torrent_info is None:
             try:
                 torrent_info = lt.torrent_info(lt.bdecode(filedump))
             except Exception, e:
@@ -363,9 +518,9 @@ def add(self, torrent_info=None, state=None, options=None, save_state=True,
                 # XXX: Probably should raise an exception here..
                 return
 
-        if torrent_info is None and state:
-            # We have no torrent_info so we need to add the torrent with information
-            # from the state object.
+        if state:
+            # We are loading the torrent from the state, the torrent_info
+            # will be read from the state folder if it was not given.
 
             # Populate the options dict from state
             options = TorrentOptions()
@@ -387,9 +542,11 @@ def add(self, torrent_info=None, state=None, options=None, save_state=True,
             options["add_paused"] = state.paused
             options["shared"] = state.shared
 
-            ti = self.get_torrent_info_from_file(
-                    os.path.join(get_config_dir(),
-                                    "state", state.torrent_id + ".torrent"))
+            ti = torrent_info
+            if ti is None:
+                ti = self.get_torrent_info_from_file(
+                        os.path.join(get_config_dir(),
+                                        "state", state.torrent_id + ".torrent"))
             if ti:
                 add_torrent_params["ti"] = ti
             elif state.magnet:
@@ -571,9 +728,7 @@ def remove(self, torrent_id, remove_data=False):
             return False
 
         # Remove fastresume data if it is exists
-        resume_data = self.load_resume_data_file()
-        resume_data.pop(torrent_id, None)
-        self.save_resume_data_file(resume_data)
+        self.resume_data_writer.write(torrent_id, None)
 
         # Remove the .torrent file in the state
         self.torrents[torrent_id].delete_torrentfile()
@@ -612,17 +767,86 @@ def remove(self, torrent_id, remove_data=False):
         return True
 
     def load_state(self):
-        """Load the state of the TorrentManager from the torrents.state file"""
+        """
+        Load the state of the TorrentManager from the torrents.state file.
+
+        The state and resume data files are read in a thread and the torrents
+        are then added to the session in the background, a
+        SessionLoadingEvent is emitted after each batch and a
+        SessionStartedEvent once all of them have been added.
+
+        :returns: a Deferred that fires once all the torrents have been added
+        :rtype: twisted.internet.defer.Deferred
+
+        """
+        if lt.version_minor < 16:
+            log.debug("libtorrent version is lower than 0.16. Start looping "
+                      "callback to calculate last_seen_complete info.")
+            def calculate_last_seen_complete():
+                for torrent in self.torrents.values():
+                    torrent.calculate_last_seen_complete()
+            self.last_seen_complete_loop = LoopingCall(
+                calculate_last_seen_complete
+            )
+
+        def on_state_read(result):
+            if self._component_state in ("Stopping", "Stopped"):
+                # We were shut down while the state was being read
+                return
+            state, migrated_resume_data = result
+            d = self._add_state_torrents(state, migrated_resume_data)
+            d.addCallbacks(on_torrents_added, on_error)
+            return d
+
+        def on_read_error(failure):
+            # The state is not marked as loaded, so that it is not
+            # overwritten by the empty session
+            log.error("Unable to read the state: %s", failure.getErrorMessage())
+
+        def on_torrents_added(result):
+            self.load_state_task = None
+            self.state_loaded = True
+            log.info("Loaded %s torrents from state", len(self.torrents))
+            component.get("EventManager").emit(SessionStartedEvent())
+
+        def on_error(failure):
+            self.load_state_task = None
+            if failure.check(TaskStopped):
+                # We are shutting down before all the torrents were added
+                return
+            self.state_loaded = True
+            log.error("Unable to load the torrents from state: %s",
+                      failure.getErrorMessage())
+
+        d = threads.deferToThread(self._read_state)
+        d.addCallbacks(on_state_read, on_read_error)
+        return d
+
+    def _read_state(self):
+        """
+        Reads the torrents.state.journal or torrents.state file, and moves the
+        resume data out of the old torrents.fastresume file.  This is run in a
+        thread, the saved state is not used until the state is loaded.
+
+        :returns: the state and the migrated resume data
+        :rtype: tuple of (TorrentManagerState, dict)
+
+        """
         state = TorrentManagerState()
 
-        try:
-            log.debug("Opening torrent state file for load.")
-            state_file = open(
-                os.path.join(get_config_dir(), "state", "torrents.state"), "rb")
-            state = cPickle.load(state_file)
-            state_file.close()
-        except (EOFError, IOError, Exception), e:
-            log.warning("Unable to load state file: %s", e)
+        if os.path.exists(os.path.join(get_config_dir(), "state",
+                                       "torrents.state.journal")):
+            state.torrents = self.load_state_journal()
+        if not self.state_journal_records:
+            # There is no journal yet, or nothing could be read from it
+            try:
+                log.debug("Opening torrent state file for load.")
+                state_file = open(
+                    os.path.join(get_config_dir(), "state", "torrents.state"), "rb")
+                state = cPickle.load(state_file)
+                state_file.close()
+            except (EOFError, IOError, Exception), e:
+                log.warning("Unable to load state file: %s", e)
 
         # Try to use an old state
         try:
@@ -638,94 +862,346 @@ def load_state(self):
         # order.
         state.torrents.sort(key=operator.attrgetter("queue"))
 
-        resume_data = self.load_resume_data_file()
+        # Move the resume data out of the old single fastresume file
+        migrated_resume_data = self.migrate_resume_data_file()
 
-        for torrent_state in state.torrents:
-            try:
-                self.add(state=torrent_state, save_state=False,
-                         resume_data=resume_data.get(torrent_state.torrent_id))
-            except AttributeError, e:
-                log.error("Torrent state file is either corrupt or incompatible! %s", e)
-                break
+        return state, migrated_resume_data
 
+    def _add_state_torrents(self, state, migrated_resume_data):
+        """
+        Adds the torrents in the state to the session cooperatively.
 
-        if lt.version_minor < 16:
-            log.debug("libtorrent version is lower than 0.16. Start looping "
-                      "callback to calculate last_seen_complete info.")
-            def calculate_last_seen_complete():
-                for torrent in self.torrents.values():
-                    torrent.calculate_last_seen_complete()
-            self.last_seen_complete_loop = LoopingCall(
-                calculate_last_seen_complete
-            )
+        :returns: a Deferred that fires once all the torrents have been added
+        :rtype: twisted.internet.defer.Deferred
 
-        component.get("EventManager").emit(SessionStartedEvent())
+        """
+        # The .torrent files and resume data are read in the thread pool, a
+        # batch at a time, while the torrents of the previous batches are
+        # being added to the session.
+        batches = []
+        for index in xrange(0, len(state.torrents), LOAD_STATE_BATCH):
+            batches.append(threads.deferToThread(self._load_torrent_files,
+                state.torrents[index:index + LOAD_STATE_BATCH],
+                migrated_resume_data))
+
+        num_torrents = len(state.torrents)
+
+        def add_torrents():
+            num_added = 0
+            for batch in batches:
+                loaded = []
+                batch.addCallback(loaded.extend)
+                # The cooperator waits for the batch to be loaded
+                yield batch
+
+                for torrent_state, torrent_info, resume_data in loaded:
+                    try:
+                        self.add(torrent_info=torrent_info, state=torrent_state,
+                                 save_state=False, resume_data=resume_data)
+                    except AttributeError, e:
+                        log.error("Torrent state file is either corrupt or incompatible! %s", e)
+                        return
+                    num_added += 1
+                    yield None
+
+                component.get("EventManager").emit(
+                    SessionLoadingEvent(num_added, num_torrents))
+
+        # The torrents are added cooperatively so that the RPC server can
+        # answer requests while a big session is loading.
+        self.load_state_task = cooperate(add_torrents())
+        return self.load_state_task.whenDone()
+
+    def _load_torrent_files(self, torrent_states, migrated_resume_data):
+        """
+        Reads the .torrent file and resume data of each of the torrent states.
+        This is run in a thread.
 
-    def save_state(self):
-        """Save the state of the TorrentManager to the torrents.state file"""
-        state = TorrentManagerState()
-        # Create the state for each Torrent and append to the list
-        for torrent in self.torrents.values():
-            paused = False
-            if torrent.state == "Paused":
-                paused = True
-
-            torrent_state = TorrentState(
-                torrent.torrent_id,
-                torrent.filename,
-                torrent.get_status(["total_uploaded"])["total_uploaded"],
-                torrent.trackers,
-                torrent.options["compact_allocation"],
-                paused,
-                torrent.options["download_location"],
-                torrent.options["max_connections"],
-                torrent.options["max_upload_slots"],
-                torrent.options["max_upload_speed"],
-                torrent.options["max_download_speed"],
-                torrent.options["prioritize_first_last_pieces"],
-                torrent.options["sequential_download"],
-                torrent.options["file_priorities"],
-                torrent.get_queue_position(),
-                torrent.options["auto_managed"],
-                torrent.is_finished,
-                torrent.options["stop_ratio"],
-                torrent.options["stop_at_ratio"],
-                torrent.options["remove_at_ratio"],
-                torrent.options["move_completed"],
-                torrent.options["move_completed_path"],
-                torrent.magnet,
-                torrent.time_added,
-                torrent.get_last_seen_complete(),
-                torrent.owner,
-                torrent.options["shared"]
-            )
-            state.torrents.append(torrent_state)
+        :returns: a list of (torrent_state, torrent_info, resume_data)
+        :rtype: list
+
+        """
+        loaded = []
+        for torrent_state in torrent_states:
+            torrent_info = self.get_torrent_info_from_file(
+                os.path.join(get_config_dir(), "state",
+                             torrent_state.torrent_id + ".torrent"))
+            resume_data = self.load_resume_data(torrent_state.torrent_id)
+            if resume_data is None:
+                resume_data = migrated_resume_data.get(torrent_state.torrent_id)
+            loaded.append((torrent_state, torrent_info, resume_data))
+        return loaded
+
+    def load_state_journal(self):
+        """
+        Loads the torrents.state.journal file and returns the list of
+        TorrentState objects in it.  Only the latest record of each torrent
+        is used, and a record of None means the torrent was removed.
 
-        # Pickle the TorrentManagerState object
+        A partially written or corrupt record, and anything after it, is
+        truncated from the journal so that the records appended by the next
+        saves can be read back.
+        """
+        path = os.path.join(get_config_dir(), "state", "torrents.state.journal")
+        records = {}
+        self.state_journal_records = 0
         try:
-            log.debug("Saving torrent state file.")
-            state_file = open(os.path.join(get_config_dir(),
-                              "state", "torrents.state.new"), "wb")
-            cPickle.dump(state, state_file)
-            state_file.flush()
-            os.fsync(state_file.fileno())
-            state_file.close()
-        except IOError:
-            log.warning("Unable to save state file.")
-            return True
-
-        # We have to move the 'torrents.state.new' file to 'torrents.state'
+            log.debug("Opening torrent state journal for load.")
+            journal_file = open(path, "r+b")
+        except IOError, e:
+            log.warning("Unable to load state journal: %s", e)
+            return []
+
+        # The offset after the last record that could be read
+        offset = 0
+        while True:
+            try:
+                sequence, torrent_id, data = cPickle.load(journal_file)
+            except EOFError:
+                break
+            except Exception, e:
+                log.warning("Unable to read state journal record: %s", e)
+                break
+            offset = journal_file.tell()
+            self.state_journal_records += 1
+            if torrent_id not in records or records[torrent_id][0] < sequence:
+                records[torrent_id] = (sequence, data)
+
         try:
-            shutil.move(
-                os.path.join(get_config_dir(), "state", "torrents.state.new"),
-                os.path.join(get_config_dir(), "state", "torrents.state"))
-        except IOError:
-            log.warning("Unable to save state file.")
-            return True
-
-        # We return True so that the timer thread will continue
+            if offset < os.fstat(journal_file.fileno()).st_size:
+                # Most likely a record that was only partially written
+                log.warning("Truncating the state journal after %s records.",
+                            self.state_journal_records)
+                journal_file.truncate(offset)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+        except (IOError, OSError), e:
+            log.warning("Unable to truncate state journal: %s", e)
+        journal_file.close()
+
+        torrents = []
+        for torrent_id, (sequence, data) in records.items():
+            self.state_sequence = max(self.state_sequence, sequence + 1)
+            if data is None:
+                continue
+            try:
+                torrents.append(cPickle.loads(data))
+            except Exception, e:
+                log.warning("Unable to load state for %s: %s", torrent_id, e)
+                continue
+            self.saved_state[torrent_id] = (sequence, data)
+
+        return torrents
+
+    def create_torrent_state(self, torrent):
+        """Returns a TorrentState for the torrent"""
+        paused = False
+        if torrent.state == "Paused":
+            paused = True
+
+        return TorrentState(
+            torrent.torrent_id,
+            torrent.filename,
+            torrent.status.all_time_upload,
+            torrent.trackers,
+            torrent.options["compact_allocation"],
+            paused,
+            torrent.options["download_location"],
+            torrent.options["max_connections"],
+            torrent.options["max_upload_slots"],
+            torrent.options["max_upload_speed"],
+            torrent.options["max_download_speed"],
+            torrent.options["prioritize_first_last_pieces"],
+            torrent.options["sequential_download"],
+            torrent.options["file_priorities"],
+            torrent.get_queue_position(),
+            torrent.options["auto_managed"],
+            torrent.is_finished,
+            torrent.options["stop_ratio"],
+            torrent.options["stop_at_ratio"],
+            torrent.options["remove_at_ratio"],
+            torrent.options["move_completed"],
+            torrent.options["move_completed_path"],
+            torrent.magnet,
+            torrent.time_added,
+            torrent.get_last_seen_complete(),
+            torrent.owner,
+            torrent.options["shared"]
+        )
+
+    def _get_changed_state(self, records, changed):
+        """
+        Compares each torrent with the state last saved for it and appends a
+        (sequence, torrent_id, data) record to `records` for the ones that
+        changed.  The new saved state of those is put in `changed`, with None
+        for the removed torrents, to be committed by _commit_state() once the
+        records are written.  This is a generator that yields after each
+        torrent so that it can be run cooperatively.
+        """
+        for torrent_id, torrent in self.torrents.items():
+            try:
+                data = cPickle.dumps(self.create_torrent_state(torrent), 2)
+            except Exception, e:
+                # Most likely the torrent was removed during the save
+                log.debug("Unable to get the state of %s: %s", torrent_id, e)
+                yield None
+                continue
+            saved = self.saved_state.get(torrent_id)
+            if saved is None or saved[1] != data:
+                changed[torrent_id] = (self.state_sequence, data)
+                records.append((self.state_sequence, torrent_id, data))
+                self.state_sequence += 1
+            yield None
+
+        # Record the torrents that were removed from the session
+        for torrent_id in self.saved_state.keys():
+            if torrent_id not in self.torrents:
+                changed[torrent_id] = None
+                records.append((self.state_sequence, torrent_id, None))
+                self.state_sequence += 1
+
+    def _commit_state(self, changed, num_records, compact):
+        """
+        Updates the saved state with the changes from _get_changed_state()
+        once their records have been written to the journal.
+        """
+        for torrent_id, saved in changed.iteritems():
+            if saved is None:
+                self.saved_state.pop(torrent_id, None)
+            else:
+                self.saved_state[torrent_id] = saved
+        if compact:
+            self.state_journal_records = num_records
+        else:
+            self.state_journal_records += num_records
+
+    def _write_state_journal(self, records, compact, generation):
+        """
+        Appends records to the torrents.state.journal file.  If compact is
+        True, records is the whole state and the journal is rewritten with it.
+        This is run in a thread, except on shutdown.
+        """
+        path = os.path.join(get_config_dir(), "state", "torrents.state.journal")
+        data = "".join([cPickle.dumps(record, 2) for record in records])
+
+        self.state_journal_lock.acquire()
+        try:
+            if generation != self.state_journal_generation:
+                log.debug("Dropping outdated torrent state journal write.")
+                return False
+            if compact:
+                log.debug("Compacting torrent state journal.")
+                journal_file = open(path + ".new", "wb")
+            else:
+                log.debug("Saving %s records to torrent state journal.", len(records))
+                journal_file = open(path, "ab")
+            journal_file.write(data)
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+            journal_file.close()
+
+            if compact:
+                shutil.move(path + ".new", path)
+        except (IOError, OSError), e:
+            log.warning("Unable to save state journal: %s", e)
+            return False
+        finally:
+            self.state_journal_lock.release()
+
         return True
 
+    def _get_state_journal_records(self, records, changed, compact=False):
+        """
+        Returns the arguments for _write_state_journal(), the records will be
+        replaced by the whole state if the journal needs to be compacted.
+        """
+        if compact or self.state_journal_records + len(records) > \
+                STATE_JOURNAL_COMPACT_RATIO * len(self.saved_state) + 100:
+            state = dict(self.saved_state)
+            for torrent_id, saved in changed.iteritems():
+                if saved is None:
+                    state.pop(torrent_id, None)
+                else:
+                    state[torrent_id] = saved
+            records = [(sequence, torrent_id, data) for torrent_id, (sequence, data)
+                       in state.iteritems()]
+            compact = True
+        return records, compact, self.state_journal_generation
+
+    def save_state(self, sync=False):
+        """
+        Saves the state of the torrents that changed since the last save to
+        the torrents.state.journal file.
+
+        The torrents are compared with their saved state cooperatively, so
+        that the reactor is only blocked for a few ms at a time, and the
+        journal is written in a thread.
+
+        :param sync: if True, save the state right away and wait until it has
+            been written, ie, on shutdown
+        :type sync: bool
+
+        :returns: a Deferred that fires once the state is saved, or None when
+            sync is True
+
+        """
+        if not self.state_loaded:
+            # The torrents that are not loaded yet would be saved as removed
+            log.debug("Not saving state while it is being loaded.")
+            return
+
+        if sync:
+            records = []
+            changed = {}
+            for _ in self._get_changed_state(records, changed):
+                pass
+            # Rewrite the whole journal and drop any write still waiting in a
+            # thread, as it is older than this one
+            self.state_journal_generation += 1
+            records, compact, generation = self._get_state_journal_records(
+                records, changed, compact=True)
+            if self._write_state_journal(records, compact, generation):
+                self._commit_state(changed, len(records), compact)
+            return
+
+        if self.saving_state:
+            # Save again once the current save has finished
+            self.save_state_pending = True
+            return self.saving_state
+
+        records = []
+        changed = {}
+        generation = self.state_journal_generation
+
+        def on_changed_state(result):
+            if not records or generation != self.state_journal_generation:
+                return
+            args = self._get_state_journal_records(records, changed)
+            d = threads.deferToThread(self._write_state_journal, *args)
+            d.addCallback(on_written, len(args[0]), args[1])
+            return d
+
+        def on_written(result, num_records, compact):
+            # The changes are written again by the next save if this failed
+            if result:
+                self._commit_state(changed, num_records, compact)
+
+        def on_saved(result):
+            self.saving_state = None
+            if self.save_state_pending:
+                self.save_state_pending = False
+                self.save_state()
+
+        def on_error(failure):
+            log.warning("Unable to save state: %s", failure.getErrorMessage())
+
+        d = self.saving_state = cooperate(
+            self._get_changed_state(records, changed)).whenDone()
+        d.addCallback(on_changed_state)
+        d.addErrback(on_error)
+        d.addBoth(on_saved)
+        return d
+
     def save_resume_data(self, torrent_ids=None):
         """
         Saves resume data for list of torrent_ids or for all torrents if
@@ -738,59 +1214,59 @@ def save_resume_data(self, torrent_ids=None):
         for torrent_id in torrent_ids:
             self.torrents[torrent_id].save_resume_data()
 
-        self.num_resume_data = len(torrent_ids)
-
-    def load_resume_data_file(self):
-        resume_data = {}
+    def load_resume_data(self, torrent_id):
+        """Returns the bencoded resume data of a torrent, or None"""
         try:
-            log.debug("Opening torrents fastresume file for load.")
-            fastresume_file = open(os.path.join(get_config_dir(), "state",
-                                                "torrents.fastresume"), "rb")
-            resume_data = lt.bdecode(fastresume_file.read())
-            fastresume_file.close()
-        except (EOFError, IOError, Exception), e:
-            log.warning("Unable to load fastresume file: %s", e)
-
-        # If the libtorrent bdecode doesn't happen properly, it will return None
-        # so we need to make sure we return a {}
-        if resume_data is None:
-            return {}
+            resume_file = open(self.resume_data_writer.get_path(torrent_id), "rb")
+            resume_data = resume_file.read()
+            resume_file.close()
+        except IOError, e:
+            log.debug("Unable to load resume data for %s: %s", torrent_id, e)
+            return None
 
         return resume_data
 
-    def save_resume_data_file(self, resume_data=None):
+    def migrate_resume_data_file(self):
         """
-        Saves the resume data file with the contents of self.resume_data.  If
-        `resume_data` is None, then we grab the resume_data from the file on
-        disk, else, we update `resume_data` with self.resume_data and save
-        that to disk.
+        Splits the torrents.fastresume file, which held the resume data of
+        every torrent, into a file for each torrent.
 
-        :param resume_data: the current resume_data, this will be loaded from disk if not provided
-        :type resume_data: dict
+        :returns: the resume data that was migrated {torrent_id: resume_data}
+        :rtype: dict
 
         """
-        # Check to see if we're waiting on more resume data
-        if self.num_resume_data or not self.resume_data:
-            return
-
         path = os.path.join(get_config_dir(), "state", "torrents.fastresume")
+        if not os.path.exists(path):
+            return {}
+
+        log.info("Moving the resume data in %s to %s", path, self.resume_data_path)
+        try:
+            fastresume_file = open(path, "rb")
+            resume_data = lt.bdecode(fastresume_file.read())
+            fastresume_file.close()
+        except (EOFError, IOError, Exception), e:
+            log.warning("Unable to load fastresume file: %s", e)
+            return {}
 
-        # First step is to load the existing file and update the dictionary
+        # If the libtorrent bdecode doesn't happen properly, it will return None
         if resume_data is None:
-            resume_data = self.load_resume_data_file()
+            return {}
 
-        resume_data.update(self.resume_data)
-        self.resume_data = {}
+        # The files are written before the old file is renamed, so that a
+        # crash meanwhile does not lose the resume data
+        written = True
+        for torrent_id, data in resume_data.iteritems():
+            if not os.path.exists(self.resume_data_writer.get_path(torrent_id)):
+                written = self.resume_data_writer.write_file(torrent_id, data) \
+                    and written
 
-        try:
-            log.debug("Saving fastresume file: %s", path)
-            fastresume_file = open(path, "wb")
-            fastresume_file.write(lt.bencode(resume_data))
-            fastresume_file.flush()
-            os.fsync(fastresume_file.fileno())
-            fastresume_file.close()
-        except IOError:
-            log.warning("Error trying to save fastresume file")
+        if written:
+            try:
+                shutil.move(path, path + ".old")
+            except (IOError, OSError), e:
+                log.warning("Unable to rename fastresume file: %s", e)
+
+        return resume_data
 
     def remove_empty_folders(self, torrent_id, folder):
         """
@@ -878,6 +1354,12 @@ def on_set_max_download_speed_per_torrent(self, key, value):
         for key in self.torrents.keys():
             self.torrents[key].set_max_download_speed(value)
 
+    def on_set_status_update_interval(self, key, value):
+        log.debug("status_update_interval set to %s..", value)
+        if self.status_update_timer.running:
+            self.status_update_timer.stop()
+            self.status_update_timer.start(value)
+
     ## Alert handlers ##
     def on_alert_torrent_finished(self, alert):
         log.debug("on_alert_torrent_finished")
@@ -1048,13 +1530,10 @@ def on_alert_save_resume_data(self, alert):
             return
 
         # Libtorrent in add_torrent() expects resume_data to be bencoded
-        self.resume_data[torrent_id] = lt.bencode(alert.resume_data)
-        self.num_resume_data -= 1
+        self.resume_data_writer.write(torrent_id, lt.bencode(alert.resume_data))
 
         torrent.waiting_on_resume_data = False
 
-        self.save_resume_data_file()
-
     def on_alert_save_resume_data_failed(self, alert):
         log.debug("on_alert_save_resume_data_failed: %s", alert.message())
         try:
@@ -1062,11 +1541,8 @@ def on_alert_save_resume_data_failed(self, alert):
         except:
             return
 
-        self.num_resume_data -= 1
         torrent.waiting_on_resume_data = False
 
-        self.save_resume_data_file()
-
 
     def on_alert_file_renamed(self, alert):
         log.debug("on_alert_file_renamed")
@@ -1120,3 +1596,10 @@ def on_alert_file_completed(self, alert):
         torrent_id = str(alert.handle.info_hash())
         component.get("EventManager").emit(
             TorrentFileCompletedEvent(torrent_id, alert.index))
+
+    def on_alert_state_update(self, alert):
+        log.debug("on_alert_state_update")
+        for status in alert.status:
+            torrent_id = str(status.handle.info_hash())
+            if torrent_id in self.torrents:
+                self.torrents[torrent_id].update_status(status)
@@ -215,6 +215,37 @@ class SessionStartedEvent(DelugeEvent):
     """
     pass
 
+class SessionLoadingEvent(DelugeEvent):
+    """
+    Emitted while the torrents of the session are being loaded on startup.
+    """
+    def __init__(self, num_loaded, num_total):
+        """
+        :param num_loaded: the number of torrents loaded so far
+        :type num_loaded: int
+        :param num_total: the number of torrents in the session
+        :type num_total: int
+        """
+        self._args = [num_loaded, num_total]
+
+class TorrentsStatusUpdateEvent(DelugeEvent):
+    """
+    Emitted to a client with the changes to the torrents it subscribed to
+    with core.subscribe_torrents_status.  It is emitted every interval of the
+    subscription, with an empty status if nothing changed.
+    """
+    def __init__(self, subscription_id, status, removed):
+        """
+        :param subscription_id: the subscription the update is for
+        :type subscription_id: int
+        :param status: the changed keys of each torrent, or the full status
+            of the torrents that now match the filter
+        :type status: dict
+        :param removed: the torrent_ids that no longer match the filter
+        :type removed: list
+        """
+        self._args = [subscription_id, status, removed]
+
 class SessionPausedEvent(DelugeEvent):
     """
     Emitted when the session has been paused.
@@ -36,6 +36,7 @@
 import sys
 import os
 from hashlib import sha1 as sha
+from multiprocessing.pool import ThreadPool
 
 from deluge.common import get_path_size
 from deluge.bencode import bencode
@@ -53,6 +54,121 @@ class InvalidPieceSize(Exception):
     """
     pass
 
+class HashingCancelled(Exception):
+    """
+    Raised when the hashing of the pieces has been cancelled
+    """
+    pass
+
+# The files are read in blocks of about this many bytes, in whole pieces
+READ_BLOCK_SIZE = 64 * 1024 * 1024
+
+def get_num_hash_threads():
+    """
+    Returns the number of threads to hash pieces with, one per CPU.
+    """
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+def _read_blocks(files, block_size):
+    """
+    Reads the files as one continuous stream and yields it in blocks of
+    `block_size`, only the last block can be shorter.  A path of None is a
+    padding file which is read as zeros.
+    """
+    block = []
+    block_length = 0
+    for path, size in files:
+        fd = open(path, "rb") if path is not None else None
+        try:
+            left = size
+            while left:
+                length = min(left, block_size - block_length)
+                if fd:
+                    data = fd.read(length)
+                    if len(data) != length:
+                        raise IOError("%s changed size while being hashed" % path)
+                else:
+                    data = "\0" * length
+                block.append(data)
+                block_length += length
+                left -= length
+                if block_length == block_size:
+                    yield "".join(block)
+                    block = []
+                    block_length = 0
+        finally:
+            if fd:
+                fd.close()
+    if block:
+        yield "".join(block)
+
+def _hash_piece(piece):
+    return sha(piece).digest()
+
+def hash_pieces(files, piece_length, progress=None, cancel_event=None,
+                num_threads=None):
+    """
+    Computes the piece hashes of the files of a torrent.
+
+    The files are hashed as one stream, so pieces cross file boundaries.
+    While one block of pieces is being hashed by the thread pool the next
+    one is read.  hashlib releases the GIL so the pieces are hashed on all
+    the CPUs.
+
+    :param files: the files in torrent order, a path of None is a padding
+        file of zeros
+    :type files: list of (path, size) tuples
+    :param piece_length: the piece size in bytes
+    :type piece_length: int
+    :param progress: a function to be called as pieces are hashed
+    :type progress: function(num_completed, num_pieces)
+    :param cancel_event: stops the hashing when it is set
+    :type cancel_event: threading.Event
+    :param num_threads: the number of hashing threads, one per CPU if None
+    :type num_threads: int
+
+    :returns: the concatenated piece hashes
+    :rtype: string
+
+    :raises HashingCancelled: if `cancel_event` was set
+
+    """
+    total_size = sum([size for path, size in files])
+    num_pieces = (total_size + piece_length - 1) / piece_length
+    pieces_per_block = max(1, READ_BLOCK_SIZE / piece_length)
+
+    if num_threads is None:
+        num_threads = get_num_hash_threads()
+    pool = ThreadPool(num_threads)
+
+    pieces = []
+    try:
+        pending = None
+        for block in _read_blocks(files, pieces_per_block * piece_length):
+            if cancel_event and cancel_event.is_set():
+                raise HashingCancelled()
+            result = pool.map_async(_hash_piece, [
+                buffer(block, offset, piece_length)
+                for offset in xrange(0, len(block), piece_length)])
+            if pending:
+                pieces.extend(pending.get())
+                if progress:
+                    progress(len(pieces), num_pieces)
+            pending = result
+
+        if pending:
+            pieces.extend(pending.get())
+            if progress:
+                progress(len(pieces), num_pieces)
+    finally:
+        pool.terminate()
+
+    return "".join(pieces)
+
 class TorrentMetadata(object):
     """
     This class is used to create .torrent files.
@@ -75,17 +191,21 @@ def __init__(self):
         self.__webseeds = []
         self.__pad_files = False
 
-    def save(self, torrent_path, progress=None):
+    def save(self, torrent_path, progress=None, cancel_event=None):
         """
         Creates and saves the torrent file to `path`.
 
         :param torrent_path: where to save the torrent file
         :type torrent_path: string
 
-        :param progress: a function to be called when a piece is hashed
+        :param progress: a function to be called when pieces are hashed
         :type progress: function(num_completed, num_pieces)
 
+        :param cancel_event: stops the hashing when it is set
+        :type cancel_event: threading.Event
+
         :raises InvalidPath: if the data_path has not been set
+        :raises HashingCancelled: if `cancel_event` was set
 
         """
         if not self.data_path:
@@ -124,7 +244,7 @@ def save(self, torrent_path, progress=None):
         datasize = get_path_size(self.data_path)
 
         if self.piece_size:
-            piece_size = piece_size * 1024
+            piece_size = self.piece_size * 1024
         else:
             # We need to calculate a piece size
             piece_size = 16384
@@ -169,57 +289,28 @@ def save(self, torrent_path, progress=None):
                 progress(0, num_pieces)
 
             fs = []
-            pieces = []
-            # Create the piece hashes
-            buf = ""
+            hash_files = []
             for size, path in files:
                 path = [s.decode(sys.getfilesystemencoding()).encode("UTF-8") for s in path]
                 fs.append({"length": size, "path": path})
                 if path[-1].startswith("_____padding_file_"):
-                    buf += "\0" * size
-                    pieces.append(sha(buf).digest())
-                    buf = ""
                     fs[-1]["attr"] = "p"
+                    hash_files.append((None, size))
                 else:
-                    fd = open(os.path.join(self.data_path, *path), "rb")
-                    r = fd.read(piece_size - len(buf))
-                    while r:
-                        buf += r
-                        if len(buf) == piece_size:
-                            pieces.append(sha(buf).digest())
-                            # Run the progress function if necessary
-                            if progress:
-                                progress(len(pieces), num_pieces)
-                            buf = ""
-                        else:
-                            break
-                        r = fd.read(piece_size - len(buf))
-                    fd.close()
-
-            if buf:
-                pieces.append(sha(buf).digest())
-                if progress:
-                    progress(len(pieces), num_pieces)
-                buf = ""
+                    hash_files.append((os.path.join(self.data_path, *path), size))
 
-            torrent["info"]["pieces"] = "".join(pieces)
+            # Create the piece hashes
+            torrent["info"]["pieces"] = hash_pieces(
+                hash_files, piece_size, progress, cancel_event)
             torrent["info"]["files"] = fs
 
         elif os.path.isfile(self.data_path):
             torrent["info"]["name"] = os.path.split(self.data_path)[1]
             torrent["info"]["length"] = get_path_size(self.data_path)
-            pieces = []
-
-            fd = open(self.data_path, "rb")
-            r = fd.read(piece_size)
-            while r:
-                pieces.append(sha(r).digest())
-                if progress:
-                    progress(len(pieces), num_pieces)
-
-                r = fd.read(piece_size)
 
-            torrent["info"]["pieces"] = "".join(pieces)
+            torrent["info"]["pieces"] = hash_pieces(
+                [(self.data_path, torrent["info"]["length"])], piece_size,
+                progress, cancel_event)
 
         # Write out the torrent file
         open(torrent_path, "wb").write(bencode(torrent))
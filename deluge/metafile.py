@@ -21,9 +21,8 @@
 import sys
 import time
 import logging
-from hashlib import sha1 as sha
-
 from deluge.bencode import bencode
+from deluge.maketorrent import hash_pieces
 
 log = logging.getLogger(__name__)
 
@@ -60,7 +59,7 @@ def dummy(*v):
 def make_meta_file(path, url, piece_length, progress=dummy,
                    title=None, comment=None, safe=None, content_type=None,
                    target=None, webseeds=None, name=None, private=False,
-                   created_by=None, trackers=None):
+                   created_by=None, trackers=None, cancel_event=None):
     data = {'creation date': int(gmtime())}
     if url:
         data['announce'] = url.strip()
@@ -72,7 +71,8 @@ def make_meta_file(path, url, piece_length, progress=dummy,
             f = os.path.join(a, b + '.torrent')
     else:
         f = target
-    info = makeinfo(path, piece_length, progress, name, content_type, private)
+    info = makeinfo(path, piece_length, progress, name, content_type, private,
+                    cancel_event)
 
     #check_info(info)
     h = file(f, 'wb')
@@ -117,7 +117,7 @@ def calcsize(path):
     return total
 
 def makeinfo(path, piece_length, progress, name = None,
-             content_type = None, private=False):  # HEREDAVE. If path is directory,
+             content_type = None, private=False, cancel_event=None):  # HEREDAVE. If path is directory,
                                     # how do we assign content type?
     def to_utf8(name):
         if isinstance(name, unicode):
@@ -137,26 +137,12 @@ def to_utf8(name):
                               'characters.' % name)
         return u.encode('utf-8')
     path = os.path.abspath(path)
-    piece_count = 0
     if os.path.isdir(path):
         subs = subfiles(path)
         subs.sort()
-        pieces = []
-        sh = sha()
-        done = 0
         fs = []
-        totalsize = 0.0
-        totalhashed = 0
-        for p, f in subs:
-            totalsize += os.path.getsize(f)
-        if totalsize >= piece_length:
-            import math
-            num_pieces = math.ceil(float(totalsize) / float(piece_length))
-        else:
-            num_pieces = 1
-
+        hash_files = []
         for p, f in subs:
-            pos = 0
             size = os.path.getsize(f)
             p2 = [to_utf8(n) for n in p]
             if content_type:
@@ -164,24 +150,9 @@ def to_utf8(name):
                            'content_type' : content_type}) # HEREDAVE. bad for batch!
             else:
                 fs.append({'length': size, 'path': p2})
-            h = file(f, 'rb')
-            while pos < size:
-                a = min(size - pos, piece_length - done)
-                sh.update(h.read(a))
-                done += a
-                pos += a
-                totalhashed += a
-
-                if done == piece_length:
-                    pieces.append(sh.digest())
-                    piece_count += 1
-                    done = 0
-                    sh = sha()
-                    progress(piece_count, num_pieces)
-            h.close()
-        if done > 0:
-            pieces.append(sh.digest())
-            progress(piece_count, num_pieces)
+            hash_files.append((f, size))
+
+        pieces = hash_pieces(hash_files, piece_length, progress, cancel_event)
 
         if name is not None:
             assert isinstance(name, unicode)
@@ -189,36 +160,20 @@ def to_utf8(name):
         else:
             name = to_utf8(os.path.split(path)[1])
 
-        return {'pieces': ''.join(pieces),
+        return {'pieces': pieces,
             'piece length': piece_length, 'files': fs,
             'name': name,
             'private': private}
     else:
         size = os.path.getsize(path)
-        if size >= piece_length:
-            num_pieces = size / piece_length
-        else:
-            num_pieces = 1
-
-        pieces = []
-        p = 0
-        h = file(path, 'rb')
-        while p < size:
-            x = h.read(min(piece_length, size - p))
-            pieces.append(sha(x).digest())
-            piece_count += 1
-            p += piece_length
-            if p > size:
-                p = size
-            progress(piece_count, num_pieces)
-        h.close()
+        pieces = hash_pieces([(path, size)], piece_length, progress, cancel_event)
         if content_type is not None:
-            return {'pieces': ''.join(pieces),
+            return {'pieces': pieces,
                 'piece length': piece_length, 'length': size,
                 'name': to_utf8(os.path.split(path)[1]),
                 'content_type' : content_type,
                 'private': private }
-        return {'pieces': ''.join(pieces),
+        return {'pieces': pieces,
             'piece length': piece_length, 'length': size,
             'name': to_utf8(os.path.split(path)[1]),
             'private': private}
@@ -40,18 +40,34 @@
 
 from deluge._libtorrent import lt
 import os
+import sys
 import logging
 from deluge.plugins.pluginbase import CorePluginBase
 import deluge.component as component
 import deluge.configmanager
 from deluge.common import AUTH_LEVEL_ADMIN
 from deluge.core.rpcserver import export
-from twisted.internet.task import LoopingCall, deferLater
-from twisted.internet import reactor
+from twisted.internet.task import LoopingCall, deferLater, cooperate
+from twisted.internet import reactor, threads
 from deluge.event import DelugeEvent
 
+try:
+    from twisted.internet import inotify
+    from twisted.python.filepath import FilePath
+except ImportError:
+    inotify = None
+
 log = logging.getLogger(__name__)
 
+def fs_path(path):
+    """
+    Returns a path as a str in the filesystem encoding, so that the file
+    names listed or watched in it are str too.
+    """
+    if isinstance(path, unicode):
+        return path.encode(sys.getfilesystemencoding() or "utf8")
+    return path
+
 DEFAULT_PREFS = {
     "watchdirs":{},
     "next_id":1
@@ -84,6 +100,19 @@
 
 MAX_NUM_ATTEMPTS = 10
 
+# Seconds between the scans of the watch folders when inotify is not available
+POLL_INTERVAL = 5
+
+# inotify does not see the files written to a network mount by other hosts,
+# so the watched folders are still scanned, less often
+RESCAN_INTERVAL = 60
+
+# Seconds to wait for more files before loading the ones found
+LOAD_DELAY = 0.5
+
+# The number of torrent files read in the thread pool at a time
+LOAD_BATCH = 50
+
 class AutoaddOptionsChangedEvent(DelugeEvent):
     """Emitted when the options for the plugin are changed."""
     def __init__(self):
@@ -110,6 +139,26 @@ def enable(self):
         self.invalid_torrents = {}
         # Loopingcall timers for each enabled watchdir
         self.update_timers = {}
+        # The watchdir_id of the folders watched with inotify {abspath: watchdir_id}
+        self.watched = {}
+        # The files found and not loaded yet {watchdir_id: set(filenames)}
+        self.pending = {}
+        self.pending_call = None
+        # The paths of the files being loaded or added
+        self.loading = set()
+        # The cooperative tasks adding the loaded torrents
+        self.add_tasks = set()
+
+        self.notifier = None
+        if inotify:
+            try:
+                self.notifier = inotify.INotify()
+                self.notifier.startReading()
+            except Exception, e:
+                log.info("Unable to use inotify, the watch folders will be "
+                         "polled: %s", e)
+                self.notifier = None
+
         deferLater(reactor, 5, self.enable_looping)
 
     def enable_looping(self):
@@ -125,6 +174,13 @@ def disable(self):
         )
         for loopingcall in self.update_timers.itervalues():
             loopingcall.stop()
+        if self.pending_call and self.pending_call.active():
+            self.pending_call.cancel()
+        for task in list(self.add_tasks):
+            task.stop()
+        if self.notifier:
+            self.notifier.loseConnection()
+            self.notifier = None
         self.config.save()
 
     def update(self):
@@ -162,38 +218,166 @@ def set_options(self, watchdir_id, options):
         component.get("EventManager").emit(AutoaddOptionsChangedEvent())
 
     def load_torrent(self, filename):
+        """
+        Reads and decodes a torrent file.  This is run in a thread.
+
+        :returns: the contents of the file and its torrent_info
+        :rtype: tuple
+
+        """
         try:
             log.debug("Attempting to open %s for add.", filename)
             _file = open(filename, "rb")
-            filedump = _file.read()
+            try:
+                filedump = _file.read()
+            finally:
+                _file.close()
             if not filedump:
                 raise RuntimeError, "Torrent is 0 bytes!"
-            _file.close()
         except IOError, e:
             log.warning("Unable to open %s: %s", filename, e)
             raise e
 
         # Get the info to see if any exceptions are raised
-        lt.torrent_info(lt.bdecode(filedump))
+        torrent_info = lt.torrent_info(lt.bdecode(filedump))
 
-        return filedump
+        return filedump, torrent_info
 
-    def update_watchdir(self, watchdir_id):
-        """Check the watch folder for new torrents to add."""
-        log.trace("Updating watchdir id: %s", watchdir_id)
-        watchdir_id = str(watchdir_id)
-        watchdir = self.watchdirs[watchdir_id]
-        if not watchdir['enabled']:
-            # We shouldn't be updating because this watchdir is not enabled
-            log.debug("Watchdir id %s is not enabled. Disabling it.",
-                      watchdir_id)
-            self.disable_watchdir(watchdir_id)
+    def load_torrents(self, files):
+        """
+        Loads the torrent files of a batch.  This is run in a thread.
+
+        :param files: the (watchdir_id, filepath, filename) of the files
+        :type files: list
+
+        :returns: (watchdir_id, filepath, filename, filedump, torrent_info,
+            error) for each file, error is None if it was loaded
+        :rtype: list
+
+        """
+        loaded = []
+        for watchdir_id, filepath, filename in files:
+            if not os.path.isfile(filepath):
+                # The file was moved away or added by a previous pass
+                continue
+            try:
+                filedump, torrent_info = self.load_torrent(filepath)
+            except Exception, e:
+                loaded.append((watchdir_id, filepath, filename, None, None, e))
+            else:
+                loaded.append((watchdir_id, filepath, filename, filedump,
+                               torrent_info, None))
+        return loaded
+
+    def list_watchdir(self, abspath):
+        """
+        Returns the names of the torrent files in a folder.  This is run in
+        a thread.
+        """
+        filenames = []
+        abspath = fs_path(abspath)
+        for filename in os.listdir(abspath):
+            try:
+                filepath = os.path.join(abspath, filename)
+            except UnicodeDecodeError, e:
+                log.error("Unable to auto add torrent due to improper "
+                          "filename encoding: %s", e)
+                continue
+            if os.path.splitext(filename)[1] == ".torrent" and \
+                    not os.path.isdir(filepath):
+                filenames.append(filename)
+        return filenames
+
+    def queue_torrent_file(self, watchdir_id, filename):
+        """
+        Queues a torrent file found in a watch folder to be added.  The files
+        found within LOAD_DELAY of each other are loaded together.
+        """
+        self.pending.setdefault(watchdir_id, set()).add(filename)
+        if not (self.pending_call and self.pending_call.active()):
+            self.pending_call = reactor.callLater(LOAD_DELAY, self.load_pending)
+
+    def load_pending(self):
+        """
+        Loads the queued torrent files in the thread pool and adds them to
+        the session cooperatively, so the RPC server keeps answering
+        requests while a lot of files are added.
+        """
+        pending, self.pending = self.pending, {}
+        files = []
+        for watchdir_id, filenames in pending.iteritems():
+            watchdir = self.watchdirs.get(watchdir_id)
+            if not watchdir or not watchdir['enabled']:
+                continue
+            for filename in filenames:
+                filepath = os.path.join(fs_path(watchdir["abspath"]), filename)
+                if filepath in self.loading:
+                    continue
+                self.loading.add(filepath)
+                files.append((watchdir_id, filepath, filename))
+        if not files:
             return
 
-        if not os.path.isdir(watchdir["abspath"]):
-            log.warning("Invalid AutoAdd folder: %s", watchdir["abspath"])
-            self.disable_watchdir(watchdir_id)
+        batches = []
+        for index in xrange(0, len(files), LOAD_BATCH):
+            batches.append(threads.deferToThread(self.load_torrents,
+                                                 files[index:index + LOAD_BATCH]))
+
+        def add_torrents():
+            for batch in batches:
+                loaded = []
+                batch.addCallback(loaded.extend)
+                # The cooperator waits for the batch to be loaded
+                yield batch
+
+                for watchdir_id, filepath, filename, filedump, torrent_info, error in loaded:
+                    try:
+                        self.add_torrent_file(watchdir_id, filepath, filename,
+                                              filedump, torrent_info, error)
+                    except Exception, e:
+                        log.error("Unable to auto add %s: %s", filepath, e)
+                    self.loading.discard(filepath)
+                    yield None
+
+        def on_added(result, task):
+            self.add_tasks.discard(task)
+            for watchdir_id, filepath, filename in files:
+                self.loading.discard(filepath)
+            # The state is saved once for all the torrents added
+            component.get("TorrentManager").save_state()
+            return result
+
+        task = cooperate(add_torrents())
+        self.add_tasks.add(task)
+        d = task.whenDone()
+        d.addBoth(on_added, task)
+        d.addErrback(lambda failure: None)
+
+    def add_torrent_file(self, watchdir_id, filepath, filename, filedump,
+                         torrent_info, error):
+        """Adds a loaded torrent file to the session."""
+        watchdir = self.watchdirs.get(watchdir_id)
+        if not watchdir or not watchdir['enabled']:
+            return
+
+        if error is not None:
+            # If the torrent is invalid, we keep track of it so that we
+            # can try again on the next pass.  This is because some
+            # torrents may not be fully saved during the pass.
+            log.debug("Torrent is invalid: %s", error)
+            if filename in self.invalid_torrents:
+                self.invalid_torrents[filename] += 1
+                if self.invalid_torrents[filename] >= MAX_NUM_ATTEMPTS:
+                    log.warning(
+                        "Maximum attempts reached while trying to add the "
+                        "torrent file with the path %s", filepath
+                    )
+                    os.rename(filepath, filepath + ".invalid")
+                    del self.invalid_torrents[filename]
+            else:
+                self.invalid_torrents[filename] = 1
             return
+        self.invalid_torrents.pop(filename, None)
 
         # Generate options dict for watchdir
         opts = {}
@@ -205,88 +389,95 @@ def update_watchdir(self, watchdir_id):
             if OPTIONS_AVAILABLE.get(option):
                 if watchdir.get(option+'_toggle', True):
                     opts[option] = value
-        for filename in os.listdir(watchdir["abspath"]):
-            try:
-                filepath = os.path.join(watchdir["abspath"], filename)
-            except UnicodeDecodeError, e:
-                log.error("Unable to auto add torrent due to improper "
-                          "filename encoding: %s", e)
-                continue
-            if os.path.isdir(filepath):
-                # Skip directories
-                continue
-            elif os.path.splitext(filename)[1] == ".torrent":
-                try:
-                    filedump = self.load_torrent(filepath)
-                except (RuntimeError, Exception), e:
-                    # If the torrent is invalid, we keep track of it so that we
-                    # can try again on the next pass.  This is because some
-                    # torrents may not be fully saved during the pass.
-                    log.debug("Torrent is invalid: %s", e)
-                    if filename in self.invalid_torrents:
-                        self.invalid_torrents[filename] += 1
-                        if self.invalid_torrents[filename] >= MAX_NUM_ATTEMPTS:
-                            log.warning(
-                                "Maximum attempts reached while trying to add the "
-                                "torrent file with the path %s", filepath
-                            )
-                            os.rename(filepath, filepath + ".invalid")
-                            del self.invalid_torrents[filename]
-                    else:
-                        self.invalid_torrents[filename] = 1
-                    continue
 
-                # The torrent looks good, so lets add it to the session.
-                torrent_id = component.get("TorrentManager").add(
-                    filedump=filedump, filename=filename, options=opts,
-                    owner=watchdir.get("owner", "localclient")
-                )
-                # If the torrent added successfully, set the extra options.
-                if torrent_id:
-                    if 'Label' in component.get("CorePluginManager").get_enabled_plugins():
-                        if watchdir.get('label_toggle', True) and watchdir.get('label'):
-                            label = component.get("CorePlugin.Label")
-                            if not watchdir['label'] in label.get_labels():
-                                label.add(watchdir['label'])
-                            label.set_torrent(torrent_id, watchdir['label'])
-                    if watchdir.get('queue_to_top_toggle', True) and 'queue_to_top' in watchdir:
-                        if watchdir['queue_to_top']:
-                            component.get("TorrentManager").queue_top(torrent_id)
-                        else:
-                            component.get("TorrentManager").queue_bottom(torrent_id)
-
-                # Rename, copy or delete the torrent once added to deluge.
-                if watchdir.get('append_extension_toggle'):
-                    if not watchdir.get('append_extension'):
-                        watchdir['append_extension'] = ".added"
-                    os.rename(filepath, filepath + watchdir['append_extension'])
-                elif watchdir.get('copy_torrent_toggle'):
-                    copy_torrent_path = watchdir['copy_torrent']
-                    copy_torrent_file = os.path.join(copy_torrent_path, filename)
-                    log.debug("Moving added torrent file \"%s\" to \"%s\"",
-                              os.path.basename(filepath), copy_torrent_path)
+        # The torrent looks good, so lets add it to the session.
+        torrent_id = component.get("TorrentManager").add(
+            torrent_info=torrent_info, filedump=filedump, filename=filename,
+            options=opts, save_state=False,
+            owner=watchdir.get("owner", "localclient")
+        )
+        # If the torrent added successfully, set the extra options.
+        if torrent_id:
+            if 'Label' in component.get("CorePluginManager").get_enabled_plugins():
+                if watchdir.get('label_toggle', True) and watchdir.get('label'):
+                    label = component.get("CorePlugin.Label")
+                    if not watchdir['label'] in label.get_labels():
+                        label.add(watchdir['label'])
+                    label.set_torrent(torrent_id, watchdir['label'])
+            if watchdir.get('queue_to_top_toggle', True) and 'queue_to_top' in watchdir:
+                if watchdir['queue_to_top']:
+                    component.get("TorrentManager").queue_top(torrent_id)
+                else:
+                    component.get("TorrentManager").queue_bottom(torrent_id)
+
+        # Rename, copy or delete the torrent once added to deluge.
+        if watchdir.get('append_extension_toggle'):
+            if not watchdir.get('append_extension'):
+                watchdir['append_extension'] = ".added"
+            os.rename(filepath, filepath + watchdir['append_extension'])
+        elif watchdir.get('copy_torrent_toggle'):
+            copy_torrent_path = watchdir['copy_torrent']
+            copy_torrent_file = os.path.join(copy_torrent_path, filename)
+            log.debug("Moving added torrent file \"%s\" to \"%s\"",
+                      os.path.basename(filepath), copy_torrent_path)
+            try:
+                os.rename(filepath, copy_torrent_file)
+            except OSError, why:
+                if why.errno == 18:
+                    # This can happen for different mount points
+                    from shutil import copyfile
                     try:
-                        os.rename(filepath, copy_torrent_file)
-                    except OSError, why:
-                        if why.errno == 18:
-                            # This can happen for different mount points
-                            from shutil import copyfile
-                            try:
-                                copyfile(filepath, copy_torrent_file)
-                                os.remove(filepath)
-                            except OSError:
-                                # Last Resort!
-                                try:
-                                    open(copy_torrent_file, 'wb').write(
-                                        open(filepath, 'rb').read()
-                                    )
-                                    os.remove(filepath)
-                                except OSError, why:
-                                    raise why
-                        else:
+                        copyfile(filepath, copy_torrent_file)
+                        os.remove(filepath)
+                    except OSError:
+                        # Last Resort!
+                        try:
+                            open(copy_torrent_file, 'wb').write(
+                                open(filepath, 'rb').read()
+                            )
+                            os.remove(filepath)
+                        except OSError, why:
                             raise why
                 else:
-                    os.remove(filepath)
+                    raise why
+        else:
+            os.remove(filepath)
+
+    def on_inotify_event(self, watch, filepath, mask):
+        """Queues the torrent files written or moved to a watched folder."""
+        dirname, filename = os.path.split(filepath.path)
+        watchdir_id = self.watched.get(dirname)
+        if watchdir_id is None:
+            return
+        if os.path.splitext(filename)[1] == ".torrent":
+            self.queue_torrent_file(watchdir_id, filename)
+
+    def update_watchdir(self, watchdir_id):
+        """Check the watch folder for new torrents to add."""
+        log.trace("Updating watchdir id: %s", watchdir_id)
+        watchdir_id = str(watchdir_id)
+        watchdir = self.watchdirs[watchdir_id]
+        if not watchdir['enabled']:
+            # We shouldn't be updating because this watchdir is not enabled
+            log.debug("Watchdir id %s is not enabled. Disabling it.",
+                      watchdir_id)
+            self.disable_watchdir(watchdir_id)
+            return
+
+        if not os.path.isdir(watchdir["abspath"]):
+            log.warning("Invalid AutoAdd folder: %s", watchdir["abspath"])
+            self.disable_watchdir(watchdir_id)
+            return
+
+        def on_list(filenames):
+            for filename in filenames:
+                self.queue_torrent_file(watchdir_id, filename)
+
+        # The folder may be on a slow network mount, so it is listed in a
+        # thread.  The next scan waits for this one to finish.
+        d = threads.deferToThread(self.list_watchdir, watchdir["abspath"])
+        d.addCallback(on_list)
+        return d
 
     def on_update_watchdir_error(self, failure, watchdir_id):
         """Disables any watch folders with un-handled exceptions."""
@@ -299,8 +490,11 @@ def enable_watchdir(self, watchdir_id):
         w_id = str(watchdir_id)
         # Enable the looping call
         if w_id not in self.update_timers or not self.update_timers[w_id].running:
+            interval = POLL_INTERVAL
+            if self.watch(w_id):
+                interval = RESCAN_INTERVAL
             self.update_timers[w_id] = LoopingCall(self.update_watchdir, w_id)
-            self.update_timers[w_id].start(5).addErrback(
+            self.update_timers[w_id].start(interval).addErrback(
                 self.on_update_watchdir_error, w_id
             )
         # Update the config
@@ -317,12 +511,45 @@ def disable_watchdir(self, watchdir_id):
             if self.update_timers[w_id].running:
                 self.update_timers[w_id].stop()
             del self.update_timers[w_id]
+        self.unwatch(w_id)
+        self.pending.pop(w_id, None)
         # Update the config
         if self.watchdirs[w_id]['enabled']:
             self.watchdirs[w_id]['enabled'] = False
             self.config.save()
             component.get("EventManager").emit(AutoaddOptionsChangedEvent())
 
+    def watch(self, watchdir_id):
+        """
+        Watches a folder for torrent files written or moved to it.
+
+        :returns: True if the folder is watched with inotify
+        :rtype: bool
+
+        """
+        if not self.notifier:
+            return False
+        abspath = os.path.abspath(fs_path(self.watchdirs[watchdir_id]["abspath"]))
+        try:
+            self.notifier.watch(FilePath(abspath),
+                                mask=inotify.IN_CLOSE_WRITE | inotify.IN_MOVED_TO,
+                                callbacks=[self.on_inotify_event])
+        except Exception, e:
+            log.warning("Unable to watch %s with inotify: %s", abspath, e)
+            return False
+        self.watched[abspath] = watchdir_id
+        return True
+
+    def unwatch(self, watchdir_id):
+        """Stops watching a folder with inotify."""
+        for abspath, w_id in self.watched.items():
+            if w_id == watchdir_id:
+                del self.watched[abspath]
+                try:
+                    self.notifier.ignore(FilePath(abspath))
+                except Exception, e:
+                    log.debug("Unable to stop watching %s: %s", abspath, e)
+
     @export
     def set_config(self, config):
         """Sets the config dictionary."""
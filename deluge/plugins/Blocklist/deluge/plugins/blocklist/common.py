@@ -36,9 +36,17 @@
 
 import pkg_resources
 import os.path
+import struct
+import sys
+from array import array
 from functools import wraps
 from sys import exc_info
 
+try:
+    from hashlib import sha1 as sha
+except ImportError:
+    from sha import sha
+
 def get_resource(filename):
     return pkg_resources.resource_filename("deluge.plugins.blocklist",
                                            os.path.join("data", filename))
@@ -85,3 +93,158 @@ def remove_zeros(ip):
 
     """
     return ".".join([part.lstrip("0").zfill(1) for part in ip.split(".")])
+
+def ip_to_int(ip):
+    """
+    Converts an ip address to an integer.
+
+    :param ip: the ip address, eg. "1.2.3.4" or "001.002.003.004"
+    :type ip: string
+
+    :returns: the ip address as an integer
+    :rtype: int
+
+    :raises ValueError: if the ip address is not valid
+
+    """
+    a, b, c, d = [int(part) for part in ip.split(".")]
+    if (a | b | c | d) >> 8:
+        # One of the parts is negative or larger than 255
+        raise ValueError("Invalid ip address: %s" % ip)
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+def int_to_ip(value):
+    """
+    Converts an integer to an ip address.
+
+    :param value: the ip address as an integer
+    :type value: int
+
+    :returns: the ip address
+    :rtype: string
+
+    """
+    return "%d.%d.%d.%d" % (value >> 24, (value >> 16) & 0xff,
+                            (value >> 8) & 0xff, value & 0xff)
+
+def merge_ranges(ranges):
+    """
+    Sorts ip ranges and merges the ones that overlap or are adjacent.
+
+    :param ranges: the (start, end) ip ranges as integers, sorted in place
+    :type ranges: list
+
+    :returns: the merged ranges
+    :rtype: list
+
+    """
+    ranges.sort()
+    merged = []
+    last_start = last_end = None
+    for start, end in ranges:
+        if start > end:
+            continue
+        if last_end is not None and start <= last_end + 1:
+            if end > last_end:
+                last_end = end
+            continue
+        if last_end is not None:
+            merged.append((last_start, last_end))
+        last_start, last_end = start, end
+    if last_end is not None:
+        merged.append((last_start, last_end))
+    return merged
+
+def file_digest(filename):
+    """
+    Returns the sha1 digest of a file.
+    """
+    digest = sha()
+    f = open(filename, "rb")
+    try:
+        while True:
+            data = f.read(65536)
+            if not data:
+                break
+            digest.update(data)
+    finally:
+        f.close()
+    return digest.digest()
+
+# The compiled ranges file, see save_ranges()
+RANGES_MAGIC = "DBLR"
+RANGES_VERSION = 1
+RANGES_HEADER_FORMAT = "!4sB20sI"
+RANGES_HEADER_SIZE = struct.calcsize(RANGES_HEADER_FORMAT)
+RANGES_TYPECODE = array("I").itemsize == 4 and "I" or "L"
+
+def save_ranges(filename, digest, ranges):
+    """
+    Saves merged ip ranges to a compact binary file, so they can be loaded
+    without reading the blocklist again.
+
+    The file holds a header with the digest of the blocklist the ranges
+    were read from, followed by the start and end of every range as 32 bit
+    integers in network byte order.
+
+    :param filename: the file to save to
+    :type filename: string
+    :param digest: the digest of the blocklist, see file_digest()
+    :type digest: string
+    :param ranges: the (start, end) ip ranges as integers
+    :type ranges: list
+
+    """
+    values = array(RANGES_TYPECODE)
+    for start, end in ranges:
+        values.append(start)
+        values.append(end)
+    if sys.byteorder == "little":
+        values.byteswap()
+
+    tmp = filename + ".new"
+    f = open(tmp, "wb")
+    try:
+        f.write(struct.pack(RANGES_HEADER_FORMAT, RANGES_MAGIC, RANGES_VERSION,
+                            digest, len(ranges)))
+        f.write(values.tostring())
+    finally:
+        f.close()
+    os.rename(tmp, filename)
+
+def load_ranges(filename, digest):
+    """
+    Loads the ip ranges saved by save_ranges().
+
+    :param filename: the file to load from
+    :type filename: string
+    :param digest: the digest of the blocklist the ranges must be of
+    :type digest: string
+
+    :returns: the (start, end) ip ranges as integers, or None if the file
+        is not valid or is of another blocklist
+    :rtype: list
+
+    """
+    f = open(filename, "rb")
+    try:
+        data = f.read()
+    finally:
+        f.close()
+
+    if len(data) < RANGES_HEADER_SIZE:
+        return None
+    magic, version, saved_digest, count = struct.unpack(
+        RANGES_HEADER_FORMAT, data[:RANGES_HEADER_SIZE])
+    if magic != RANGES_MAGIC or version != RANGES_VERSION or saved_digest != digest:
+        return None
+
+    values = array(RANGES_TYPECODE)
+    data = data[RANGES_HEADER_SIZE:]
+    if len(data) != count * 2 * values.itemsize:
+        return None
+    values.fromstring(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    values = values.tolist()
+    return zip(values[::2], values[1::2])
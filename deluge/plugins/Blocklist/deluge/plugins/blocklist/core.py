@@ -55,6 +55,7 @@
 from deluge.httpdownloader import download_file
 from detect import detect_compression, detect_format, create_reader, UnknownFormatError
 from readers import ReaderParseError
+from common import file_digest, save_ranges, load_ranges, int_to_ip
 
 # TODO: check return values for deferred callbacks
 # TODO: review class attributes for redundancy
@@ -318,10 +319,34 @@ def import_list(self, blocklist):
         :returns: a Deferred that fires when the blocklist has been imported
         :rtype: Deferred
         """
-        def on_read_ip_range(start, end):
-            """Add ip range to blocklist"""
-            self.blocklist.add_rule(start, end, BLOCK_RANGE)
-            self.num_blocked += 1
+        def read_ranges(blocklist):
+            """
+            Add the ip ranges to the blocklist, from the compiled ranges if
+            they are of the same file
+            """
+            digest = file_digest(blocklist)
+            compiled = deluge.configmanager.get_config_dir("blocklist.ranges")
+            ranges = None
+            if os.path.isfile(compiled):
+                try:
+                    ranges = load_ranges(compiled, digest)
+                except (IOError, OSError), e:
+                    log.warning("Unable to load the compiled blocklist: %s", e)
+
+            if ranges is None:
+                ranges = self.reader(blocklist).read_ranges()
+                try:
+                    save_ranges(compiled, digest, ranges)
+                except (IOError, OSError), e:
+                    log.warning("Unable to save the compiled blocklist: %s", e)
+            else:
+                log.debug("Loaded %d ranges from the compiled blocklist", len(ranges))
+
+            add_rule = self.blocklist.add_rule
+            for start, end in ranges:
+                add_rule(int_to_ip(start), int_to_ip(end), BLOCK_RANGE)
+            self.num_blocked = len(ranges)
+            return blocklist
 
         def on_finish_read(result):
             """Add blocklist to session"""
@@ -346,7 +371,7 @@ def on_finish_read(result):
 
         log.debug("Importing using reader: %s", self.reader)
         log.debug("Reader type: %s compression: %s", self.config["list_type"], self.config["list_compression"])
-        d = threads.deferToThread(self.reader(blocklist).read, on_read_ip_range)
+        d = threads.deferToThread(read_ranges, blocklist)
         d.addCallback(on_finish_read)
 
         return d
@@ -33,7 +33,7 @@
 #
 #
 
-from common import raisesErrorsAs, remove_zeros
+from common import raisesErrorsAs, ip_to_int, int_to_ip, merge_ranges
 import re
 
 class ReaderParseError(Exception):
@@ -54,9 +54,9 @@ def parse(self, line):
         raise NotYetImplemented
 
     def read(self, callback):
-        """Calls callback on each ip range in the file"""
-        for start, end in self.readranges():
-            callback(remove_zeros(start), remove_zeros(end))
+        """Calls callback on each merged ip range in the file"""
+        for start, end in self.read_ranges():
+            callback(int_to_ip(start), int_to_ip(end))
         return self.file
 
     def is_ignored(self, line):
@@ -82,6 +82,27 @@ def is_valid(self):
         blocklist.close()
         return valid
 
+    @raisesErrorsAs(ReaderParseError)
+    def read_ranges(self):
+        """
+        Returns the ip ranges in the file as (start, end) integers, sorted
+        and with the overlapping and adjacent ranges merged
+        """
+        ranges = []
+        append = ranges.append
+        parse = self.parse
+        blocklist = self.open()
+        try:
+            for line in blocklist:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                start, end = parse(line)
+                append((ip_to_int(start), ip_to_int(end)))
+        finally:
+            blocklist.close()
+        return merge_ranges(ranges)
+
     @raisesErrorsAs(ReaderParseError)
     def readranges(self):
         """Yields each ip range from the file"""
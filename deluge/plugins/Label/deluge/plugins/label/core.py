@@ -43,6 +43,8 @@
 from deluge.configmanager import ConfigManager
 import deluge.component as component
 from urlparse import urlparse
+from collections import deque
+from twisted.internet import reactor
 
 import traceback
 import re
@@ -84,12 +86,79 @@
 
 NO_LABEL = "No Label"
 
+# Seconds the saving of the config is delayed by, so a batch of changes is
+# only written once
+SAVE_DELAY = 5
+
 
 def CheckInput(cond, message):
     if not cond:
         raise Exception(message)
 
 
+class TrackerMatcher(object):
+    """
+    Finds the labels that have one of their auto add trackers in a tracker
+    url.  The trackers of all the labels are compiled in to an Aho-Corasick
+    automaton, so each url is only read once however many there are.
+    """
+    def __init__(self, trackers):
+        """
+        :param trackers: the auto add trackers of each label
+        :type trackers: {label_id: [tracker, ..]}
+        """
+        # The transitions, failure transition and matching labels of each
+        # state, state 0 is the start
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for label_id, label_trackers in trackers.iteritems():
+            for tracker in label_trackers:
+                state = 0
+                for char in tracker:
+                    next_state = self.goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self.goto)
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.output.append(set())
+                        self.goto[state][char] = next_state
+                    state = next_state
+                self.output[state].add(label_id)
+
+        # The failure transitions are set breadth first, so the ones of the
+        # shorter prefixes are known
+        queue = deque(self.goto[0].itervalues())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].iteritems():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                self.output[next_state] |= self.output[self.fail[next_state]]
+
+    def match(self, url):
+        """
+        Returns the labels with a tracker in url.
+
+        :rtype: set
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        # Empty trackers match every url
+        matched = set(output[0])
+        state = 0
+        for char in url:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matched |= output[state]
+        return matched
+
 class Core(CorePluginBase):
     """
     self.labels = {label_id:label_options_dict}
@@ -112,8 +181,13 @@ def enable(self):
 
         self.clean_initial_config()
 
+        # The compiled auto add trackers, built when first needed
+        self.matcher = None
+        self.save_timer = None
+
         component.get("EventManager").register_event_handler("TorrentAddedEvent", self.post_torrent_add)
         component.get("EventManager").register_event_handler("TorrentRemovedEvent", self.post_torrent_remove)
+        component.get("EventManager").register_event_handler("SessionStartedEvent", self.on_session_started)
 
         #register tree:
         component.get("FilterManager").register_tree_field("label", self.init_filter_dict)
@@ -121,10 +195,14 @@ def enable(self):
         log.debug("Label plugin enabled..")
 
     def disable(self):
+        if self.save_timer and self.save_timer.active():
+            self.save_timer.cancel()
+            self.save_config()
         self.plugin.deregister_status_field("label")
         component.get("FilterManager").deregister_tree_field("label")
         component.get("EventManager").deregister_event_handler("TorrentAddedEvent", self.post_torrent_add)
         component.get("EventManager").deregister_event_handler("TorrentRemovedEvent", self.post_torrent_remove)
+        component.get("EventManager").deregister_event_handler("SessionStartedEvent", self.on_session_started)
 
     def update(self):
         pass
@@ -137,22 +215,32 @@ def post_torrent_add(self, torrent_id, from_state):
         log.debug("post_torrent_add")
         torrent = self.torrents[torrent_id]
 
-        for label_id, options in self.labels.iteritems():
-            if options["auto_add"]:
-                if self._has_auto_match(torrent, options):
-                    self.set_torrent(torrent_id, label_id)
-                    return
+        matched = self._get_auto_match(torrent)
+        for label_id in self.labels:
+            if label_id in matched:
+                self.set_torrent(torrent_id, label_id)
+                return
 
     def post_torrent_remove(self, torrent_id):
         log.debug("post_torrent_remove")
         if torrent_id in self.torrent_labels:
             del self.torrent_labels[torrent_id]
 
+    def on_session_started(self):
+        # The labels of torrents no longer in the session can only be
+        # removed once all of them have been loaded
+        self.clean_config()
+        self.save_config_later()
+
     ## Utils ##
     def clean_config(self):
         """remove invalid data from config-file"""
+        # Torrents that are still being loaded on startup are not in the
+        # session yet, so only check for them once the session is loaded.
+        torrents_loaded = component.get("TorrentManager").state_loaded
         for torrent_id, label_id in list(self.torrent_labels.iteritems()):
-            if (not label_id in self.labels) or (not torrent_id in self.torrents):
+            if (not label_id in self.labels) or \
+                    (torrents_loaded and not torrent_id in self.torrents):
                 log.debug("label: rm %s:%s" % (torrent_id,label_id))
                 del self.torrent_labels[torrent_id]
 
@@ -176,6 +264,14 @@ def save_config(self):
         self.clean_config()
         self.config.save()
 
+    def save_config_later(self):
+        """
+        Saves the config in SAVE_DELAY seconds, with any other changes made
+        until then.
+        """
+        if not self.save_timer or not self.save_timer.active():
+            self.save_timer = reactor.callLater(SAVE_DELAY, self.save_config)
+
     @export
     def get_labels(self):
         return sorted(self.labels.keys())
@@ -192,6 +288,7 @@ def add(self, label_id):
         CheckInput(not (label_id in self.labels) , _("Label already exists"))
 
         self.labels[label_id] = dict(OPTIONS_DEFAULTS)
+        self.matcher = None
         self.config.save()
 
     @export
@@ -199,6 +296,7 @@ def remove(self, label_id):
         """remove a label"""
         CheckInput(label_id in self.labels, _("Unknown Label"))
         del self.labels[label_id]
+        self.matcher = None
         self.clean_config()
         self.config.save()
 
@@ -255,13 +353,17 @@ def _unset_torrent_options(self, torrent_id, label_id):
                 }
             )
 
-    def _has_auto_match(self, torrent ,label_options):
-        """match for auto_add fields"""
-        for tracker_match in label_options["auto_add_trackers"]:
-            for tracker in torrent.trackers:
-                if tracker_match in tracker["url"]:
-                    return True
-        return False
+    def _get_auto_match(self, torrent):
+        """returns the labels with auto_add set that match the torrent's trackers"""
+        if self.matcher is None:
+            self.matcher = TrackerMatcher(dict(
+                (label_id, options["auto_add_trackers"])
+                for label_id, options in self.labels.iteritems()
+                if options["auto_add"]))
+        matched = set()
+        for tracker in torrent.trackers:
+            matched |= self.matcher.match(tracker["url"])
+        return matched
 
     @export
     def set_options(self, label_id, options_dict):
@@ -283,18 +385,22 @@ def set_options(self, label_id, options_dict):
                 raise Exception("label: Invalid options_dict key:%s" % key)
 
         self.labels[label_id].update(options_dict)
+        self.matcher = None
 
         #apply
         for torrent_id,label in self.torrent_labels.iteritems():
             if label_id == label and torrent_id in self.torrents:
                 self._set_torrent_options(torrent_id , label_id)
 
-        #auto add
+        #auto add, the torrents that already have the label were set above
         options = self.labels[label_id]
         if options["auto_add"]:
+            torrent_ids = []
             for torrent_id, torrent in self.torrents.iteritems():
-                if self._has_auto_match(torrent, options):
-                    self.set_torrent(torrent_id , label_id)
+                if self.torrent_labels.get(torrent_id) != label_id and \
+                        label_id in self._get_auto_match(torrent):
+                    torrent_ids.append(torrent_id)
+            self._set_torrents(torrent_ids, label_id)
 
         self.config.save()
 
@@ -309,21 +415,32 @@ def set_torrent(self, torrent_id , label_id):
         assign a label to a torrent
         removes a label if the label_id parameter is empty.
         """
+        self.set_torrents([torrent_id], label_id)
+
+    @export
+    def set_torrents(self, torrent_ids, label_id):
+        """
+        assign a label to several torrents
+        removes their label if the label_id parameter is empty.
+        """
         if label_id == NO_LABEL:
             label_id = None
 
         CheckInput((not label_id) or (label_id in self.labels)  , _("Unknown Label"))
-        CheckInput(torrent_id in self.torrents  , _("Unknown Torrent"))
+        for torrent_id in torrent_ids:
+            CheckInput(torrent_id in self.torrents  , _("Unknown Torrent"))
 
-        if torrent_id in self.torrent_labels:
-            self._unset_torrent_options(torrent_id, self.torrent_labels[torrent_id])
-            del self.torrent_labels[torrent_id]
-            self.clean_config()
-        if label_id:
-            self.torrent_labels[torrent_id] = label_id
-            self._set_torrent_options(torrent_id, label_id)
+        self._set_torrents(torrent_ids, label_id)
+        self.save_config_later()
 
-        self.config.save()
+    def _set_torrents(self, torrent_ids, label_id):
+        for torrent_id in torrent_ids:
+            if torrent_id in self.torrent_labels:
+                self._unset_torrent_options(torrent_id, self.torrent_labels[torrent_id])
+                del self.torrent_labels[torrent_id]
+            if label_id:
+                self.torrent_labels[torrent_id] = label_id
+                self._set_torrent_options(torrent_id, label_id)
 
     @export
     def get_config(self):
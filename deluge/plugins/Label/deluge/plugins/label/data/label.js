@@ -514,15 +514,9 @@ Deluge.plugins.LabelPlugin = Ext.extend(Deluge.Plugin, {
 
 	onTorrentMenuClick: function(item, e) {
 		var ids = deluge.torrents.getSelectedIds();
-		Ext.each(ids, function(id, i) {
-			if (ids.length == i +1 ) {
-				deluge.client.label.set_torrent(id, item.label, {
-					success: function() {
-						deluge.ui.update();
-					}
-				});
-			} else {
-				deluge.client.label.set_torrent(id, item.label);
+		deluge.client.label.set_torrents(ids, item.label, {
+			success: function() {
+				deluge.ui.update();
 			}
 		});
 	}
@@ -75,5 +75,4 @@ def cb_labels(self, labels):
 
     def on_select_label(self, widget=None, label_id=None):
         log.debug("select label:%s,%s" % (label_id ,self.get_torrent_ids()) )
-        for torrent_id in self.get_torrent_ids():
-            client.label.set_torrent(torrent_id, label_id)
+        client.label.set_torrents(self.get_torrent_ids(), label_id)
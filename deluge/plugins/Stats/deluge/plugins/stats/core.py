@@ -34,6 +34,7 @@
 #    this exception statement from your version. If you delete this exception
 
 from twisted.internet.task import LoopingCall
+import os
 import time
 
 import deluge
@@ -43,6 +44,8 @@
 from deluge import configmanager
 from deluge.core.rpcserver import export
 
+from timeseries import TimeSeries
+
 DEFAULT_PREFS = {
     "test": "NiNiNi",
     "update_interval": 1, #2 seconds.
@@ -63,29 +66,13 @@ def get_key(config, key):
     except KeyError:
         return None
 
-def mean(items):
-    try:
-        return sum(items)/ len(items)
-    except Exception:
-        return 0
-
 class Core(CorePluginBase):
     totals = {} #class var to catch only updating this once per session in enable.
 
     def enable(self):
         log.debug("Stats plugin enabled")
         self.core = component.get("Core")
-        self.stats ={}
-        self.count = {}
         self.intervals = [1, 5, 30, 300]
-      
-        self.last_update = {}
-        t = time.time()
-        for i in self.intervals:
-            self.stats[i] = {}
-            self.last_update[i] = t
-            self.count[i] = 0
-        
 
         self.config = configmanager.ConfigManager("stats.conf", DEFAULT_PREFS)
         self.saved_stats = configmanager.ConfigManager("stats.totals", DEFAULT_TOTALS)
@@ -94,8 +81,8 @@ def enable(self):
 
         self.length = self.config["length"]
 
-        #self.stats = get_key(self.saved_stats, "stats") or {}
-        self.stats_keys = []
+        self.stats = TimeSeries([], self.length, self.intervals,
+                                self.config["update_interval"])
         self.add_stats(
             'upload_rate',
             'download_rate',
@@ -106,6 +93,15 @@ def enable(self):
             'num_peers',
         )
 
+        # The history is kept in its own binary file, the old stats saved in
+        # stats.totals are no longer used.
+        self.stats_file = configmanager.get_config_dir("stats.dat")
+        if os.path.isfile(self.stats_file):
+            try:
+                self.stats.load(self.stats_file)
+            except Exception, e:
+                log.warning("Unable to load the stats history: %s", e)
+
         self.update_stats()
 
         self.update_timer = LoopingCall(self.update_stats)
@@ -123,76 +119,35 @@ def disable(self):
             pass
 
     def add_stats(self, *stats):
-        for stat in stats:
-            if stat not in self.stats_keys:
-                self.stats_keys.append(stat)
-            for i in self.intervals:
-                if stat not in self.stats[i]:
-                    self.stats[i][stat] = []
+        self.stats.add_keys(*stats)
 
     def update_stats(self):
         try:
-            #Get all possible stats!
+            # The session status is fetched once for all the stats
             stats = {}
-            for key in self.stats_keys:
-                #try all keys we have, very inefficient but saves having to
-                #work out where a key comes from...
-                try:
-                    stats.update(self.core.get_session_status([key]))
-                except AttributeError:
-                    pass
+            status = self.core.session.status()
+            for key in self.stats.keys:
+                value = getattr(status, key, None)
+                if value is not None:
+                    stats[key] = value
             stats["num_connections"]  = self.core.get_num_connections()
             stats.update(self.core.get_config_values(["max_download",
                                                       "max_upload",
                                                       "max_num_connections"]))
-           # status = self.core.session.status()
-           # for stat in dir(status):
-           #     if not stat.startswith('_') and stat not in stats:
-           #         stats[stat] = getattr(status, stat, None)
-
-            update_time = time.time()
-            self.last_update[1] = update_time
-
-            #extract the ones we are interested in
-            #adding them to the 1s array
-            for stat, stat_list in self.stats[1].iteritems():
-                if stat in stats:
-                    stat_list.insert(0, int(stats[stat]))
-                else:
-                    stat_list.insert(0, 0)
-                if len(stat_list) > self.length:
-                    stat_list.pop()
-                    
-            def update_interval(interval, base, multiplier):
-                self.count[interval] = self.count[interval] + 1
-                if self.count[interval] >= interval:
-                    self.last_update[interval] = update_time
-                    self.count[interval] =  0
-                    current_stats = self.stats[interval]
-                    for stat, stat_list in self.stats[base].iteritems():
-                        try:
-                            avg = mean(stat_list[0:multiplier])
-                        except ValueError:
-                            avg = 0
-                        current_stats[stat].insert(0, avg)
-                        if len(current_stats[stat]) > self.length:
-                            current_stats[stat].pop()
-
-            update_interval(5, 1, 5)
-            update_interval(30, 5, 6)
-            update_interval(300, 30, 10)
 
+            self.stats.add_sample(stats, time.time())
         except Exception, e:
             log.error("Stats update error %s" % e)
         return True
 
     def save_stats(self):
         try:
-            self.saved_stats["stats"] = self.stats
+            self.stats.save(self.stats_file)
+            self.saved_stats["stats"] = {}
             self.saved_stats.config.update(self.get_totals())
             self.saved_stats.save()
         except Exception, e:
-            log.error("Stats save error", e)
+            log.error("Stats save error %s" % e)
         return True
 
 
@@ -202,16 +157,32 @@ def get_stats(self, keys, interval):
         if interval not in self.intervals:
             return None
 
-        stats_dict = {}
-        for key in keys:
-            if key in self.stats[interval]:
-                stats_dict[key] = self.stats[interval][key]
-          
-        stats_dict["_last_update"] = self.last_update[interval]
-        stats_dict["_length"] = self.config["length"]
+        stats_dict = self.stats.get(keys, interval)
+        stats_dict["_last_update"] = self.stats.last_update[interval]
+        stats_dict["_length"] = self.length
         stats_dict["_update_interval"] = interval
         return stats_dict
 
+    @export
+    def get_stats_range(self, keys, start, end=None, max_points=None):
+        """
+        Returns the values of the stats between two times, taken from the
+        finest resolution that holds the whole range.
+
+        :param keys: the stats
+        :type keys: list
+        :param start: the time of the first value
+        :type start: float
+        :param end: the time of the last value, up to now if None
+        :type end: float
+        :param max_points: the maximum number of values of each stat
+        :type max_points: int
+        :returns: {"_start": the time of the first value, "_step": the
+            seconds between the values, key: [values, oldest first], ...}
+        :rtype: dict
+        """
+        return self.stats.query(keys, start, end, max_points)
+
     @export
     def get_totals(self):
         result = {}
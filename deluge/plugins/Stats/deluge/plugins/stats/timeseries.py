@@ -0,0 +1,348 @@
+#
+# timeseries.py
+#
+# Copyright (C) 2026 agent <agent@local>
+#
+# Deluge is free software.
+#
+# You may redistribute it and/or modify it under the terms of the
+# GNU General Public License, as published by the Free Software
+# Foundation; either version 3 of the License, or (at your option)
+# any later version.
+#
+# deluge is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with deluge.    If not, write to:
+# 	The Free Software Foundation, Inc.,
+# 	51 Franklin Street, Fifth Floor
+# 	Boston, MA  02110-1301, USA.
+#
+#    In addition, as a special exception, the copyright holders give
+#    permission to link the code of portions of this program with the OpenSSL
+#    library.
+#    You must obey the GNU General Public License in all respects for all of
+#    the code used other than OpenSSL. If you modify file(s) with this
+#    exception, you may extend this exception to your version of the file(s),
+#    but you are not obligated to do so. If you do not wish to do so, delete
+#    this exception statement from your version. If you delete this exception
+#    statement from all source files in the program, then also delete it here.
+#
+
+"""
+Fixed size storage for the history of the stats at several resolutions.
+"""
+
+import os
+import struct
+import time
+from array import array
+
+# The values are saved in network byte order
+BYTESWAP = struct.pack("=H", 1) != struct.pack("!H", 1)
+
+class RingBuffer(object):
+    """
+    Keeps the last `size` values appended, in a preallocated array so
+    appending never has to move or allocate anything.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = array("d", [0.0]) * size
+        # The index the next value is stored at
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, value):
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def newest(self, n=None):
+        """
+        Returns the newest n values, newest first.
+        """
+        if n is None or n > self.count:
+            n = self.count
+        values = self.values
+        head = self.head
+        size = self.size
+        return [values[(head - 1 - i) % size] for i in xrange(n)]
+
+    def mean(self, n):
+        """
+        Returns the mean of the newest n values.
+        """
+        values = self.newest(n)
+        if not values:
+            return 0
+        return sum(values) / len(values)
+
+    def oldest_first(self):
+        """
+        Returns all the values, oldest first.
+        """
+        if self.count < self.size:
+            return self.values[:self.count]
+        return self.values[self.head:] + self.values[:self.head]
+
+class TimeSeries(object):
+    """
+    The history of a set of stats, sampled every `update_interval` seconds.
+
+    The samples are kept at every resolution in `intervals`, each one a
+    multiple of the previous, with the values of a coarser resolution being
+    the mean of the values of the finer one.  Each resolution keeps the last
+    `length` values of every stat.
+    """
+
+    # The format of the saved file, see save()
+    MAGIC = "DSTS"
+    VERSION = 1
+
+    def __init__(self, keys, length, intervals=(1, 5, 30, 300), update_interval=1):
+        self.keys = list(keys)
+        self.length = length
+        self.intervals = list(intervals)
+        self.update_interval = update_interval
+        self.buffers = {}
+        self.count = {}
+        self.last_update = {}
+        now = time.time()
+        for interval in self.intervals:
+            self.buffers[interval] = {}
+            self.count[interval] = 0
+            self.last_update[interval] = now
+        for key in self.keys:
+            self.__add_key(key)
+
+    def __add_key(self, key):
+        for interval in self.intervals:
+            self.buffers[interval][key] = RingBuffer(self.length)
+
+    def add_keys(self, *keys):
+        for key in keys:
+            if key not in self.keys:
+                self.keys.append(key)
+                self.__add_key(key)
+
+    def add_sample(self, stats, update_time):
+        """
+        Adds a sample at the finest resolution and rolls it up in to the
+        coarser resolutions as they fill up.
+
+        :param stats: the value of every stat, missing ones are stored as 0
+        :type stats: dict
+        :param update_time: the time of the sample
+        :type update_time: float
+        """
+        base = self.intervals[0]
+        missing = int((update_time - self.last_update[base]) /
+                      (base * self.update_interval) + 0.5) - 1
+        if missing > 0:
+            # The stats were not sampled for a while, ie. the daemon was not
+            # running, so the values are not contiguous with the saved ones
+            self.__fill_gap(missing)
+
+        self.last_update[base] = update_time
+        for key, buf in self.buffers[base].iteritems():
+            buf.append(stats.get(key, 0))
+
+        # The finer resolutions are updated first so their newest values
+        # can be rolled up
+        for previous, interval in zip(self.intervals, self.intervals[1:]):
+            self.count[interval] += 1
+            if self.count[interval] < interval:
+                continue
+            self.count[interval] = 0
+            self.last_update[interval] = update_time
+            multiplier = interval / previous
+            for key, buf in self.buffers[interval].iteritems():
+                buf.append(self.buffers[previous][key].mean(multiplier))
+
+    def __fill_gap(self, missing):
+        """
+        Adds `missing` samples of 0 at every resolution, as add_sample()
+        would have, without computing each of them.
+        """
+        base = self.intervals[0]
+        step = base * self.update_interval
+        last = self.last_update[base] + missing * step
+        for interval in self.intervals:
+            if interval == base:
+                appends = missing
+            else:
+                total = self.count[interval] + missing
+                appends = total // interval
+                self.count[interval] = total % interval
+                if not appends:
+                    continue
+            for buf in self.buffers[interval].itervalues():
+                for i in xrange(min(appends, buf.size)):
+                    buf.append(0.0)
+            if interval == base:
+                self.last_update[interval] = last
+            else:
+                self.last_update[interval] = last - self.count[interval] * step
+
+    def get(self, keys, interval):
+        """
+        Returns the values of the stats at a resolution, newest first.
+
+        :rtype: dict
+        """
+        buffers = self.buffers[interval]
+        return dict((key, buffers[key].newest()) for key in keys if key in buffers)
+
+    def query(self, keys, start, end=None, max_points=None):
+        """
+        Returns the values of the stats between two times, at the finest
+        resolution that covers the start and does not return more than
+        max_points values.
+
+        :param keys: the stats
+        :type keys: list
+        :param start: the time of the first value
+        :type start: float
+        :param end: the time of the last value, the last sample if None
+        :type end: float
+        :param max_points: the maximum number of values of each stat
+        :type max_points: int
+        :returns: {"_start": time of the first value, "_step": seconds
+            between the values, key: [values, oldest first], ...}
+        :rtype: dict
+        """
+        chosen = self.intervals[-1]
+        for interval in self.intervals:
+            step = interval * self.update_interval
+            last = self.last_update[interval]
+            first = last - (self.length - 1) * step
+            if end is None:
+                points = (last - start) / step + 1
+            else:
+                points = (min(end, last) - start) / step + 1
+            if first <= start and (max_points is None or points <= max_points):
+                chosen = interval
+                break
+
+        step = chosen * self.update_interval
+        last = self.last_update[chosen]
+        buffers = self.buffers[chosen]
+        count = len(buffers[self.keys[0]]) if self.keys else 0
+        # The values are indexed newest first from the last update
+        newest = 0
+        if end is not None and end < last:
+            newest = int((last - end) / step + 0.999999)
+        oldest = min(count - 1, int((last - start) / step))
+
+        result = {
+            "_start": last - oldest * step,
+            "_step": step
+        }
+        for key in keys:
+            if key not in buffers:
+                continue
+            if oldest < newest:
+                result[key] = []
+                continue
+            values = buffers[key].newest(oldest + 1)[newest:]
+            values.reverse()
+            result[key] = values
+        return result
+
+    def save(self, filename):
+        """
+        Saves the history in a compact binary file::
+
+            header: magic, version, length, number of intervals, number of keys
+            keys: the length and name of each key
+            for each interval: the interval, count, last update, number of
+                values, then the values of each key, oldest first
+        """
+        data = [struct.pack("!4sBIHH", self.MAGIC, self.VERSION, self.length,
+                            len(self.intervals), len(self.keys))]
+        for key in self.keys:
+            data.append(struct.pack("!H", len(key)) + key)
+        for interval in self.intervals:
+            buffers = self.buffers[interval]
+            num_values = len(buffers[self.keys[0]]) if self.keys else 0
+            data.append(struct.pack("!IIdI", interval, self.count[interval],
+                                    self.last_update[interval], num_values))
+            for key in self.keys:
+                values = buffers[key].oldest_first()
+                if BYTESWAP:
+                    values.byteswap()
+                data.append(values.tostring())
+
+        tmp = filename + ".new"
+        f = open(tmp, "wb")
+        try:
+            f.write("".join(data))
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        os.rename(tmp, filename)
+
+    def load(self, filename):
+        """
+        Loads the history saved by :meth:`save`.  The keys not saved are
+        filled with 0 so all the keys of an interval have as many values, the
+        intervals not saved are left empty and the keys and intervals no
+        longer used are ignored.
+
+        :raises ValueError: if the file is not a valid stats file
+        """
+        data = open(filename, "rb").read()
+        try:
+            offset = struct.calcsize("!4sBIHH")
+            magic, version, length, num_intervals, num_keys = struct.unpack(
+                "!4sBIHH", data[:offset])
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError("Unknown stats file format")
+
+            keys = []
+            for i in xrange(num_keys):
+                key_length, = struct.unpack("!H", data[offset:offset + 2])
+                offset += 2
+                keys.append(data[offset:offset + key_length])
+                offset += key_length
+
+            value_size = array("d").itemsize
+            header_size = struct.calcsize("!IIdI")
+            for i in xrange(num_intervals):
+                interval, count, last_update, num_values = struct.unpack(
+                    "!IIdI", data[offset:offset + header_size])
+                offset += header_size
+                if interval in self.buffers:
+                    self.count[interval] = count
+                    self.last_update[interval] = last_update
+                for key in keys:
+                    size = num_values * value_size
+                    if len(data) < offset + size:
+                        raise ValueError("Truncated stats file")
+                    values = array("d")
+                    values.fromstring(data[offset:offset + size])
+                    offset += size
+                    if interval not in self.buffers or key not in self.buffers[interval]:
+                        continue
+                    if BYTESWAP:
+                        values.byteswap()
+                    buf = self.buffers[interval][key]
+                    for value in values[-buf.size:]:
+                        buf.append(value)
+                if interval in self.buffers:
+                    for key, buf in self.buffers[interval].iteritems():
+                        if key not in keys:
+                            for j in xrange(min(num_values, buf.size)):
+                                buf.append(0.0)
+        except struct.error, e:
+            raise ValueError("Invalid stats file: %s" % e)
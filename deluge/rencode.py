@@ -20,7 +20,7 @@
 """
 
 __version__ = '1.0.1'
-__all__ = ['dumps', 'loads']
+__all__ = ['dumps', 'loads', 'py_dumps', 'py_loads']
 
 # Original bencode module by Petru Paler, et al.
 #
@@ -420,12 +420,21 @@ def test():
     assert 1e-10<abs(loads(dumps(1.1,32))-1.1)<1e-6
     assert abs(loads(dumps(1.1,64))-1.1)<1e-12
     assert loads(dumps(u"Hello World!!"))
+
+# Keep the pure Python implementation available, it is the reference for the
+# compiled one and is used when the extension has not been built.
+py_dumps = dumps
+py_loads = loads
+
 try:
-    import psyco
-    psyco.bind(dumps)
-    psyco.bind(loads)
+    from deluge._rencode import dumps, loads
 except ImportError:
-    pass
+    try:
+        import psyco
+        psyco.bind(dumps)
+        psyco.bind(loads)
+    except ImportError:
+        pass
 
 
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+#
+# benchmark_rencode.py
+#
+# Copyright (C) 2026 agent <agent@local>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with deluge.    If not, write to:
+#   The Free Software Foundation, Inc.,
+#   51 Franklin Street, Fifth Floor
+#   Boston, MA  02110-1301, USA.
+#
+
+"""
+Compares the pure Python and compiled rencode implementations on payloads
+shaped like the responses to core.get_torrents_status().
+
+    python deluge/scripts/benchmark_rencode.py --torrents 2000 --files 10
+"""
+
+import random
+import time
+import zlib
+from optparse import OptionParser
+
+import deluge.rencode as rencode
+
+try:
+    import deluge._rencode as _rencode
+except ImportError:
+    _rencode = None
+
+# The keys requested by the web ui torrent grid
+WEBUI_KEYS = {
+    "queue": 0, "name": "", "total_size": 0, "state": "", "progress": 0.0,
+    "num_seeds": 0, "total_seeds": 0, "num_peers": 0, "total_peers": 0,
+    "download_payload_rate": 0, "upload_payload_rate": 0, "eta": 0,
+    "ratio": 0.0, "distributed_copies": 0.0, "is_auto_managed": False,
+    "time_added": 0.0, "tracker_host": "", "save_path": "",
+    "total_done": 0, "total_uploaded": 0, "max_download_speed": -1,
+    "max_upload_speed": -1, "seeds_peers_ratio": 0.0, "label": "",
+}
+
+STATES = ["Downloading", "Seeding", "Paused", "Queued", "Checking", "Error"]
+
+def make_status(index, num_files, num_peers):
+    status = {}
+    for key, value in WEBUI_KEYS.iteritems():
+        if isinstance(value, bool):
+            status[key] = random.random() > 0.5
+        elif isinstance(value, int):
+            status[key] = random.randint(-1, 2 ** 40)
+        elif isinstance(value, float):
+            status[key] = random.random() * 100
+        else:
+            status[key] = "%s %d" % (key, random.randint(0, 10 ** 6))
+    status["name"] = u"Torrent \xe9 %d" % index
+    status["state"] = random.choice(STATES)
+    status["files"] = tuple({
+        "index": i,
+        "path": u"Folder %d/File \xe9 %d.mkv" % (index, i),
+        "size": random.randint(0, 2 ** 34),
+        "offset": random.randint(0, 2 ** 34)
+    } for i in xrange(num_files))
+    status["file_progress"] = [random.random() for i in xrange(num_files)]
+    status["file_priorities"] = [random.randint(0, 7) for i in xrange(num_files)]
+    status["peers"] = [{
+        "client": "Deluge 1.3.%d" % i,
+        "country": "  ",
+        "down_speed": random.randint(0, 2 ** 20),
+        "ip": "10.0.%d.%d:%d" % (i // 256, i % 256, 6881 + i),
+        "progress": random.random(),
+        "seed": random.random() > 0.5,
+        "up_speed": random.randint(0, 2 ** 20)
+    } for i in xrange(num_peers)]
+    return status
+
+def make_payload(num_torrents, num_files, num_peers):
+    random.seed(0)
+    torrents = {}
+    for index in xrange(num_torrents):
+        torrent_id = "%040x" % random.getrandbits(160)
+        torrents[torrent_id] = make_status(index, num_files, num_peers)
+    # Wrap it as a RPC_RESPONSE message the same way rpcserver does
+    return (1, 1, torrents)
+
+def timeit(func, arg, repeat):
+    best = None
+    for i in xrange(repeat):
+        start = time.time()
+        func(arg)
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def run(options):
+    payload = make_payload(options.torrents, options.files, options.peers)
+    data = rencode.py_dumps(payload)
+    print "Payload: %d torrents, %d bytes encoded, %d bytes compressed" % (
+        options.torrents, len(data), len(zlib.compress(data)))
+
+    implementations = [("python", rencode.py_dumps, rencode.py_loads)]
+    if _rencode:
+        if _rencode.dumps(payload) != data:
+            print "WARNING: compiled dumps() output differs from pure Python"
+        implementations.append(("compiled", _rencode.dumps, _rencode.loads))
+    else:
+        print "The compiled rencode extension is not available"
+
+    results = {}
+    for name, dumps, loads in implementations:
+        results[name] = (timeit(dumps, payload, options.repeat),
+                         timeit(loads, data, options.repeat))
+        print "%-10s dumps: %8.2f ms  loads: %8.2f ms" % (
+            name, results[name][0] * 1000, results[name][1] * 1000)
+
+    if "compiled" in results:
+        print "Speedup    dumps: %8.1fx     loads: %8.1fx" % (
+            results["python"][0] / results["compiled"][0],
+            results["python"][1] / results["compiled"][1])
+
+if __name__ == "__main__":
+    parser = OptionParser()
+    parser.add_option("-t", "--torrents", type="int", default=1000,
+                      help="number of torrents in the payload (default: 1000)")
+    parser.add_option("-f", "--files", type="int", default=0,
+                      help="number of files per torrent (default: 0)")
+    parser.add_option("-p", "--peers", type="int", default=0,
+                      help="number of peers per torrent (default: 0)")
+    parser.add_option("-r", "--repeat", type="int", default=5,
+                      help="number of runs, the best is reported (default: 5)")
+    (options, args) = parser.parse_args()
+    run(options)
@@ -36,3 +36,28 @@ def handler(alert):
         self.am.register_handler("dummy_alert", handler)
         self.am.deregister_handler(handler)
         self.assertEquals(self.am.handlers["dummy_alert"], [])
+
+    def test_handle_alerts_coalesced(self):
+        class Handle(object):
+            def info_hash(self):
+                return "a" * 40
+
+        class state_changed_alert(object):
+            handle = Handle()
+            def message(self):
+                return "state changed"
+
+        alerts = [state_changed_alert(), state_changed_alert()]
+        self.am.session = type("Session", (object,), {
+            "pop_alerts": lambda session: [alerts.pop(0) for i in range(len(alerts))]
+        })()
+
+        handled = []
+        self.am.register_handler("state_changed_alert", handled.append)
+        self.am.handle_alerts(wait=True)
+        self.assertEquals(len(handled), 1)
+
+        stats = self.am.get_stats()
+        self.assertEquals(stats["alerts"]["state_changed_alert"],
+                          {"count": 2, "coalesced": 1})
+        self.assertEquals(stats["handlers"]["append"]["calls"], 1)
@@ -0,0 +1,41 @@
+try:
+    from hashlib import sha1 as sha
+except ImportError:
+    from sha import sha
+
+from twisted.trial import unittest
+
+from deluge import bencode
+from deluge.ui.common import TorrentInfo
+
+import common
+
+class BencodeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.filename = common.rpath("test.torrent")
+        self.data = open(self.filename, "rb").read()
+
+    def test_lazy_decode(self):
+        lazy = bencode.bdecode_lazy(self.data)
+        self.assertEquals(lazy.decode(), bencode.bdecode(self.data))
+        self.assertEquals(sorted(lazy.keys()), sorted(bencode.bdecode(self.data).keys()))
+        self.assertEquals(bencode.bdecode(lazy.raw("info")), bencode.bdecode(self.data)["info"])
+
+        data = bencode.bencode({"a": [1, "two", {"b": [3]}], "c": -4})
+        lazy = bencode.bdecode_lazy(data)
+        self.assertTrue(isinstance(lazy["a"], bencode.LazyList))
+        self.assertEquals(len(lazy["a"]), 3)
+        self.assertEquals(lazy["a"][1], "two")
+        self.assertEquals(list(lazy["a"]), [1, "two", {"b": [3]}])
+        self.assertEquals(lazy["c"], -4)
+        self.assertEquals(lazy.get("d", 5), 5)
+        self.assertEquals(lazy.raw("a"), bencode.bencode([1, "two", {"b": [3]}]))
+
+    def test_lazy_invalid(self):
+        for data in ("", "d1:ai1e", "l5:abce", "di1ei2ee", "x"):
+            self.assertRaises(Exception, bencode.bdecode_lazy, data)
+
+    def test_info_hash(self):
+        info_hash = sha(bencode.bencode(bencode.bdecode(self.data)["info"])).hexdigest()
+        self.assertEquals(TorrentInfo(self.filename).info_hash, info_hash)
+        self.assertEquals(TorrentInfo(self.filename).metadata, bencode.bdecode(self.data))
@@ -0,0 +1,71 @@
+import imp
+import os
+
+from twisted.trial import unittest
+
+import deluge
+
+common = imp.load_source("blocklist_common", os.path.join(
+    os.path.dirname(deluge.__file__), "plugins", "Blocklist", "deluge",
+    "plugins", "blocklist", "common.py"))
+
+class BlocklistCommonTestCase(unittest.TestCase):
+    def setUp(self):
+        self.filename = self.mktemp()
+
+    def test_ip_to_int(self):
+        self.assertEquals(common.ip_to_int("0.0.0.0"), 0)
+        self.assertEquals(common.ip_to_int("1.2.3.4"), 0x01020304)
+        self.assertEquals(common.ip_to_int("001.002.003.004"), 0x01020304)
+        self.assertEquals(common.ip_to_int("255.255.255.255"), 0xffffffff)
+        self.assertEquals(common.int_to_ip(0x01020304), "1.2.3.4")
+
+        for ip in ("256.0.0.1", "1.2.3.300", "-1.0.0.0", "1.2.3", "1.2.3.4.5",
+                   "a.b.c.d", ""):
+            self.assertRaises(ValueError, common.ip_to_int, ip)
+
+    def test_merge_ranges(self):
+        # Overlapping, adjacent and contained ranges are merged
+        self.assertEquals(common.merge_ranges([(10, 20), (15, 30)]), [(10, 30)])
+        self.assertEquals(common.merge_ranges([(21, 30), (10, 20)]), [(10, 30)])
+        self.assertEquals(common.merge_ranges([(10, 50), (20, 30)]), [(10, 50)])
+        self.assertEquals(common.merge_ranges([(10, 20), (10, 20)]), [(10, 20)])
+        # Ranges with a gap are kept apart
+        self.assertEquals(common.merge_ranges([(22, 30), (10, 20)]),
+                          [(10, 20), (22, 30)])
+        # Single ips and the ends of the address space
+        self.assertEquals(common.merge_ranges([(5, 5), (6, 6), (0, 4)]), [(0, 6)])
+        self.assertEquals(common.merge_ranges([(0, 0xffffffff), (7, 8)]),
+                          [(0, 0xffffffff)])
+        # Reversed ranges are dropped
+        self.assertEquals(common.merge_ranges([(20, 10)]), [])
+        self.assertEquals(common.merge_ranges([]), [])
+
+    def test_save_load_ranges(self):
+        digest = "a" * 20
+        ranges = [(0, 1), (0x01020304, 0x010203ff), (0xfffffff0, 0xffffffff)]
+        common.save_ranges(self.filename, digest, ranges)
+        self.assertEquals(common.load_ranges(self.filename, digest), ranges)
+
+        # The ranges of another blocklist are not used
+        self.assertEquals(common.load_ranges(self.filename, "b" * 20), None)
+
+        common.save_ranges(self.filename, digest, [])
+        self.assertEquals(common.load_ranges(self.filename, digest), [])
+
+    def test_load_truncated_ranges(self):
+        digest = "a" * 20
+        common.save_ranges(self.filename, digest, [(1, 2), (4, 5)])
+        data = open(self.filename, "rb").read()
+        for size in (0, common.RANGES_HEADER_SIZE - 1, common.RANGES_HEADER_SIZE,
+                     len(data) - 1):
+            open(self.filename, "wb").write(data[:size])
+            self.assertEquals(common.load_ranges(self.filename, digest), None)
+
+        open(self.filename, "wb").write("x" * len(data))
+        self.assertEquals(common.load_ranges(self.filename, digest), None)
+
+    def test_file_digest(self):
+        open(self.filename, "wb").write("blocklist")
+        from hashlib import sha1
+        self.assertEquals(common.file_digest(self.filename), sha1("blocklist").digest())
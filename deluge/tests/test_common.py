@@ -43,6 +43,12 @@ def test_is_ip(self):
         self.failUnless(is_ip("127.0.0.1"))
         self.failIf(is_ip("127..0.0"))
 
+    def test_pieces_runs(self):
+        pieces = [3, 3, 3, 0, 2, 2, 1, 3]
+        self.failUnless(encode_pieces_runs(pieces) == [3, 3, 0, 1, 2, 2, 1, 1, 3, 1])
+        self.failUnless(decode_pieces_runs(encode_pieces_runs(pieces)) == pieces)
+        self.failUnless(encode_pieces_runs([]) == [])
+
     def test_VersionSplit(self):
         self.failUnless(VersionSplit("1.2.2") == VersionSplit("1.2.2"))
         self.failUnless(VersionSplit("1.2.1") < VersionSplit("1.2.2"))
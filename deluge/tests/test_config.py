@@ -91,6 +91,70 @@ def test_save(self):
         self.assertEquals(config["string"], "baz")
         self.assertEquals(config["int"], 2)
 
+    def test_save_changes(self):
+        import deluge.config
+        config = Config("test.conf", defaults={"labels": {}}, config_dir=self.config_dir)
+        self.assertTrue(config.save())
+
+        written = []
+        write = deluge.config.writer.write
+        def record_write(filename, data, errback=None):
+            written.append(filename)
+            return write(filename, data, errback)
+        self.patch(deluge.config.writer, "write", record_write)
+
+        # Nothing has changed so nothing should be written
+        self.assertTrue(config.save())
+        config = Config("test.conf", defaults={"labels": {}}, config_dir=self.config_dir)
+        self.assertTrue(config.save())
+        self.assertEquals(written, [])
+
+        # A value changed in place is found too
+        config["labels"]["linux"] = {"max_connections": 20}
+        self.assertTrue(config.save())
+        self.assertEquals(written, [config.config_file])
+
+        config = Config("test.conf", config_dir=self.config_dir)
+        self.assertEquals(config["labels"], {"linux": {"max_connections": 20}})
+
+    def test_writer(self):
+        from deluge.config import ConfigWriter
+        filename = os.path.join(self.config_dir, "writer.conf")
+        writer = ConfigWriter()
+        for i in xrange(20):
+            writer.write(filename, str(i))
+        writer.flush()
+        self.assertFalse(writer.is_pending())
+        self.assertEquals(open(filename, "rb").read(), "19")
+
+    def test_save_unchanged(self):
+        config = Config("test.conf", defaults=DEFAULTS, config_dir=self.config_dir)
+        self.assertTrue(config.save(sync=True))
+
+        # Without nested containers an unchanged config is not serialized
+        serialized = []
+        self.patch(config, "_Config__serialize", lambda: serialized.append(True))
+        self.assertTrue(config.save())
+        self.assertEquals(serialized, [])
+
+    def test_writer_error(self):
+        import deluge.config
+        def fsync(fd):
+            raise OSError(5, "Input/output error")
+        self.patch(deluge.config.os, "fsync", fsync)
+
+        config = Config("test.conf", defaults=DEFAULTS, config_dir=self.config_dir)
+        self.assertFalse(config.save(sync=True))
+        other = Config("other.conf", defaults=DEFAULTS, config_dir=self.config_dir)
+        other.save()
+        deluge.config.writer.flush()
+        self.assertTrue(deluge.config.writer.thread.isAlive())
+
+        # The failed save is retried once the disk works again
+        self.patch(deluge.config.os, "fsync", lambda fd: None)
+        self.assertTrue(config.save(sync=True))
+        self.assertTrue(os.path.exists(config.config_file))
+
     def test_save_timer(self):
         config = Config("test.conf", defaults=DEFAULTS, config_dir=self.config_dir)
         config["string"] = "baz"
@@ -160,6 +160,20 @@ def test_remove_torrent(self):
         self.assertTrue(ret)
         self.assertEquals(len(self.core.get_session_state()), 0)
 
+    def test_get_torrent_status(self):
+        options = {}
+        filename = os.path.join(os.path.dirname(__file__), "test.torrent")
+        import base64
+        torrent_id = self.core.add_torrent_file(filename, base64.encodestring(open(filename).read()), options)
+
+        status = self.core.get_torrent_status(torrent_id, ["name", "state"])
+        self.assertEquals(sorted(status.keys()), ["name", "state"])
+
+        status = self.core.get_torrent_status(torrent_id, [])
+        self.assertEquals(status["hash"], torrent_id)
+        self.assertTrue("progress" in status)
+        self.assertTrue("total_size" in status)
+
     def test_get_session_status(self):
         status = self.core.get_session_status(["upload_rate", "download_rate"])
         self.assertEquals(type(status), dict)
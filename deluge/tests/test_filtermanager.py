@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from twisted.trial import unittest
+
+import deluge.component as component
+from deluge.core.filtermanager import FilterManager, TextIndex
+
+class EventManager(component.Component):
+    def __init__(self):
+        component.Component.__init__(self, "EventManager")
+
+    def register_event_handler(self, event, handler):
+        pass
+
+class AlertManager(component.Component):
+    def __init__(self):
+        component.Component.__init__(self, "AlertManager")
+
+    def register_handler(self, alert, handler):
+        pass
+
+class Torrent(object):
+    def __init__(self, name, state="Downloading", owner="", files=(),
+                 tracker_host="", tracker_status=""):
+        self.name = name
+        self.filename = name + ".torrent"
+        self.state = state
+        self.owner = owner
+        self.files = [{"path": path} for path in files]
+        self.tracker_host = tracker_host
+        self.tracker_status = tracker_status
+        self.trackers = []
+        self.files_read = 0
+
+    def get_name(self):
+        return self.name
+
+    def get_files(self):
+        self.files_read += 1
+        return self.files
+
+    def get_tracker_host(self):
+        return self.tracker_host
+
+class TorrentManager(dict):
+    def get_torrent_list(self):
+        return self.keys()
+
+class Core(object):
+    def __init__(self):
+        self.torrentmanager = TorrentManager()
+
+    def get_torrent_status(self, torrent_id, keys):
+        # The indexed fields must not be read from the status
+        raise AssertionError("Status of %s read for %s" % (torrent_id, keys))
+
+class TextIndexTestCase(unittest.TestCase):
+    def test_search(self):
+        index = TextIndex()
+        index.add("a", ["Ubuntu 11.04 Desktop", "ubuntu.iso"])
+        index.add("b", [u"Caf\xe9 Music", "music/01.mp3"])
+        index.add("c", ["ub"])
+
+        self.assertEquals(index.search("ubuntu"), set(["a"]))
+        self.assertEquals(index.search("music/0"), set(["b"]))
+        self.assertEquals(index.search(u"caf\xe9"), set(["b"]))
+        self.assertEquals(index.search("caf\xc3\xa9"), set(["b"]))
+        # Every trigram has to be in the text in order
+        self.assertEquals(index.search("desktop ubuntu"), set())
+        self.assertEquals(index.search("missing"), set())
+        # Keywords shorter than a trigram are searched in every text
+        self.assertEquals(index.search("ub"), set(["a", "c"]))
+        self.assertEquals(index.search(""), set(["a", "b", "c"]))
+
+    def test_replace_remove(self):
+        index = TextIndex()
+        index.add("a", ["ubuntu"])
+        index.add("a", ["debian"])
+        self.assertEquals(index.search("ubuntu"), set())
+        self.assertEquals(index.search("debian"), set(["a"]))
+
+        index.remove("a")
+        index.remove("unknown")
+        self.assertEquals(index.search("debian"), set())
+        self.assertEquals(index.trigrams, {})
+        self.assertEquals(index.texts, {})
+
+class FilterManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        EventManager()
+        AlertManager()
+        self.core = Core()
+        self.fm = FilterManager(self.core)
+        self.torrents = self.core.torrentmanager
+
+        self.add("a", Torrent("Ubuntu", owner="alice", files=["ubuntu/disk.iso"],
+                              tracker_host="ubuntu.com"))
+        self.add("b", Torrent("Debian", state="Seeding", owner="bob",
+                              files=["debian/netinst.iso"], tracker_host="debian.org",
+                              tracker_status="Error: timed out"))
+        self.add("c", Torrent("Music", state="Paused", owner="alice",
+                              files=["music/ubuntu theme.ogg"]))
+
+    def tearDown(self):
+        component._ComponentRegistry.components = {}
+
+    def add(self, torrent_id, torrent):
+        self.torrents[torrent_id] = torrent
+        self.fm.on_torrent_added(torrent_id, False)
+
+    def filter(self, filter_dict):
+        return sorted(self.fm.filter_torrent_ids(filter_dict))
+
+    def test_indexed_filters(self):
+        self.assertEquals(self.filter({"state": ["Seeding"]}), ["b"])
+        self.assertEquals(self.filter({"state": ["Seeding", "Paused"]}), ["b", "c"])
+        self.assertEquals(self.filter({"owner": "alice"}), ["a", "c"])
+        self.assertEquals(self.filter({"owner": "alice", "state": "Paused"}), ["c"])
+        self.assertEquals(self.filter({"tracker_host": "debian.org"}), ["b"])
+        self.assertEquals(self.filter({"tracker_host": "Error"}), ["b"])
+        self.assertEquals(self.filter({"id": ["a", "b"], "owner": "alice"}), ["a"])
+
+        self.fm.update_index("a", "state", "Paused")
+        self.assertEquals(self.filter({"state": "Paused"}), ["a", "c"])
+        self.assertEquals(self.fm.index["state"].get("Downloading"), None)
+
+        self.fm.on_torrent_removed("c")
+        del self.torrents["c"]
+        self.assertEquals(self.filter({"state": "Paused"}), ["a"])
+        self.assertEquals(self.fm.torrent_index.keys(), ["a", "b"])
+
+    def test_filter_tree(self):
+        tree = self.fm.get_filter_tree(hide_cat=["state"])
+        self.assertEquals(dict(tree["owner"]), {"": 0, "alice": 2, "bob": 1})
+        self.assertEquals(dict(tree["tracker_host"]),
+                          {"All": 3, "Error": 1, "": 1, "debian.org": 1,
+                           "ubuntu.com": 1})
+
+    def test_search_keyword(self):
+        # Nothing is indexed yet, the torrents are searched one by one
+        self.assertEquals(self.filter({"keyword": ["ubuntu"]}), ["a", "c"])
+        self.assertEquals(self.fm.files_index.texts, {})
+
+        self.fm.update()
+        self.assertFalse(self.fm.search_dirty)
+        self.assertEquals(self.filter({"keyword": ["ubuntu"]}), ["a", "c"])
+        self.assertEquals(self.filter({"keyword": ["iso,ubuntu"]}), ["a"])
+        self.assertEquals(self.filter({"keyword": ["seeding"]}), ["b"])
+        self.assertEquals(self.filter({"keyword": ["timed out"]}), ["b"])
+
+        # The index is not used for a torrent that changed until it has been
+        # indexed again
+        self.torrents["c"].files = [{"path": "music/debian theme.ogg"}]
+        self.fm.on_torrent_folder_renamed("c", "music/", "music/")
+        self.assertEquals(self.filter({"keyword": ["ubuntu"]}), ["a"])
+        self.assertEquals(self.filter({"keyword": ["debian"]}), ["b", "c"])
+
+    def test_search_limited(self):
+        for i in xrange(250):
+            self.add("t%d" % i, Torrent("Torrent %d" % i))
+        self.fm.update()
+        # Only a batch is indexed on each update, not every torrent at once
+        self.assertEquals(len(self.fm.search_dirty), 253 - 100)
+        self.assertEquals(self.filter({"keyword": ["torrent 249"]}), ["t249"])
+        self.assertEquals(len(self.fm.search_dirty), 253 - 100)
+
+    def test_search_name(self):
+        self.assertEquals(self.filter({"name": ["ubu"]}), ["a"])
+        self.fm.update()
+        self.assertEquals(self.filter({"name": ["ubuntu"]}), ["a"])
+        self.assertEquals(self.filter({"name": ["UBUNTU"]}), ["a"])
+        self.assertEquals(self.filter({"name": ["UBUNTU::match"]}), [])
+        self.assertEquals(self.filter({"name": ["Ubuntu::match"]}), ["a"])
@@ -0,0 +1,129 @@
+from twisted.internet import task
+from twisted.trial import unittest
+
+from deluge.ui.web import json_api
+
+class FakeClient(object):
+    def __init__(self):
+        self.handlers = {}
+
+    def register_event_handler(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def deregister_event_handler(self, event, handler):
+        self.handlers[event].remove(handler)
+
+    def emit(self, event, *args):
+        for handler in self.handlers.get(event, []):
+            handler(*args)
+
+class EventQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = task.Clock()
+        self.client = FakeClient()
+        self.patch(json_api, "reactor", self.clock)
+        self.patch(json_api, "client", self.client)
+        self.queue = json_api.EventQueue()
+        self.queue.add_listener("a", "TorrentAddedEvent")
+
+    def test_queued_events(self):
+        self.client.emit("TorrentAddedEvent", "1")
+        self.assertEquals(self.queue.get_events("a"), [("TorrentAddedEvent", ("1",))])
+
+    def test_waiting_listener(self):
+        d = self.queue.get_events("a")
+        result = []
+        d.addCallback(result.append)
+        self.client.emit("TorrentAddedEvent", "1")
+        self.client.emit("TorrentAddedEvent", "2")
+        self.assertEquals(result, [])
+        self.clock.advance(0)
+        self.assertEquals(result, [[("TorrentAddedEvent", ("1",)),
+                                    ("TorrentAddedEvent", ("2",))]])
+        self.assertEquals(self.clock.getDelayedCalls(), [])
+
+    def test_timeout(self):
+        result = []
+        self.queue.get_events("a").addCallback(result.append)
+        self.clock.advance(self.queue.timeout)
+        self.assertEquals(result, [None])
+
+    def test_superseded_request(self):
+        result = []
+        self.queue.get_events("a").addCallback(result.append)
+        d = self.queue.get_events("a")
+        self.assertEquals(result, [None])
+        self.client.emit("TorrentAddedEvent", "1")
+        self.clock.advance(0)
+        self.assertEquals(d.result, [("TorrentAddedEvent", ("1",))])
+
+    def test_max_queued(self):
+        for i in xrange(self.queue.max_queued + 10):
+            self.client.emit("TorrentAddedEvent", i)
+        events = self.queue.get_events("a")
+        self.assertEquals(len(events), self.queue.max_queued)
+        self.assertEquals(events[-1], ("TorrentAddedEvent", (self.queue.max_queued + 9,)))
+
+class FakeSessionProxy(object):
+    def __init__(self):
+        self.cache_times = {}
+
+class FakeWebApi(object):
+    _make_ui_delta = json_api.WebApi._make_ui_delta.im_func
+
+    def __init__(self):
+        self.ui_states = {}
+        self.sessionproxy = FakeSessionProxy()
+
+class UpdateUiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.web = FakeWebApi()
+        self.keys = ["name", "progress"]
+
+    def update(self, revision, torrents, now, filters=None, state_id="page"):
+        for torrent_id in torrents:
+            times = self.web.sessionproxy.cache_times.setdefault(torrent_id, {})
+            for key in torrents[torrent_id]:
+                times.setdefault(key, now)
+        ui_info = {"torrents": torrents, "filters": filters or {"state": []}}
+        self.web._make_ui_delta(state_id, revision, now, self.keys, {}, ui_info)
+        return ui_info
+
+    def test_delta(self):
+        ui_info = self.update(0, {"a": {"name": "a", "progress": 0.0},
+                                  "b": {"name": "b", "progress": 0.0}}, 10)
+        self.assertFalse(ui_info["delta"])
+        self.assertEquals(len(ui_info["torrents"]), 2)
+
+        self.web.sessionproxy.cache_times["a"]["progress"] = 11
+        ui_info = self.update(ui_info["revision"],
+                              {"a": {"name": "a", "progress": 5.0},
+                               "c": {"name": "c", "progress": 0.0}}, 12)
+        self.assertTrue(ui_info["delta"])
+        self.assertEquals(ui_info["torrents"], {"a": {"progress": 5.0},
+                                                "c": {"name": "c", "progress": 0.0}})
+        self.assertEquals(ui_info["removed"], ["b"])
+        self.assertEquals(ui_info["filters"], None)
+
+        # An unknown revision gets everything again
+        ui_info = self.update(0, {"a": {"name": "a", "progress": 5.0}}, 13)
+        self.assertFalse(ui_info["delta"])
+        self.assertEquals(ui_info["torrents"], {"a": {"name": "a", "progress": 5.0}})
+
+    def test_pages(self):
+        torrents = {"a": {"name": "a", "progress": 0.0}}
+        page1 = self.update(0, torrents, 10, state_id="page1")
+        page2 = self.update(0, torrents, 10, state_id="page2")
+
+        # Each page gets the changes since its own revision
+        page1 = self.update(page1["revision"], torrents, 11, state_id="page1")
+        page2 = self.update(page2["revision"], torrents, 11, state_id="page2")
+        self.assertTrue(page1["delta"])
+        self.assertTrue(page2["delta"])
+
+    def test_unchanged_keys_skipped(self):
+        self.web.sessionproxy.cache_times["a"] = {"name": 9, "progress": 9}
+        ui_info = self.update(0, {"a": {"name": "a", "progress": 0.0}}, 10)
+        # Not stored again since the last revision, so it is not compared
+        ui_info = self.update(ui_info["revision"], {"a": {"name": "a", "progress": 1.0}}, 12)
+        self.assertEquals(ui_info["torrents"], {})
@@ -70,3 +70,43 @@ def test_save_multifile_padded(self):
         os.remove(os.path.join(tmp_path, "file_C"))
         os.rmdir(tmp_path)
         os.remove(tmp_file)
+
+    def test_hash_pieces(self):
+        from hashlib import sha1
+        tmp_path = tempfile.mkdtemp()
+        files = []
+        for name, size in (("file_A", 312 * 1024), ("file_B", 2354 * 1024 + 7),
+                           ("file_C", 11 * 1024)):
+            path = os.path.join(tmp_path, name)
+            open(path, "wb").write(os.urandom(size))
+            files.append((path, size))
+        files.insert(1, (None, 1000))
+
+        data = "".join([open(path, "rb").read() if path else "\0" * size
+                        for path, size in files])
+        piece_size = 64 * 1024
+        expected = "".join([sha1(data[i:i + piece_size]).digest()
+                            for i in xrange(0, len(data), piece_size)])
+
+        # Use blocks smaller than the data to hash it in several batches
+        read_block_size = maketorrent.READ_BLOCK_SIZE
+        maketorrent.READ_BLOCK_SIZE = 3 * piece_size
+        try:
+            progress = []
+            pieces = maketorrent.hash_pieces(
+                files, piece_size, lambda *args: progress.append(args), num_threads=2)
+        finally:
+            maketorrent.READ_BLOCK_SIZE = read_block_size
+        self.assertEquals(pieces, expected)
+        self.assertEquals(progress[-1], (len(expected) / 20, len(expected) / 20))
+
+        import threading
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertRaises(maketorrent.HashingCancelled, maketorrent.hash_pieces,
+                          files, piece_size, cancel_event=cancel_event)
+
+        for path, size in files:
+            if path:
+                os.remove(path)
+        os.rmdir(tmp_path)
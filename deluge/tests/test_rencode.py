@@ -0,0 +1,46 @@
+from twisted.trial import unittest
+
+import deluge.rencode as rencode
+
+try:
+    import deluge._rencode as _rencode
+except ImportError:
+    _rencode = None
+
+class RencodeTestCase(unittest.TestCase):
+    def test_pure_python(self):
+        self.assertEquals(rencode.py_loads(rencode.py_dumps(u"Hello World!!")), "Hello World!!")
+        self.assertEquals(rencode.py_loads(rencode.py_dumps({"a": (1, 2.5, None)})), {"a": (1, 2.5, None)})
+
+    def test_roundtrip(self):
+        rencode.test()
+
+    def test_compiled_wire_format(self):
+        if not _rencode:
+            raise unittest.SkipTest("The rencode extension is not built")
+
+        values = [
+            0, 43, 44, -1, -32, -33, 127, -128, 32767, -32768, 2 ** 31, -2 ** 31 - 1,
+            2 ** 63 - 1, -2 ** 63, 2 ** 64, -10 ** 20, "", "a" * 63, "a" * 64,
+            u"\xe9t\xe9", 1.5, -0.25, True, False, None, (), tuple(range(100)),
+            {}, dict(zip(range(30), range(30))),
+            {"torrent_id": {"name": u"\u2603", "files": ({"path": "a", "size": 2 ** 40},),
+                            "progress": 99.5, "peers": []}}
+        ]
+        for value in values:
+            self.assertEquals(_rencode.dumps(value), rencode.py_dumps(value))
+            self.assertEquals(_rencode.dumps(value, 64), rencode.py_dumps(value, 64))
+            data = rencode.py_dumps(value)
+            self.assertEquals(_rencode.loads(data), rencode.py_loads(data))
+            self.assertEquals(type(_rencode.loads(data)), type(rencode.py_loads(data)))
+
+    def test_compiled_invalid(self):
+        if not _rencode:
+            raise unittest.SkipTest("The rencode extension is not built")
+
+        for data in ("", ";", "=12", "=012\x7f", "=-0\x7f", "05:abcde", "5:abc",
+                     ">", "\x00\x00", "\x7f"):
+            self.assertRaises(ValueError, _rencode.loads, data)
+        self.assertRaises(ValueError, _rencode.dumps, 1, 16)
+        self.assertRaises(ValueError, _rencode.dumps, 10 ** 70)
+        self.assertRaises(KeyError, _rencode.dumps, set())
@@ -15,6 +15,14 @@ def reset(self):
         self.torrents["b"] = {"key1": 1, "key2": 2, "key3": 3}
         self.torrents["c"] = {"key1": 1, "key2": 2, "key3": 3}
         self.prev_status = {}
+        self.subscriptions = []
+
+    def subscribe_torrents_status(self, filter_dict, keys, interval=1):
+        self.subscriptions.append(sorted(keys))
+        return succeed(len(self.subscriptions) - 1)
+
+    def unsubscribe_torrents_status(self, subscription_id):
+        return succeed(True)
 
     def get_torrent_status(self, torrent_id, keys, diff=False):
         if not keys:
@@ -126,3 +134,42 @@ def test_get_torrents_status_key_not_updated(self):
         d = self.sp.get_torrents_status({"id": ["a"]}, ["key2"])
         d.addCallback(self.assertEquals, {"a": {"key2": 99}})
         return d
+
+    def test_get_torrents_status_subscribed(self):
+        self.sp.get_torrents_status({}, ["key1"])
+        self.sp.get_torrents_status({}, ["key2"])
+        self.assertEquals(client.core.subscriptions, [["key1"], ["key1", "key2"]])
+
+        # A subscription is used once it has sent its first update
+        self.sp.on_torrents_status_update(0, {"a": {"key1": 5}}, [])
+        self.assertEquals(self.sp.subscribed_keys, set(["key1"]))
+        self.sp.on_torrents_status_update(1, {"a": {"key1": 5}, "d": {"key1": 1}}, [])
+        self.assertEquals(self.sp.subscription_id, 1)
+        self.assertEquals(self.sp.subscribed_keys, set(["key1", "key2"]))
+        self.assertEquals(self.sp.torrents["d"][1], {"key1": 1})
+
+        # The pushed keys are not fetched again while updates arrive
+        client.core.torrents["a"]["key1"] = 99
+        time.sleep(self.sp.cache_time + 0.1)
+        self.sp.on_torrents_status_update(1, {}, [])
+        d = self.sp.get_torrents_status({"id": ["a"]}, ["key1"])
+        d.addCallback(self.assertEquals, {"a": {"key1": 5}})
+        return d
+
+    def test_get_torrents_status_id_not_subscribed(self):
+        # Only the torrents asked for are polled, not pushed for all of them
+        self.sp.get_torrents_status({"id": ["a"]}, ["key1"])
+        self.assertEquals(client.core.subscriptions, [])
+
+    def test_get_torrents_status_subscription_stopped(self):
+        self.sp.get_torrents_status({}, ["key1"])
+        self.sp.on_torrents_status_update(0, {"a": {"key1": 5}}, [])
+        self.assertTrue(self.sp.is_subscribed("a", ["key1"]))
+
+        # Without updates the pushed keys expire like the others
+        client.core.torrents["a"]["key1"] = 99
+        time.sleep(self.sp.cache_time + 0.1)
+        self.assertFalse(self.sp.is_subscribed("a", ["key1"]))
+        d = self.sp.get_torrents_status({"id": ["a"]}, ["key1"])
+        d.addCallback(self.assertEquals, {"a": {"key1": 99}})
+        return d
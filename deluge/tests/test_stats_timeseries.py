@@ -0,0 +1,137 @@
+import imp
+import os
+
+from twisted.trial import unittest
+
+import deluge
+
+timeseries = imp.load_source("stats_timeseries", os.path.join(
+    os.path.dirname(deluge.__file__), "plugins", "Stats", "deluge",
+    "plugins", "stats", "timeseries.py"))
+TimeSeries = timeseries.TimeSeries
+
+class TimeSeriesTestCase(unittest.TestCase):
+    def make_series(self, keys=("a", "b"), length=10, samples=0, start=1000):
+        series = TimeSeries(keys, length, (1, 5, 30))
+        series.last_update = dict.fromkeys(series.intervals, start)
+        for i in xrange(1, samples + 1):
+            series.add_sample({"a": i, "b": 2 * i}, start + i)
+        return series
+
+    def test_ring_buffer(self):
+        buf = timeseries.RingBuffer(3)
+        self.assertEquals(buf.newest(), [])
+        self.assertEquals(buf.mean(2), 0)
+        for value in (1, 2, 3, 4):
+            buf.append(value)
+        self.assertEquals(len(buf), 3)
+        self.assertEquals(buf.newest(), [4, 3, 2])
+        self.assertEquals(buf.mean(2), 3.5)
+        self.assertEquals(list(buf.oldest_first()), [2, 3, 4])
+
+    def test_rollup(self):
+        series = self.make_series(samples=30)
+        self.assertEquals(series.get(["a"], 1)["a"], range(30, 20, -1))
+        # The mean of every 5 samples, then of every 6 of those
+        self.assertEquals(series.get(["a"], 5)["a"], [28, 23, 18, 13, 8, 3])
+        self.assertEquals(series.get(["b"], 5)["b"], [56, 46, 36, 26, 16, 6])
+        self.assertEquals(series.get(["a"], 30)["a"], [15.5])
+        self.assertEquals(series.last_update, {1: 1030, 5: 1030, 30: 1030})
+
+        series.add_sample({"a": 31}, 1031)
+        # Missing stats are stored as 0
+        self.assertEquals(series.get(["a", "b"], 1)["b"][0], 0)
+        self.assertEquals(series.count, {1: 0, 5: 1, 30: 1})
+
+    def test_query(self):
+        series = self.make_series(samples=30)
+        result = series.query(["a"], 1025)
+        self.assertEquals(result, {"_start": 1025, "_step": 1, "a": range(25, 31)})
+        result = series.query(["a"], 1022, 1024)
+        self.assertEquals(result, {"_start": 1022, "_step": 1, "a": [22, 23, 24]})
+
+        # A start older than the finest resolution uses a coarser one
+        result = series.query(["a"], 1005)
+        self.assertEquals(result["_step"], 5)
+        self.assertEquals(result["a"], [3, 8, 13, 18, 23, 28])
+
+        # Too many points for max_points
+        result = series.query(["a"], 1025, max_points=3)
+        self.assertEquals(result["_step"], 5)
+
+        # Start and end outside of the buffer are clipped to it
+        result = series.query(["a"], 0, 5000)
+        self.assertEquals(result, {"_start": 1030, "_step": 30, "a": [15.5]})
+        result = series.query(["a", "unknown"], 1021, 2000)
+        self.assertEquals(result["a"], range(21, 31))
+        self.assertFalse("unknown" in result)
+
+        # End before start, or before the oldest value
+        self.assertEquals(series.query(["a"], 1028, 1026)["a"], [])
+
+    def test_query_empty(self):
+        series = self.make_series()
+        self.assertEquals(series.query(["a"], 900)["a"], [])
+        self.assertEquals(series.query(["a"], 900, 1000)["a"], [])
+        series = self.make_series(keys=())
+        self.assertEquals(series.query(["a"], 900), {"_start": 1030, "_step": 30})
+
+    def test_save_load(self):
+        filename = self.mktemp()
+        series = self.make_series(samples=42)
+        series.save(filename)
+
+        loaded = self.make_series(keys=("a", "b"))
+        loaded.load(filename)
+        for interval in series.intervals:
+            self.assertEquals(loaded.get(["a", "b"], interval),
+                              series.get(["a", "b"], interval))
+        self.assertEquals(loaded.count, series.count)
+        self.assertEquals(loaded.last_update, series.last_update)
+
+        # Keys no longer used are ignored, new ones are filled with 0, and
+        # only the newest values fit in a shorter history
+        loaded = self.make_series(keys=("b", "c"), length=4)
+        loaded.load(filename)
+        self.assertEquals(loaded.get(["b", "c"], 1), {"b": [84, 82, 80, 78],
+                                                      "c": [0, 0, 0, 0]})
+        self.assertEquals(loaded.get(["c"], 5), {"c": [0, 0, 0, 0]})
+        self.assertEquals(loaded.query(["b", "c"], 1041)["c"], [0, 0])
+
+        # A longer history keeps all of the saved values
+        loaded = self.make_series(length=50)
+        loaded.load(filename)
+        self.assertEquals(len(loaded.get(["a"], 1)["a"]), 10)
+
+    def test_load_invalid(self):
+        filename = self.mktemp()
+        self.make_series(samples=12).save(filename)
+        data = open(filename, "rb").read()
+
+        open(filename, "wb").write("XXXX" + data[4:])
+        self.assertRaises(ValueError, self.make_series().load, filename)
+        open(filename, "wb").write(data[:-1])
+        self.assertRaises(ValueError, self.make_series().load, filename)
+        open(filename, "wb").write(data[:5])
+        self.assertRaises(ValueError, self.make_series().load, filename)
+
+    def test_gap(self):
+        filename = self.mktemp()
+        self.make_series(samples=30).save(filename)
+        series = self.make_series()
+        series.load(filename)
+
+        # Sampling resumes 12 seconds after the last sample
+        series.add_sample({"a": 100, "b": 100}, 1042)
+        self.assertEquals(series.get(["a"], 1)["a"],
+                          [100] + [0] * 9)
+        self.assertEquals(series.get(["a"], 5)["a"][:3], [0, 0, 28])
+        self.assertEquals(series.last_update, {1: 1042, 5: 1040, 30: 1030})
+        self.assertEquals(series.count, {1: 0, 5: 2, 30: 12})
+        result = series.query(["a"], 1040)
+        self.assertEquals(result, {"_start": 1040, "_step": 1, "a": [0, 0, 100]})
+
+        # A gap longer than the whole history
+        series.add_sample({"a": 1}, 100000)
+        self.assertEquals(series.get(["a"], 30)["a"][1:], [0] * 9)
+        self.assertEquals(series.get(["a"], 1)["a"], [1] + [0] * 9)
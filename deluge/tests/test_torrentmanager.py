@@ -0,0 +1,128 @@
+import base64
+import cPickle
+import os
+
+from twisted.trial import unittest
+
+import common
+
+from deluge.core.core import Core
+from deluge.configmanager import get_config_dir
+import deluge.component as component
+
+class CountingHandle(object):
+    """Counts the torrent_status fetched from a torrent_handle"""
+    def __init__(self, handle):
+        self.handle = handle
+        self.status_calls = 0
+
+    def status(self, *args):
+        self.status_calls += 1
+        return self.handle.status(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.handle, name)
+
+class FakeStatus(object):
+    def __init__(self, handle, **kwargs):
+        self.handle = handle
+        self.__dict__.update(kwargs)
+
+class FakeStateUpdateAlert(object):
+    def __init__(self, status):
+        self.status = status
+
+class FakeSession(object):
+    def __init__(self):
+        self.posted = 0
+
+    def post_torrent_updates(self):
+        self.posted += 1
+
+class TorrentManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        common.set_tmp_config_dir()
+        self.core = Core()
+        self.tm = component.get("TorrentManager")
+        self.session = self.tm.session
+
+        self.torrent = self.tm[self.add_torrent("test.torrent")]
+        self.handle = self.torrent.handle = CountingHandle(self.torrent.handle)
+
+    def add_torrent(self, name):
+        filename = os.path.join(os.path.dirname(__file__), name)
+        return self.core.add_torrent_file(
+            filename, base64.encodestring(open(filename, "rb").read()), {})
+
+    def tearDown(self):
+        self.tm.session = self.session
+        self.torrent.handle = self.handle.handle
+
+        def on_shutdown(result):
+            component._ComponentRegistry.components = {}
+            del self.tm
+            del self.core
+
+        return component.shutdown().addCallback(on_shutdown)
+
+    def test_get_status_snapshot(self):
+        status = self.torrent.status
+        # Every RPC session reads the same snapshot
+        for i in xrange(3):
+            result = self.torrent.get_status(["total_payload_download", "num_seeds"])
+            self.assertEquals(result, {
+                "total_payload_download": status.total_payload_download,
+                "num_seeds": status.num_seeds
+            })
+        self.assertEquals(self.handle.status_calls, 0)
+
+        # Unless a fresh status is asked for
+        self.torrent.get_status(["num_seeds"], update=True)
+        self.assertEquals(self.handle.status_calls, 1)
+
+    def test_update_torrents_status(self):
+        session = self.tm.session = FakeSession()
+        self.tm.update_torrents_status()
+        self.assertEquals(session.posted, 1)
+        self.assertEquals(self.handle.status_calls, 0)
+
+        # The state_update_alert posted in reply refreshes the snapshot
+        status = FakeStatus(self.handle, total_payload_download=1234, num_seeds=7)
+        self.tm.on_alert_state_update(FakeStateUpdateAlert([status]))
+        self.assertTrue(self.torrent.status is status)
+        self.assertEquals(
+            self.torrent.get_status(["total_payload_download", "num_seeds"]),
+            {"total_payload_download": 1234, "num_seeds": 7})
+
+    def test_update_torrents_status_without_alert(self):
+        # libtorrent < 0.16 has no post_torrent_updates
+        self.tm.session = object()
+        self.tm.update_torrents_status()
+        self.assertEquals(self.handle.status_calls, 1)
+
+    def test_load_state_journal_partial_record(self):
+        self.tm.state_loaded = True
+        path = os.path.join(get_config_dir(), "state", "torrents.state.journal")
+
+        def on_saved(result):
+            # A record that was only partially written before a crash
+            journal_file = open(path, "ab")
+            journal_file.write(cPickle.dumps((99, "partial", "data"), 2)[:7])
+            journal_file.close()
+
+            self.tm.saved_state = {}
+            torrents = self.tm.load_state_journal()
+            self.assertEquals([t.torrent_id for t in torrents],
+                              [self.torrent.torrent_id])
+
+            # The next save is appended after the last complete record
+            self.torrent_id = self.add_torrent("ubuntu-9.04-desktop-i386.iso.torrent")
+            return self.tm.saving_state.addCallback(on_saved_again)
+
+        def on_saved_again(result):
+            self.tm.saved_state = {}
+            torrents = self.tm.load_state_journal()
+            self.assertEquals(sorted([t.torrent_id for t in torrents]),
+                              sorted([self.torrent.torrent_id, self.torrent_id]))
+
+        return self.tm.save_state().addCallback(on_saved)
@@ -0,0 +1,56 @@
+import zlib
+
+from twisted.trial import unittest
+
+from deluge import rencode
+from deluge.transfer import MessageDecoder, encode_message, FRAME_MAGIC
+
+class TransferTestCase(unittest.TestCase):
+    def setUp(self):
+        self.messages = [
+            (1, 0, "1.3.900"),
+            (3, "TorrentAddedEvent", ("a" * 40, True)),
+            (1, 1, dict(("%040d" % i, {"name": "torrent %d" % i, "progress": 50.0})
+                        for i in xrange(500)))
+        ]
+
+    def feed_chunks(self, data, chunk_size):
+        decoder = MessageDecoder()
+        received = []
+        for i in xrange(0, len(data), chunk_size):
+            received.extend(decoder.feed(data[i:i + chunk_size]))
+        return decoder, received
+
+    def test_encode_message(self):
+        data = encode_message(self.messages[0])
+        self.assertEquals(data[0], FRAME_MAGIC)
+        self.assertEquals(encode_message(self.messages[0], False),
+                          zlib.compress(rencode.dumps(self.messages[0])))
+
+    def test_framed(self):
+        data = "".join([encode_message(m) for m in self.messages])
+        for chunk_size in (1, 5, 7, 1000, len(data)):
+            decoder, received = self.feed_chunks(data, chunk_size)
+            self.assertEquals(received, self.messages)
+            self.assertTrue(decoder.framed)
+
+    def test_unframed(self):
+        data = "".join([encode_message(m, False) for m in self.messages])
+        for chunk_size in (1, 5, 7, 1000, len(data)):
+            decoder, received = self.feed_chunks(data, chunk_size)
+            self.assertEquals(received, self.messages)
+            self.assertFalse(decoder.framed)
+
+    def test_mixed(self):
+        data = encode_message(self.messages[0], False) + \
+               "".join([encode_message(m) for m in self.messages[1:]])
+        for chunk_size in (1, 3, len(data)):
+            decoder, received = self.feed_chunks(data, chunk_size)
+            self.assertEquals(received, self.messages)
+
+    def test_invalid(self):
+        decoder = MessageDecoder()
+        self.assertRaises(ValueError, decoder.feed, "invalid data")
+        decoder = MessageDecoder()
+        data = encode_message(self.messages[0])
+        self.assertRaises(ValueError, decoder.feed, data[:6] + "x" * (len(data) - 6))
@@ -0,0 +1,45 @@
+from twisted.trial import unittest
+
+from deluge.ui.common import TorrentFileTree
+
+class TorrentFileTreeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.files = [
+            {"index": 0, "path": "t/a/1", "size": 100, "offset": 0},
+            {"index": 1, "path": "t/a/2", "size": 300, "offset": 100},
+            {"index": 2, "path": "t/b/3", "size": 600, "offset": 400},
+        ]
+        self.tree = TorrentFileTree(self.files)
+
+    def test_dirs(self):
+        self.assertEquals(sorted(self.tree.dirs), ["t", "t/a", "t/b"])
+        self.assertEquals(self.tree.get_dir_size("t"), 1000)
+        self.assertEquals(self.tree.get_dir_size("t/a"), 400)
+
+    def test_update(self):
+        changed = self.tree.update([1.0, 0.0, 0.5], [1, 1, 0])
+        self.assertEquals(changed, ([0, 1, 2], set(["t", "t/a", "t/b"])))
+        self.assertAlmostEqual(self.tree.get_dir_progress("t/a"), 0.25)
+        self.assertAlmostEqual(self.tree.get_dir_progress("t"), 0.4)
+        self.assertEquals(self.tree.get_dir_priority("t/a"), 1)
+        self.assertEquals(self.tree.get_dir_priority("t"), 9)
+
+        changed = self.tree.update([1.0, 1.0, 0.5], [1, 1, 1])
+        self.assertEquals(changed, ([1, 2], set(["t", "t/a", "t/b"])))
+        self.assertAlmostEqual(self.tree.get_dir_progress("t/a"), 1.0)
+        self.assertEquals(self.tree.get_dir_priority("t"), 1)
+
+        self.assertEquals(self.tree.update([1.0, 1.0, 0.5], [1, 1, 1]), ([], set()))
+
+    def test_get_tree(self):
+        self.tree.update([1.0, 0.0, 0.5], [1, 1, 0])
+        tree = self.tree.get_tree()
+        t = tree["contents"]["t"]
+        self.assertEquals(t["size"], 1000)
+        self.assertEquals(t["priority"], 9)
+        self.assertEquals(t["contents"]["a"]["contents"]["2"]["offset"], 100)
+
+        self.tree.update([1.0, 0.0, 1.0], [1, 1, 0])
+        self.assertTrue(self.tree.get_tree() is tree)
+        self.assertAlmostEqual(t["progress"], 0.7)
+        self.assertEquals(t["contents"]["b"]["contents"]["3"]["progress"], 1.0)
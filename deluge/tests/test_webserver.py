@@ -0,0 +1,115 @@
+import os
+import zlib
+
+from twisted.trial import unittest
+from twisted.web import http
+
+import deluge.component as component
+from deluge.ui.web import server
+
+class FakeChannel(object):
+    transport = None
+
+    def getPeer(self):
+        return None
+
+    def getHost(self):
+        return None
+
+def make_request(**headers):
+    request = http.Request(FakeChannel(), False)
+    request.method = "GET"
+    for name, value in headers.iteritems():
+        request.requestHeaders.setRawHeaders(name.replace("_", "-"), [value])
+    return request
+
+class StaticFileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = self.mktemp()
+        os.makedirs(self.path)
+        self.filename = os.path.join(self.path, "test.js")
+        self.write_file(self.filename, "var a = 1;", 1000)
+        self.cache = server.StaticFileCache()
+
+    def write_file(self, filename, data, mtime):
+        f = open(filename, "wb")
+        f.write(data)
+        f.close()
+        os.utime(filename, (mtime, mtime))
+
+    def test_headers(self):
+        static_file = self.cache.get(self.filename)
+        request = make_request()
+        self.assertEquals(static_file.render(request), "var a = 1;")
+        # These headers are written with the body
+        self.assertEquals(request.etag, '"%s"' % static_file.etag)
+        self.assertEquals(request.lastModified, 1000)
+        self.assertEquals(request.responseHeaders.getRawHeaders("content-encoding"), None)
+
+    def test_if_none_match(self):
+        static_file = self.cache.get(self.filename)
+        request = make_request(if_none_match='"%s"' % static_file.etag)
+        self.assertEquals(static_file.render(request), "")
+        self.assertEquals(request.code, http.NOT_MODIFIED)
+
+        # The gzipped body has its own etag
+        request = make_request(if_none_match='"%s"' % static_file.etag,
+                               accept_encoding="gzip")
+        self.assertNotEquals(static_file.render(request), "")
+        self.assertEquals(request.code, http.OK)
+
+    def test_if_modified_since(self):
+        static_file = self.cache.get(self.filename)
+        request = make_request(if_modified_since=http.datetimeToString(1000))
+        self.assertEquals(static_file.render(request), "")
+        self.assertEquals(request.code, http.NOT_MODIFIED)
+
+    def test_gzip(self):
+        static_file = self.cache.get(self.filename)
+        request = make_request(accept_encoding="gzip, deflate")
+        body = static_file.render(request)
+        self.assertEquals(zlib.decompress(body, zlib.MAX_WBITS + 16), "var a = 1;")
+        self.assertEquals(request.responseHeaders.getRawHeaders("content-encoding"),
+                          ["gzip"])
+        self.assertEquals(request.etag, '"%s-gzip"' % static_file.etag)
+
+    def test_modified(self):
+        static_file = self.cache.get(self.filename)
+        self.assertTrue(self.cache.get(self.filename) is static_file)
+
+        self.write_file(self.filename, "var b = 2;", 2000)
+        static_file = self.cache.get(self.filename)
+        self.assertEquals(static_file.data, "var b = 2;")
+        self.assertEquals(static_file.last_modified, 2000)
+
+        os.remove(self.filename)
+        self.assertEquals(self.cache.get(self.filename), None)
+
+class ScriptResourceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = self.mktemp()
+        os.makedirs(self.path)
+        for filename in ("b.js", "a.js"):
+            open(os.path.join(self.path, filename), "wb").close()
+        os.utime(self.path, (1000, 1000))
+        self.scripts = server.ScriptResource()
+        self.scripts.add_script("extjs/ext-base.js", "ext-base.js")
+        self.scripts.add_script_folder("deluge", self.path)
+
+    def tearDown(self):
+        component._ComponentRegistry.components = {}
+
+    def test_get_scripts(self):
+        self.assertEquals(self.scripts.get_scripts(), [
+            "js/extjs/ext-base.js", "js/deluge/a.js", "js/deluge/b.js"])
+
+    def test_script_added(self):
+        self.scripts.get_scripts()
+        open(os.path.join(self.path, "c.js"), "wb").close()
+        os.utime(self.path, (2000, 2000))
+        self.assertEquals(self.scripts.get_scripts(), [
+            "js/extjs/ext-base.js", "js/deluge/a.js", "js/deluge/b.js",
+            "js/deluge/c.js"])
+
+        self.scripts.add_script("extra.js", "extra.js")
+        self.assertEquals(self.scripts.get_scripts()[-1], "js/extra.js")
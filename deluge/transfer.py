@@ -0,0 +1,203 @@
+#
+# transfer.py
+#
+# Copyright (C) 2026 agent <agent@local>
+#
+# Deluge is free software.
+#
+# You may redistribute it and/or modify it under the terms of the
+# GNU General Public License, as published by the Free Software
+# Foundation; either version 3 of the License, or (at your option)
+# any later version.
+#
+# deluge is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+# See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with deluge.    If not, write to:
+# 	The Free Software Foundation, Inc.,
+# 	51 Franklin Street, Fifth Floor
+# 	Boston, MA  02110-1301, USA.
+#
+#    In addition, as a special exception, the copyright holders give
+#    permission to link the code of portions of this program with the OpenSSL
+#    library.
+#    You must obey the GNU General Public License in all respects for all of
+#    the code used other than OpenSSL. If you modify file(s) with this
+#    exception, you may extend this exception to your version of the file(s),
+#    but you are not obligated to do so. If you do not wish to do so, delete
+#    this exception statement from your version. If you delete this exception
+#    statement from all source files in the program, then also delete it here.
+#
+#
+
+"""
+The message format used between the daemon and its clients.
+
+Originally every message was a zlib compressed rencoded string, with nothing
+telling the receiver where a message ends.  Framed messages are prefixed with
+a header holding the payload length and whether the payload is compressed::
+
+    "D" | flags (1 byte) | payload length (4 bytes, network order) | payload
+
+Framing is negotiated when connecting, see :data:`FRAMING_VERSION`.  The
+:class:`MessageDecoder` accepts both formats so either side can switch at any
+point without having to synchronize with the other.
+"""
+
+import struct
+import zlib
+
+try:
+    import rencode
+except ImportError:
+    import deluge.rencode as rencode
+
+# The version of the framed format, sent by clients in the `daemon.info` call
+FRAMING_VERSION = 1
+
+FRAME_MAGIC = "D"
+FRAME_HEADER_FORMAT = "!cBI"
+FRAME_HEADER_SIZE = struct.calcsize(FRAME_HEADER_FORMAT)
+
+FLAG_COMPRESSED = 1
+
+# Payloads smaller than this are not worth compressing
+COMPRESSION_THRESHOLD = 1024
+
+def encode_message(message, framed=True):
+    """
+    Encodes a message to be sent to the other side of the connection.
+
+    :param message: the object to send, one of the RPC message types
+    :type message: object
+    :param framed: if False, use the original unframed format
+    :type framed: bool
+
+    :returns: the encoded message
+    :rtype: str
+
+    """
+    data = rencode.dumps(message)
+    if not framed:
+        return zlib.compress(data)
+
+    flags = 0
+    if len(data) >= COMPRESSION_THRESHOLD:
+        data = zlib.compress(data)
+        flags |= FLAG_COMPRESSED
+    return struct.pack(FRAME_HEADER_FORMAT, FRAME_MAGIC, flags, len(data)) + data
+
+class MessageDecoder(object):
+    """
+    Decodes the messages in a stream of data as it is received.
+
+    Every byte is only looked at once no matter how the stream is split up,
+    so decoding a large message costs the same whether it arrives in one
+    piece or in many small chunks.
+    """
+    def __init__(self):
+        # The data received for the current message
+        self.__buffer = []
+        self.__buffered = 0
+        # The (flags, length) of the current framed message
+        self.__header = None
+        # The decompressor of the current unframed message
+        self.__dobj = None
+        # Set once a framed message has been received
+        self.framed = False
+
+    def feed(self, data):
+        """
+        Feeds data received from the connection to the decoder.
+
+        :param data: the data received
+        :type data: str
+
+        :returns: the messages completed by this data
+        :rtype: list
+
+        :raises ValueError: if the data cannot be decoded
+
+        """
+        messages = []
+        while data:
+            if self.__header is None and self.__dobj is None:
+                # This is the start of a new message
+                if self.__buffer:
+                    data = "".join(self.__buffer) + data
+                    self.__buffer = []
+                    self.__buffered = 0
+
+                if data[0] != FRAME_MAGIC:
+                    self.__dobj = zlib.decompressobj()
+                elif len(data) < FRAME_HEADER_SIZE:
+                    self.__buffer.append(data)
+                    self.__buffered = len(data)
+                    break
+                else:
+                    magic, flags, length = struct.unpack(
+                        FRAME_HEADER_FORMAT, data[:FRAME_HEADER_SIZE])
+                    self.__header = (flags, length)
+                    data = data[FRAME_HEADER_SIZE:]
+                    continue
+
+            if self.__dobj is not None:
+                data = self.__feed_unframed(data, messages)
+            else:
+                data = self.__feed_framed(data, messages)
+        return messages
+
+    def __feed_framed(self, data, messages):
+        flags, length = self.__header
+        needed = length - self.__buffered
+        if len(data) < needed:
+            self.__buffer.append(data)
+            self.__buffered += len(data)
+            return ""
+
+        self.__buffer.append(data[:needed])
+        payload = "".join(self.__buffer)
+        self.__buffer = []
+        self.__buffered = 0
+        self.__header = None
+
+        try:
+            if flags & FLAG_COMPRESSED:
+                payload = zlib.decompress(payload)
+            messages.append(rencode.loads(payload))
+        except Exception, e:
+            raise ValueError("Unable to decode message: %s" % e)
+        self.framed = True
+        return data[needed:]
+
+    def __feed_unframed(self, data, messages):
+        try:
+            self.__buffer.append(self.__dobj.decompress(data))
+        except zlib.error, e:
+            raise ValueError("Unable to decompress message: %s" % e)
+
+        unused_data = self.__dobj.unused_data
+        if not unused_data:
+            # Nothing tells us where an unframed message ends, so check if
+            # the compressed stream is complete by feeding a copy of the
+            # decompressor one more byte.  It is only left unused if the
+            # stream has ended.
+            probe = self.__dobj.copy()
+            try:
+                probe.decompress("\x00")
+            except zlib.error:
+                return ""
+            if not probe.unused_data:
+                return ""
+
+        payload = "".join(self.__buffer)
+        self.__buffer = []
+        self.__dobj = None
+        try:
+            messages.append(rencode.loads(payload))
+        except Exception, e:
+            raise ValueError("Unable to decode message: %s" % e)
+        return unused_data
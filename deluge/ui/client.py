@@ -37,15 +37,9 @@
 import logging
 from twisted.internet.protocol import Protocol, ClientFactory
 from twisted.internet import reactor, ssl, defer
-try:
-    import rencode
-except ImportError:
-    import deluge.rencode as rencode
-
-import zlib
 
 import deluge.common
-from deluge import error
+from deluge import error, transfer
 from deluge.event import known_events
 
 if deluge.common.windows_check():
@@ -108,7 +102,7 @@ class DelugeRPCProtocol(Protocol):
 
     def connectionMade(self):
         self.__rpc_requests = {}
-        self.__buffer = None
+        self.__decoder = transfer.MessageDecoder()
         # Set the protocol in the daemon so it can send data
         self.factory.daemon.protocol = self
         # Get the address of the daemon that we've connected to
@@ -124,37 +118,28 @@ def dataReceived(self, data):
         """
         This method is called whenever we receive data from the daemon.
 
-        :param data: a zlib compressed and rencoded string that should be either
-            a RPCResponse, RCPError or RPCSignal
-        """
-        if self.__buffer:
-            # We have some data from the last dataReceived() so lets prepend it
-            data = self.__buffer + data
-            self.__buffer = None
-
-        while data:
-            # Increase the byte counter
-            self.factory.bytes_recv += len(data)
-
-            dobj = zlib.decompressobj()
-            try:
-                request = rencode.loads(dobj.decompress(data))
-            except Exception, e:
-                #log.debug("Received possible invalid message (%r): %s", data, e)
-                # This could be cut-off data, so we'll save this in the buffer
-                # and try to prepend it on the next dataReceived()
-                self.__buffer = data
-                return
-            else:
-                data = dobj.unused_data
+        :param data: framed or zlib compressed rencoded messages, see
+            :mod:`deluge.transfer`, that should be either a RPCResponse,
+            RCPError or RPCSignal
+        """
+        # Increase the byte counter
+        self.factory.bytes_recv += len(data)
+
+        try:
+            requests = self.__decoder.feed(data)
+        except ValueError, e:
+            log.warning("Received invalid message from daemon: %s", e)
+            self.transport.loseConnection()
+            return
 
+        for request in requests:
             if type(request) is not tuple:
                 log.debug("Received invalid message: type is not tuple")
-                return
+                continue
             if len(request) < 3:
                 log.debug("Received invalid message: number of items in "
-                          "response is %s", len(3))
-                return
+                          "response is %s", len(request))
+                continue
 
             message_type = request[0]
 
@@ -226,7 +211,9 @@ def send_request(self, request):
         self.__rpc_requests[request.request_id] = request
         #log.debug("Sending RPCRequest %s: %s", request.request_id, request)
         # Send the request in a tuple because multiple requests can be sent at once
-        data = zlib.compress(rencode.dumps((request.format_message(),)))
+        # Only send framed messages once the daemon has shown it supports them
+        data = transfer.encode_message((request.format_message(),),
+                                       self.__decoder.framed)
         self.factory.bytes_sent += len(data)
         self.transport.write(data)
 
@@ -413,7 +400,9 @@ def on_info_fail(reason):
             log.exception(reason)
             self.daemon_info_deferred.errback(reason)
 
-        self.call("daemon.info").addCallback(on_info).addErrback(on_info_fail)
+        # Ask for framed messages, daemons that do not support them ignore it
+        self.call("daemon.info", framing=transfer.FRAMING_VERSION
+                  ).addCallback(on_info).addErrback(on_info_fail)
         return self.daemon_info_deferred
 
     def __on_connect_fail(self, reason):
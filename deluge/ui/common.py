@@ -69,47 +69,58 @@ def __init__(self, filename, filetree=1):
         try:
             log.debug("Attempting to open %s.", filename)
             self.__m_filedata = open(filename, "rb").read()
-            self.__m_metadata = bencode.bdecode(self.__m_filedata)
+            # Only the parts of the torrent that are used get decoded
+            metadata = bencode.bdecode_lazy(self.__m_filedata)
+            info = metadata["info"]
         except Exception, e:
             log.warning("Unable to open %s: %s", filename, e)
             raise e
 
-        self.__m_info_hash = sha(bencode.bencode(self.__m_metadata["info"])).hexdigest()
+        self.__m_metadata = None
+
+        # The info hash is taken over the info dict as it is in the file
+        self.__m_info_hash = sha(metadata.raw("info")).hexdigest()
 
         # Get encoding from torrent file if available
         self.encoding = "UTF-8"
-        if "encoding" in self.__m_metadata:
-            self.encoding = self.__m_metadata["encoding"]
-        elif "codepage" in self.__m_metadata:
-            self.encoding = str(self.__m_metadata["codepage"])
+        if "encoding" in metadata:
+            self.encoding = metadata["encoding"]
+        elif "codepage" in metadata:
+            self.encoding = str(metadata["codepage"])
 
         # Check if 'name.utf-8' is in the torrent and if not try to decode the string
         # using the encoding found.
-        if "name.utf-8" in self.__m_metadata["info"]:
-            self.__m_name = decode_string(self.__m_metadata["info"]["name.utf-8"])
+        if "name.utf-8" in info:
+            self.__m_name = decode_string(info["name.utf-8"])
         else:
-            self.__m_name = decode_string(self.__m_metadata["info"]["name"], self.encoding)
+            self.__m_name = decode_string(info["name"], self.encoding)
 
         # Get list of files from torrent info
         paths = {}
         dirs = {}
-        if self.__m_metadata["info"].has_key("files"):
+        self.__m_files = []
+        if info.has_key("files"):
             prefix = ""
-            if len(self.__m_metadata["info"]["files"]) > 1:
+            if len(info["files"]) > 1:
                 prefix = self.__m_name
 
-            for index, f in enumerate(self.__m_metadata["info"]["files"]):
+            for index, f in enumerate(info["files"]):
                 if "path.utf-8" in f:
                     path = os.path.join(prefix, *f["path.utf-8"])
                 else:
                     path = decode_string(os.path.join(prefix, decode_string(os.path.join(*f["path"]), self.encoding)), self.encoding)
-                f["index"] = index
-                paths[path] = f
+                length = f["length"]
+                paths[path] = {"index": index, "length": length}
+                self.__m_files.append({
+                    'path': path,
+                    'size': length,
+                    'download': True
+                })
 
                 dirname = os.path.dirname(path)
                 while dirname:
                     dirinfo = dirs.setdefault(dirname, {})
-                    dirinfo["length"] = dirinfo.get("length", 0) + f["length"]
+                    dirinfo["length"] = dirinfo.get("length", 0) + length
                     dirname = os.path.dirname(dirname)
 
             if filetree == 2:
@@ -138,38 +149,21 @@ def walk(path, item):
                         self.__m_name: {
                             "type": "file",
                             "index": 0,
-                            "length": self.__m_metadata["info"]["length"],
+                            "length": info["length"],
                             "download": True
                         }
                     }
                 }
             else:
                 self.__m_files_tree = {
-                    self.__m_name: (0, self.__m_metadata["info"]["length"], True)
+                    self.__m_name: (0, info["length"], True)
                 }
 
-        self.__m_files = []
-        if self.__m_metadata["info"].has_key("files"):
-            prefix = ""
-            if len(self.__m_metadata["info"]["files"]) > 1:
-                prefix = self.__m_name
-
-            for f in self.__m_metadata["info"]["files"]:
-                if "path.utf-8" in f:
-                    path = os.path.join(prefix, *f["path.utf-8"])
-                else:
-                    path = decode_string(os.path.join(prefix, decode_string(os.path.join(*f["path"]), self.encoding)), self.encoding)
-                self.__m_files.append({
-                    'path': path,
-                    'size': f["length"],
-                    'download': True
-                })
-        else:
             self.__m_files.append({
                 "path": self.__m_name,
-                "size": self.__m_metadata["info"]["length"],
+                "size": info["length"],
                 "download": True
-        })
+            })
 
     def as_dict(self, *keys):
         """
@@ -232,6 +226,8 @@ def metadata(self):
 
         :rtype: dictionary
         """
+        if self.__m_metadata is None:
+            self.__m_metadata = bencode.bdecode(self.__m_filedata)
         return self.__m_metadata
 
     @property
@@ -399,6 +395,148 @@ def write(path, item):
         self.walk(write)
         return "\n".join(lines)
 
+class TorrentFileTree(object):
+    """
+    The files of a torrent along with the size, progress and priority of
+    every directory.  The directories are worked out once, after which only
+    the directories containing a file whose progress or priority changed are
+    updated.
+
+    :param files: The files of the torrent, as in its "files" status
+    :type files: list
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.paths = [f["path"] for f in files]
+        self.sizes = [f["size"] for f in files]
+        self.progress = [None] * len(files)
+        self.priorities = [None] * len(files)
+        # The directory each file is in, "" for the top level
+        self.parents = []
+        # {path: [size, completed, {priority: number of files}, parent]}
+        self.dirs = {}
+
+        for index, path in enumerate(self.paths):
+            dirname = path.rpartition("/")[0]
+            self.parents.append(dirname)
+            while dirname:
+                directory = self.dirs.get(dirname)
+                if directory is None:
+                    parent = dirname.rpartition("/")[0]
+                    directory = self.dirs[dirname] = [0, 0.0, {}, parent]
+                directory[0] += self.sizes[index]
+                dirname = directory[3]
+
+        self.__tree = None
+        self.__items = None
+        self.__dirty_files = set()
+        self.__dirty_dirs = set()
+
+    def update(self, file_progress, file_priorities):
+        """
+        Updates the progress and priority of the files.
+
+        :param file_progress: The progress of every file
+        :type file_progress: list
+        :param file_priorities: The priority of every file
+        :type file_priorities: list
+        :returns: The indexes of the files and the paths of the directories
+            that changed
+        :rtype: tuple (list, set)
+        """
+        changed_files = []
+        changed_dirs = set()
+        for index in xrange(len(self.paths)):
+            progress = file_progress[index]
+            priority = file_priorities[index]
+            old_progress = self.progress[index]
+            old_priority = self.priorities[index]
+            if progress == old_progress and priority == old_priority:
+                continue
+
+            changed_files.append(index)
+            self.progress[index] = progress
+            self.priorities[index] = priority
+            completed = self.sizes[index] * (progress - (old_progress or 0))
+            dirname = self.parents[index]
+            while dirname:
+                directory = self.dirs[dirname]
+                directory[1] += completed
+                if priority != old_priority:
+                    counts = directory[2]
+                    if old_priority is not None:
+                        counts[old_priority] -= 1
+                        if not counts[old_priority]:
+                            del counts[old_priority]
+                    counts[priority] = counts.get(priority, 0) + 1
+                changed_dirs.add(dirname)
+                dirname = directory[3]
+
+        self.__dirty_files.update(changed_files)
+        self.__dirty_dirs.update(changed_dirs)
+        return changed_files, changed_dirs
+
+    def get_dir_size(self, path):
+        return self.dirs[path][0]
+
+    def get_dir_progress(self, path):
+        """
+        The progress of a directory, the average of the progress of its
+        files weighted by their size.
+        """
+        size, completed = self.dirs[path][:2]
+        if not size:
+            return 0.0
+        return completed / size
+
+    def get_dir_priority(self, path):
+        """
+        The priority of a directory, 9 if its files have different
+        priorities.
+        """
+        counts = self.dirs[path][2]
+        if len(counts) == 1:
+            return counts.keys()[0]
+        return 9
+
+    def get_tree(self):
+        """
+        Returns the files as a :class:`FileTree2` tree, with the info of
+        every file and directory.  The tree is only built the first time,
+        later calls update the items that changed.
+
+        :rtype: dictionary
+        """
+        if self.__tree is None:
+            items = {}
+            def walk(path, item):
+                items[path] = item
+            file_tree = FileTree2(self.paths)
+            file_tree.walk(walk)
+            for index, path in enumerate(self.paths):
+                items[path].update(self.files[index])
+                items[path]["index"] = index
+            for path in self.dirs:
+                items[path]["path"] = path
+                items[path]["size"] = self.dirs[path][0]
+            self.__tree = file_tree.get_tree()
+            self.__items = items
+            self.__dirty_files = set(xrange(len(self.paths)))
+            self.__dirty_dirs = set(self.dirs)
+
+        for index in self.__dirty_files:
+            item = self.__items[self.paths[index]]
+            item["progress"] = self.progress[index]
+            item["priority"] = self.priorities[index]
+        for path in self.__dirty_dirs:
+            item = self.__items[path]
+            item["progress"] = self.get_dir_progress(path)
+            item["priority"] = self.get_dir_priority(path)
+        self.__dirty_files = set()
+        self.__dirty_dirs = set()
+        return self.__tree
+
 def get_localhost_auth():
     """
     Grabs the localclient auth line from the 'auth' file and creates a localhost uri
@@ -42,6 +42,8 @@
 
 from collections import deque
 
+from twisted.internet import reactor
+
 from deluge.ui.sessionproxy import SessionProxy
 
 from popup import Popup,SelectablePopup,MessagePopup
@@ -177,6 +179,10 @@ class FILTER:
                      "savepath","downloaded","uploaded",
                      "owner"]
 
+# The fields of all the torrents needed to sort them, search their names and
+# color their rows.  The other fields are only requested for the rows on screen.
+ORDER_FIELDS = ["queue", "name", "state"]
+
 prefs_to_names = {
     "queue":"#", 
     "name":"Name",
@@ -200,8 +206,8 @@ class FILTER:
 
 class AllTorrents(BaseMode, component.Component):
     def __init__(self, stdscr, encoding=None):
-        self.formatted_rows = None
-        self.torrent_names = None
+        self.curstate = {}
+        self.numtorrents = 0
         self.cursel = 1
         self.curoff = 1 # TODO: this should really be 0 indexed
         self.column_string = ""
@@ -224,6 +230,19 @@ def __init__(self, stdscr, encoding=None):
         self.__status_dict = {}
         self.__torrent_info_id = None
 
+        # The queue position each torrent was sorted by
+        self.__queue = {}
+        # The status of the rows that have been on screen
+        self.__rows_status = {}
+        # The formatted rows {torrent_id: (status, (row, state))}
+        self.__row_cache = {}
+        # The rows requested since the last update
+        self.__rows_requested = set()
+        # The rows drawn before their status was received, these are
+        # requested once the screen has been drawn
+        self.__rows_missing = []
+        self.__refresh_call = None
+
         BaseMode.__init__(self, stdscr, encoding)
         component.Component.__init__(self, "AllTorrents", 1, depend=["SessionProxy"])
         curses.curs_set(0)
@@ -262,10 +281,10 @@ def __init__(self, stdscr, encoding=None):
 
     # component start/update
     def start(self):
-        component.get("SessionProxy").get_torrents_status(self.__status_dict, self.__status_fields).addCallback(self.set_state,False)
+        component.get("SessionProxy").get_torrents_status(self.__status_dict, ORDER_FIELDS).addCallback(self.set_state,False)
 
     def update(self):
-        component.get("SessionProxy").get_torrents_status(self.__status_dict, self.__status_fields).addCallback(self.set_state,True)
+        component.get("SessionProxy").get_torrents_status(self.__status_dict, ORDER_FIELDS).addCallback(self.set_state,True)
         if self.__torrent_info_id:
             component.get("SessionProxy").get_torrent_status(self.__torrent_info_id, self.__status_keys).addCallback(self._on_torrent_status)
 
@@ -274,8 +293,9 @@ def update_config(self):
         self.__cols_to_show = [pref for pref in column_pref_names if self.config["show_%s"%pref]]
         self.__columns = [prefs_to_names[col] for col in self.__cols_to_show]
         self.__status_fields = column.get_required_fields(self.__columns)
-        for rf in ["state","name","queue"]: # we always need these, even if we're not displaying them
+        for rf in ORDER_FIELDS: # we always need these, even if we're not displaying them
             if not rf in self.__status_fields: self.__status_fields.append(rf)
+        self.__column_fields = [(name, column.get_required_fields([name])) for name in self.__columns]
         self.__update_columns()
 
     def __split_help(self):
@@ -303,28 +323,93 @@ def __update_columns(self):
                         self.column_widths[i] = vw
 
         self.column_string = "{!header!}%s"%("".join(["%s%s"%(self.__columns[i]," "*(self.column_widths[i]-len(self.__columns[i]))) for i in range(0,len(self.__columns))]))
+        # The rows have to be formatted again with the new columns
+        self.__row_cache = {}
 
 
     def set_state(self, state, refresh):
         self.curstate = state # cache in case we change sort order
-        newnames = []
-        newrows = []
-        self._sorted_ids = self._sort_torrents(self.curstate)
-        for torrent_id in self._sorted_ids:
-            ts = self.curstate[torrent_id]
-            newnames.append(ts["name"])
-            newrows.append((format_utils.format_row([column.get_column_value(name,ts) for name in self.__columns],self.column_widths),ts["state"]))
-
         self.numtorrents = len(state)
-        self.formatted_rows = newrows
-        self.torrent_names = newnames
+        self.__update_order(state)
+
+        # Only the rows on screen, and a screen above and below them, are
+        # requested in full
+        self.__rows_requested = set()
+        page = max(self.rows - 3, 1)
+        start = max(self.curoff - 1 - page, 0)
+        torrent_ids = self._sorted_ids[start:self.curoff - 1 + 2 * page]
+        d = self.__request_rows(torrent_ids)
         if refresh:
-            self.refresh()
+            d.addCallback(lambda result: self.refresh())
+
+    def __request_rows(self, torrent_ids):
+        self.__rows_requested.update(torrent_ids)
+        d = component.get("SessionProxy").get_torrents_status({"id": torrent_ids}, self.__status_fields)
+        d.addCallback(self.__rows_status.update)
+        return d
+
+    def __update_order(self, state):
+        """
+        Sorts the torrents again if any was added, removed or moved in the
+        queue.  The previous order is sorted, so the torrents with the same
+        queue position stay where they were.
+        """
+        queue = dict((torrent_id, ts["queue"]) for torrent_id, ts in state.iteritems())
+        if self._sorted_ids is not None and queue == self.__queue:
+            return
+
+        if self._sorted_ids is None:
+            torrent_ids = state.keys()
+        else:
+            torrent_ids = [torrent_id for torrent_id in self._sorted_ids if torrent_id in queue]
+            torrent_ids.extend([torrent_id for torrent_id in queue if torrent_id not in self.__queue])
+            for torrent_id in self.__queue:
+                if torrent_id not in queue:
+                    self.__rows_status.pop(torrent_id, None)
+                    self.__row_cache.pop(torrent_id, None)
+
+        # Negative queue positions (finished torrents) go last
+        torrent_ids.sort(key=lambda torrent_id: (queue[torrent_id] < 0, queue[torrent_id]))
+        self._sorted_ids = torrent_ids
+        self.__queue = queue
+
+    def _get_row(self, index):
+        """
+        Returns the formatted row and the state of the torrent at index,
+        formatting it only if its status changed.
+        """
+        torrent_id = self._sorted_ids[index]
+        status = self.__rows_status.get(torrent_id)
+        if status is None:
+            # Show what we have until the rest is received
+            status = self.curstate[torrent_id]
+            if torrent_id not in self.__rows_requested:
+                self.__rows_requested.add(torrent_id)
+                self.__rows_missing.append(torrent_id)
+        else:
+            # The order fields are newer
+            status = dict(status)
+            status.update(self.curstate[torrent_id])
+
+        cached = self.__row_cache.get(torrent_id)
+        if cached and cached[0] == status:
+            return cached[1]
+
+        values = []
+        for name, fields in self.__column_fields:
+            for field in fields:
+                if field not in status:
+                    values.append("")
+                    break
+            else:
+                values.append(column.get_column_value(name, status))
+        row = (format_utils.format_row(values, self.column_widths), status["state"])
+        self.__row_cache[torrent_id] = (status, row)
+        return row
 
     def get_torrent_name(self, torrent_id):
-        for p,i in enumerate(self._sorted_ids):
-            if torrent_id == i:
-                return self.torrent_names[p]
+        if torrent_id in self.curstate:
+            return self.curstate[torrent_id]["name"]
         return None
 
     def _scroll_up(self, by):
@@ -395,22 +480,6 @@ def on_resize(self, *args):
             self.popup.handle_resize()
         self.refresh()
 
-    def _queue_sort(self, v1, v2):
-        if v1 == v2:
-            return 0
-        if v2 < 0:
-            return -1
-        if v1 < 0:
-            return 1
-        if v1 > v2:
-            return 1
-        if v2 > v1:
-            return -1
-
-    def _sort_torrents(self, state):
-        "sorts by queue #"
-        return sorted(state,cmp=self._queue_sort,key=lambda s:state.get(s)["queue"])
-
     def _format_queue(self, qnum):
         if (qnum >= 0):
             return "%d"%(qnum+1)
@@ -602,20 +671,21 @@ def refresh(self,lines=None):
             self.add_string(self.rows - 1, "%s%s"%(self.statusbars.bottombar,hstr))
 
         # add all the torrents
-        if self.formatted_rows == []:
+        if self._sorted_ids == []:
             msg = "No torrents match filter".center(self.cols)
             self.add_string(3, "{!info!}%s"%msg)
-        elif self.formatted_rows:
+        elif self._sorted_ids:
             tidx = self.curoff
             currow = 2
 
             if lines:
                 todraw = []
                 for l in lines:
-                    todraw.append(self.formatted_rows[l])
+                    todraw.append(self._get_row(l))
                 lines.reverse()
             else:
-                todraw = self.formatted_rows[tidx-1:]
+                # Only the rows that fit on screen are formatted
+                todraw = (self._get_row(i) for i in xrange(tidx-1, self.numtorrents))
 
             for row in todraw:
                 # default style
@@ -676,6 +746,22 @@ def refresh(self,lines=None):
 
         curses.doupdate()
 
+        if self.__rows_missing:
+            torrent_ids = self.__rows_missing
+            self.__rows_missing = []
+            self.__request_rows(torrent_ids).addCallback(self.__refresh_later)
+
+    def __refresh_later(self, result=None):
+        """
+        Redraws the screen once, after the current call returns, as the rows
+        may be received while the screen is being drawn
+        """
+        def refresh():
+            self.__refresh_call = None
+            self.refresh()
+
+        if not self.__refresh_call:
+            self.__refresh_call = reactor.callLater(0, refresh)
 
     def _mark_unmark(self,idx):
         if idx in self.marked:
@@ -687,8 +773,8 @@ def _mark_unmark(self,idx):
 
     def __do_search(self):
         # search forward for the next torrent matching self.search_string
-        for i,n in enumerate(self.torrent_names[self.cursel:]):
-            if n.find(self.search_string) >= 0:
+        for i,torrent_id in enumerate(self._sorted_ids[self.cursel:]):
+            if self.curstate[torrent_id]["name"].find(self.search_string) >= 0:
                 self.cursel += (i+1)
                 if ((self.curoff + self.rows - 5) < self.cursel):
                     self.curoff = self.cursel - self.rows + 5
@@ -760,7 +846,7 @@ def on_disconnect(result):
                     reactor.stop()            
                 return
 
-        if self.formatted_rows==None or self.popup:
+        if self._sorted_ids is None or self.popup:
             return
 
         elif self.entering_search:
@@ -40,7 +40,9 @@
 import gobject
 import base64
 import logging
+import threading
 
+from twisted.internet import reactor
 from twisted.internet.threads import deferToThread
 
 from deluge.ui.client import client
@@ -72,7 +74,8 @@ def show(self):
             "on_button_up_clicked": self._on_button_up_clicked,
             "on_button_add_clicked": self._on_button_add_clicked,
             "on_button_remove_clicked": self._on_button_remove_clicked,
-            "on_button_down_clicked": self._on_button_down_clicked
+            "on_button_down_clicked": self._on_button_down_clicked,
+            "on_button_progress_cancel_clicked": self._on_button_progress_cancel_clicked
         })
 
         # path, icon, size
@@ -331,19 +334,31 @@ def _on_button_save_clicked(self, widget):
 
             def hide_progress(result):
                 self.glade.get_widget("progress_dialog").hide_all()
+                return result
 
+            def on_cancelled(failure):
+                from deluge.maketorrent import HashingCancelled
+                failure.trap(HashingCancelled)
+                log.debug("Torrent creation cancelled")
+
+            def on_progress(value, num_pieces):
+                # This is called from the hashing thread
+                reactor.callFromThread(self._on_create_torrent_progress,
+                                       value, num_pieces)
+
+            self.cancel_event = threading.Event()
             deferToThread(self.create_torrent,
                     path.decode('utf-8'),
                     tracker,
                     piece_length,
-                    self._on_create_torrent_progress,
+                    on_progress,
                     comment,
                     result.decode('utf-8'),
                     webseeds,
                     private,
                     author,
                     trackers,
-                    add_to_session).addCallback(hide_progress)
+                    add_to_session).addBoth(hide_progress).addErrback(on_cancelled)
 
         self.dialog.destroy()
 
@@ -360,7 +375,8 @@ def create_torrent(self, path, tracker, piece_length, progress, comment, target,
             webseeds=webseeds,
             private=private,
             created_by=created_by,
-            trackers=trackers)
+            trackers=trackers,
+            cancel_event=self.cancel_event)
 
         if add_to_session:
             client.core.add_torrent_file(
@@ -368,6 +384,10 @@ def create_torrent(self, path, tracker, piece_length, progress, comment, target,
                 base64.encodestring(open(target, "rb").read()),
                 {"download_location": os.path.split(path)[0]})
 
+    def _on_button_progress_cancel_clicked(self, widget):
+        log.debug("_on_button_progress_cancel_clicked")
+        self.cancel_event.set()
+
     def _on_create_torrent_progress(self, value, num_pieces):
         percent = float(value)/float(num_pieces)
         pbar = self.glade.get_widget("progressbar")
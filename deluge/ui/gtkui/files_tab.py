@@ -49,6 +49,7 @@
 import deluge.configmanager
 import deluge.component as component
 import deluge.common
+from deluge.ui.common import TorrentFileTree
 import common
 
 log = logging.getLogger(__name__)
@@ -238,6 +239,7 @@ def __init__(self):
         self.files_list = {}
 
         self.torrent_id = None
+        self.__reset_file_tree()
 
     def start(self):
         attr = "hide" if not client.is_localhost() else "show"
@@ -325,6 +327,7 @@ def update(self):
         if torrent_id != self.torrent_id:
             # We only want to do this if the torrent_id has changed
             self.treestore.clear()
+            self.__reset_file_tree()
             self.torrent_id = torrent_id
             status_keys += ["compact"]
 
@@ -341,8 +344,44 @@ def update(self):
 
     def clear(self):
         self.treestore.clear()
+        self.__reset_file_tree()
         self.torrent_id = None
 
+    def __reset_file_tree(self, files=None):
+        """
+        Replaces the file tree used to update the progress and priorities,
+        which has to be done whenever the files or the rows change.
+        """
+        self.file_tree = TorrentFileTree(files) if files is not None else None
+        # The references to the rows of the files and folders
+        self.__rows = None
+        # The files and folders that could not be updated while being edited
+        self.__stale_files = set()
+        self.__stale_dirs = set()
+
+    def __get_rows(self):
+        """
+        Returns the references to the rows of the files, by index, and of the
+        folders, by path.
+        """
+        if self.__rows is None:
+            files = {}
+            dirs = {}
+            def add_rows(itr, parent_path):
+                while itr:
+                    ref = gtk.TreeRowReference(self.treestore, self.treestore.get_path(itr))
+                    index = self.treestore[itr][5]
+                    if index > -1:
+                        files[index] = ref
+                    else:
+                        path = parent_path + self.treestore[itr][0].rstrip("/")
+                        dirs[path] = ref
+                        add_rows(self.treestore.iter_children(itr), path + "/")
+                    itr = self.treestore.iter_next(itr)
+            add_rows(self.treestore.get_iter_first(), "")
+            self.__rows = (files, dirs)
+        return self.__rows
+
     def _on_row_activated(self, tree, path, view_column):
         if client.is_localhost:
             component.get("SessionProxy").get_torrent_status(self.torrent_id, ["save_path", "files"]).addCallback(self._on_open_file)
@@ -405,6 +444,7 @@ def add_files(self, parent_iter, split_files):
     def update_files(self):
         self.treestore.clear()
         self.prepare_file_store(self.files_list[self.torrent_id])
+        self.__reset_file_tree(self.files_list[self.torrent_id])
         self.listview.expand_row("0", False)
 
     def get_selected_files(self):
@@ -427,46 +467,6 @@ def get_iter_children(itr, selected):
 
         return selected
 
-    def get_files_from_tree(self, rows, files_list, indent):
-        if not rows:
-            return None
-
-        for row in rows:
-            if row[5] > -1:
-                files_list.append((row[5], row))
-            self.get_files_from_tree(row.iterchildren(), files_list, indent+1)
-        return None
-
-    def update_folder_percentages(self):
-        """
-        Go through the tree and update the folder complete percentages.
-        """
-        root = self.treestore.get_iter_root()
-        if root is None or self.treestore[root][5] != -1:
-            return
-
-        def get_completed_bytes(row):
-            bytes = 0
-            parent = self.treestore.iter_parent(row)
-            while row:
-                if self.treestore.iter_children(row):
-                    bytes += get_completed_bytes(self.treestore.iter_children(row))
-                else:
-                    bytes += self.treestore[row][1] * (float(self.treestore[row][3]) / 100.0)
-
-                row = self.treestore.iter_next(row)
-
-            try:
-                value = (float(bytes) / float(self.treestore[parent][1])) * 100
-            except ZeroDivisionError:
-                # Catch the unusal error found when moving folders around
-                value = 0
-            self.treestore[parent][3] = value
-            self.treestore[parent][2] = "%.2f%%" % value
-            return bytes
-
-        get_completed_bytes(self.treestore.iter_children(root))
-
     def _on_get_torrent_status(self, status):
         # Store this torrent's compact setting
         if "compact" in status:
@@ -476,30 +476,52 @@ def _on_get_torrent_status(self, status):
             self.files_list[self.torrent_id] = status["files"]
             self.update_files()
 
-        # (index, iter)
-        files_list = []
-        self.get_files_from_tree(self.treestore, files_list, 0)
-        files_list.sort()
-        for index, row in files_list:
+        if self.file_tree is None or \
+           len(status["file_progress"]) != len(self.file_tree.paths):
+            return
+
+        # Only the rows of the files and folders that changed are updated
+        changed_files, changed_dirs = self.file_tree.update(
+            status["file_progress"], status["file_priorities"])
+        changed_files = self.__stale_files.union(changed_files)
+        changed_dirs = self.__stale_dirs.union(changed_dirs)
+        self.__stale_files = set()
+        self.__stale_dirs = set()
+        file_rows, dir_rows = self.__get_rows()
+
+        for index in changed_files:
             # Do not update a row that is being edited
-            if self._editing_index == row[5]:
+            if self._editing_index == index:
+                self.__stale_files.add(index)
                 continue
 
-            try:
-                progress_string = "%.2f%%" % (status["file_progress"][index] * 100)
-            except IndexError:
+            ref = file_rows.get(index)
+            if ref is None or not ref.valid():
                 continue
+            row = self.treestore[ref.get_path()]
+            progress_value = self.file_tree.progress[index] * 100
+            progress_string = "%.2f%%" % progress_value
             if row[2] != progress_string:
                 row[2] = progress_string
-            progress_value = status["file_progress"][index] * 100
             if row[3] != progress_value:
                 row[3] = progress_value
-            file_priority = status["file_priorities"][index]
+            file_priority = self.file_tree.priorities[index]
             if row[4] != file_priority:
                 row[4] = file_priority
-        if self._editing_index != -1:
+
+        if self._editing_index == -1:
             # Only update if no folder is being edited
-            self.update_folder_percentages()
+            self.__stale_dirs = changed_dirs
+            return
+
+        for path in changed_dirs:
+            ref = dir_rows.get(path)
+            if ref is None or not ref.valid():
+                continue
+            row = self.treestore[ref.get_path()]
+            value = self.file_tree.get_dir_progress(path) * 100
+            row[3] = value
+            row[2] = "%.2f%%" % value
 
     def _on_button_press_event(self, widget, event):
         """This is a callback for showing the right-click context menu."""
@@ -644,6 +666,9 @@ def _on_torrentfilerenamed_event(self, torrent_id, index, name):
 
         old_name = self.files_list[torrent_id][index]["path"]
         self.files_list[torrent_id][index]["path"] = name
+        if torrent_id == self.torrent_id:
+            # The rows are about to be moved around
+            self.__reset_file_tree(self.files_list[torrent_id])
 
         # We need to update the filename displayed if we're currently viewing
         # this torrents files.
@@ -780,6 +805,8 @@ def _on_torrentfolderrenamed_event(self, torrent_id, old_folder, new_folder):
                 fd["path"] = fd["path"].replace(old_folder, new_folder, 1)
 
         if torrent_id == self.torrent_id:
+            # The rows are about to be moved around
+            self.__reset_file_tree(self.files_list[torrent_id])
 
             old_split = old_folder.split("/")
             try:
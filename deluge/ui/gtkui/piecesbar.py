@@ -41,6 +41,7 @@
 import logging
 from math import pi
 from deluge.configmanager import ConfigManager
+from deluge.common import encode_pieces_runs, decode_pieces_runs
 
 log = logging.getLogger(__name__)
 
@@ -139,6 +140,31 @@ def __create_roundcorners_subpath(self, ctx, x, y, width, height):
         ctx.close_path()
         return ctx
 
+    def __get_rectangles(self):
+        """
+        Merges the runs of pieces in to the rectangles to draw, rounded to
+        whole pixels so there are never more rectangles than the bar is wide.
+        Runs narrower than a pixel are drawn over by the next run.
+        """
+        rectangles = []
+        num_pieces = self.__num_pieces or sum(self.__pieces[1::2])
+        if not num_pieces:
+            return rectangles
+        scale = self.__width * 1.0 / num_pieces
+        piece = 0
+        for i in xrange(0, len(self.__pieces), 2):
+            state, count = self.__pieces[i], self.__pieces[i + 1]
+            start = int(round(piece * scale))
+            piece += count
+            end = int(round(piece * scale))
+            if end <= start:
+                continue
+            if rectangles and rectangles[-1][0] == state:
+                rectangles[-1][2] = end
+            else:
+                rectangles.append([state, start, end])
+        return rectangles
+
     def __draw_pieces(self):
         if (self.__resized() or self.__pieces != self.__old_pieces or
                 self.__pieces_overlay == None):
@@ -147,20 +173,16 @@ def __draw_pieces(self):
                 cairo.FORMAT_ARGB32, self.__width, self.__height
             )
             ctx = cairo.Context(self.__pieces_overlay)
-            start_pos = 0
-            num_pieces = self.__num_pieces and self.__num_pieces or len(self.__pieces)
-            piece_width = self.__width*1.0/num_pieces
 
-            for state in self.__pieces:
+            for state, start, end in self.__get_rectangles():
                 color = self.gtkui_config["pieces_color_%s" % COLOR_STATES[state]]
                 ctx.set_source_rgb(
                     color[0]/65535.0,
                     color[1]/65535.0,
                     color[2]/65535.0,
                 )
-                ctx.rectangle(start_pos, 0, piece_width, self.__height)
+                ctx.rectangle(start, 0, end - start, self.__height)
                 ctx.fill()
-                start_pos += piece_width
 
         self.__cr.set_source_surface(self.__pieces_overlay)
         self.__cr.paint()
@@ -173,19 +195,14 @@ def __draw_pieces_completed(self):
                 cairo.FORMAT_ARGB32, self.__width, self.__height
             )
             ctx = cairo.Context(self.__pieces_overlay)
-            piece_width = self.__width*1.0/self.__num_pieces
-            start = 0
-            for _ in range(self.__num_pieces):
-                # Like this to keep same aspect ratio
-                color = self.gtkui_config["pieces_color_%s" % COLOR_STATES[3]]
-                ctx.set_source_rgb(
-                    color[0]/65535.0,
-                    color[1]/65535.0,
-                    color[2]/65535.0,
-                )
-                ctx.rectangle(start, 0, piece_width, self.__height)
-                ctx.fill()
-                start += piece_width
+            color = self.gtkui_config["pieces_color_%s" % COLOR_STATES[3]]
+            ctx.set_source_rgb(
+                color[0]/65535.0,
+                color[1]/65535.0,
+                color[2]/65535.0,
+            )
+            ctx.rectangle(0, 0, self.__width, self.__height)
+            ctx.fill()
 
         self.__cr.set_source_surface(self.__pieces_overlay)
         self.__cr.paint()
@@ -269,11 +286,17 @@ def set_text(self, text):
         self.__text = text
 
     def set_pieces(self, pieces, num_pieces):
+        self.set_pieces_runs(encode_pieces_runs(pieces or ()), num_pieces)
+
+    def get_pieces(self):
+        return decode_pieces_runs(self.__pieces)
+
+    def set_pieces_runs(self, runs, num_pieces):
         self.__old_pieces = self.__pieces
-        self.__pieces = pieces
+        self.__pieces = runs or ()
         self.__num_pieces = num_pieces
 
-    def get_pieces(self):
+    def get_pieces_runs(self):
         return self.__pieces
 
     def set_state(self, state):
@@ -293,7 +316,12 @@ def update_from_status(self, status):
             # Skip the pieces assignment
             return
 
-        self.set_pieces(status['pieces'], status['num_pieces'])
+        if status.get("pieces_runs") is not None:
+            self.set_pieces_runs(status['pieces_runs'], status['num_pieces'])
+        elif status.get("pieces") is not None:
+            self.set_pieces(status['pieces'], status['num_pieces'])
+        # Older daemons do not know "pieces_runs", the pieces are then
+        # requested with the next update
         self.update()
 
     def clear(self):
@@ -80,6 +80,9 @@ def __init__(self):
         self._child_widget = glade.get_widget("status_tab")
         self._tab_label = glade.get_widget("status_tab_label")
         self.config = ConfigManager("gtkui.conf")
+        # The status key the pieces bar is updated from, older daemons only
+        # know the uncompressed "pieces"
+        self.pieces_key = "pieces_runs"
         self.config.register_set_function(
             "show_piecesbar",
             self.on_show_pieces_bar_config_changed,
@@ -127,7 +130,7 @@ def update(self):
             "max_upload_speed", "max_download_speed", "active_time",
             "seeding_time", "seed_rank", "is_auto_managed", "time_added"]
         if self.config['show_piecesbar']:
-            status_keys.extend(["pieces", "state"])
+            status_keys.extend([self.pieces_key, "state"])
 
 
         component.get("SessionProxy").get_torrent_status(
@@ -163,6 +166,8 @@ def _on_get_torrent_status(self, status):
 
         # Do the progress bar because it's a special case (not a label)
         if self.config['show_piecesbar']:
+            if self.pieces_key not in status:
+                self.pieces_key = "pieces"
             self.piecesbar.update_from_status(status)
         else:
             fraction = status["progress"] / 100
@@ -192,6 +197,7 @@ def clear(self):
         for widget in self.label_widgets:
             widget[0].set_text("")
 
+        self.pieces_key = "pieces_runs"
         if self.config['show_piecesbar']:
             self.piecesbar.clear()
         else:
@@ -57,6 +57,19 @@
 
 log = logging.getLogger(__name__)
 
+# The number of rows above and below the ones in view that are also updated
+VISIBLE_MARGIN = 20
+
+# The rows not in view are updated on every n-th update
+OFFSCREEN_UPDATE_INTERVAL = 5
+
+# Sorting is suspended while updating more rows than this, so the sort model
+# is reordered once instead of once for every row that changed
+SORT_SUSPEND_THRESHOLD = 50
+
+# GTK_TREE_SORTABLE_UNSORTED_SORT_COLUMN_ID
+UNSORTED_SORT_COLUMN_ID = -2
+
 # Status icons.. Create them from file only once to avoid constantly
 # re-creating them.
 icon_downloading = gtk.gdk.pixbuf_new_from_file(
@@ -333,6 +346,15 @@ def __init__(self):
         # We keep a copy of the previous status to compare for changes
         self.prev_status = {}
 
+        # The liststore row of every torrent {torrent_id: iter}
+        self.rows = {}
+
+        # The number of updates until all the rows are updated, and the keys
+        # and filter they were last updated with
+        self.updates_until_full = 0
+        self.status_keys = set()
+        self.status_filter = None
+
         # Register the columns menu with the listview so it gets updated
         # accordingly.
         self.register_checklist_menu(
@@ -452,7 +474,10 @@ def stop(self):
         # We need to clear the liststore
         self.treeview.get_selection().unselect_all()
         self.liststore.clear()
+        self.rows = {}
         self.prev_status = {}
+        self.updates_until_full = 0
+        self.status_keys = set()
         self.filter = None
         self.search_box.hide()
 
@@ -480,6 +505,33 @@ def set_filter(self, filter_dict):
             self.filter['name'] = search_filter
         self.update()
 
+    def create_new_liststore(self):
+        """
+        Creates a new liststore, see :meth:`ListView.create_new_liststore`,
+        and indexes its rows by torrent_id.
+        """
+        listview.ListView.create_new_liststore(self)
+        self.rows = {}
+        if "torrent_id" not in self.columns:
+            return
+        column = self.columns["torrent_id"].column_indices[0]
+        for row in self.liststore:
+            self.rows[row[column]] = row.iter
+
+    def get_torrents_in_view(self):
+        """
+        Returns the torrent_ids of the rows in view, and the ones just above
+        and below them, or None if the view is not shown.
+        """
+        visible_range = self.treeview.get_visible_range()
+        if not visible_range:
+            return None
+        model = self.model_filter
+        start = max(0, visible_range[0][0] - VISIBLE_MARGIN)
+        end = min(len(model) - 1, visible_range[1][0] + VISIBLE_MARGIN)
+        column = self.columns["torrent_id"].column_indices[0]
+        return [model[i][column] for i in xrange(start, end + 1)]
+
     def set_columns_to_update(self, columns=None):
         status_keys = []
         self.columns_to_update = []
@@ -514,10 +566,31 @@ def send_status_request(self, columns=None):
         # Remove duplicates from status_key list
         status_keys = list(set(status_keys))
 
+        # Only the rows in view are updated, except every few updates or when
+        # the columns shown or the filter changed
+        torrent_ids = None
+        if self.updates_until_full > 0 and self.status_filter == self.filter and \
+                self.status_keys.issuperset(status_keys):
+            torrent_ids = self.get_torrents_in_view()
+        filter_dict = self.filter
+        if torrent_ids is None:
+            if not self.status_keys.issuperset(status_keys):
+                # The rows need the values of the new columns
+                self.prev_status = {}
+            self.updates_until_full = OFFSCREEN_UPDATE_INTERVAL
+            self.status_keys = set(status_keys)
+            self.status_filter = self.filter and dict(self.filter)
+        else:
+            self.updates_until_full -= 1
+            filter_dict = dict(self.filter or {})
+            if "id" in filter_dict:
+                torrent_ids = list(set(torrent_ids).intersection(filter_dict["id"]))
+            filter_dict["id"] = torrent_ids
+
         # Request the statuses for all these torrent_ids, this is async so we
         # will deal with the return in a signal callback.
         component.get("SessionProxy").get_torrents_status(
-            self.filter, status_keys).addCallback(self._on_get_torrents_status)
+            filter_dict, status_keys).addCallback(self._on_get_torrents_status, torrent_ids)
 
     def update(self):
         if self.got_state:
@@ -527,86 +600,135 @@ def update(self):
             # Send a status request
             gobject.idle_add(self.send_status_request)
 
-    def update_view(self, columns=None):
+    def update_view(self, columns=None, torrent_ids=None):
         """Update the view.  If columns is not None, it will attempt to only
-        update those columns selected.
+        update those columns selected.  If torrent_ids is not None, only the
+        rows of those torrents are updated.
         """
         filter_column = self.columns["filter"].column_indices[0]
         # Update the torrent view model with data we've received
         status = self.status
+        liststore = self.liststore
+        if torrent_ids is None:
+            torrent_ids = self.rows.keys()
+
+        column_fields = []
+        for column in self.columns_to_update:
+            column_index = self.get_column_index(column)
+            for i, status_field in enumerate(self.columns[column].status_field):
+                column_fields.append((column_index[i], status_field))
+
+        # The values that changed [(row, [column, value, column, value, ..])]
+        changed = []
+        for torrent_id in torrent_ids:
+            row = self.rows.get(torrent_id)
+            if row is None:
+                continue
 
-        for row in self.liststore:
-            torrent_id = row[self.columns["torrent_id"].column_indices[0]]
-
-            if not torrent_id in status.keys():
-                row[filter_column] = False
+            values = []
+            torrent_status = status.get(torrent_id)
+            if torrent_status is None:
+                if liststore.get_value(row, filter_column):
+                    values = [filter_column, False]
             else:
-                row[filter_column] = True
-                if torrent_id in self.prev_status and status[torrent_id] == self.prev_status[torrent_id]:
-                    # The status dict is the same, so do not update
-                    continue
-
-                # Set values for each column in the row
-                for column in self.columns_to_update:
-                    column_index = self.get_column_index(column)
-                    for i, status_field in enumerate(self.columns[column].status_field):
-                        if status_field in status[torrent_id]:
-                            try:
-                                # Only update if different
-                                row_value = status[torrent_id][status_field]
-                                if row[column_index[i]] != row_value:
-                                    row[column_index[i]] = row_value
-                            except Exception, e:
-                                log.debug("Error while updating row for column "
-                                          "index %d, status field %r, value %r:"
-                                          " %s", column_index[0], status_field,
-                                          row_value, e)
+                if not liststore.get_value(row, filter_column):
+                    values = [filter_column, True]
+                prev_status = self.prev_status.get(torrent_id)
+                self.prev_status[torrent_id] = torrent_status
+                if torrent_status != prev_status:
+                    # Only update the values that are different
+                    for column_index, status_field in column_fields:
+                        if status_field in torrent_status:
+                            value = torrent_status[status_field]
+                            if liststore.get_value(row, column_index) != value:
+                                values.extend((column_index, value))
+            if values:
+                changed.append((row, values))
+
+        if changed:
+            self.set_rows(changed)
 
         component.get("MenuBar").update_menu()
 
-        self.prev_status = status
+    def set_rows(self, changed):
+        """
+        Sets the values of the rows that changed, each row in one go so the
+        filter and sort models are only told about it once.
+
+        :param changed: the rows and the values to set in them,
+            [(iter, [column, value, column, value, ..]), ..]
+        :type changed: list
 
-    def _on_get_torrents_status(self, status):
+        """
+        sort_column, order = self.model_filter.get_sort_column_id()
+        suspend_sort = len(changed) > SORT_SUSPEND_THRESHOLD and \
+                       sort_column is not None and sort_column >= 0
+        if suspend_sort:
+            self.model_filter.set_sort_column_id(UNSORTED_SORT_COLUMN_ID, order)
+
+        try:
+            for row, values in changed:
+                try:
+                    self.liststore.set(row, *values)
+                except Exception, e:
+                    log.debug("Error while updating row with values %r: %s",
+                              values, e)
+        finally:
+            if suspend_sort:
+                self.model_filter.set_sort_column_id(sort_column, order)
+
+    def _on_get_torrents_status(self, status, torrent_ids=None):
         """Callback function for get_torrents_status().  'status' should be a
-        dictionary of {torrent_id: {key, value}}."""
-        self.status = status
+        dictionary of {torrent_id: {key, value}}.  If torrent_ids is not None,
+        only the status of those torrents was requested."""
         if self.search_box.prefiltered is not None:
             self.search_box.prefiltered = None
-        if self.status == self.prev_status and self.prev_status:
-            # We do not bother updating since the status hasn't changed
-            self.prev_status = self.status
-            return
-        gobject.idle_add(self.update_view)
+        if torrent_ids is not None:
+            # The torrents requested that are not in the status no longer
+            # match the filter
+            current = self.status
+            self.status = dict(current)
+            for torrent_id in torrent_ids:
+                if torrent_id in status:
+                    self.status[torrent_id] = status[torrent_id]
+                elif torrent_id in current:
+                    del self.status[torrent_id]
+        else:
+            self.status = status
+        gobject.idle_add(self.update_view, None, torrent_ids)
 
     def add_row(self, torrent_id, update=True):
         """Adds a new torrent row to the treeview"""
         # Make sure this torrent isn't already in the list
-        for row in self.liststore:
-            if row[self.columns["torrent_id"].column_indices[0]] == torrent_id:
-                # Row already in the list
-                return
+        if torrent_id in self.rows:
+            return
         # Insert a new row to the liststore
         row = self.liststore.append()
         # Store the torrent id
         self.liststore.set_value(row, self.columns["torrent_id"].column_indices[0], torrent_id)
+        self.rows[torrent_id] = row
         if update:
+            # The new row is only shown once all the rows are updated
+            self.updates_until_full = 0
             self.update()
 
     def remove_row(self, torrent_id):
         """Removes a row with torrent_id"""
-        for row in self.liststore:
-            if row[self.columns["torrent_id"].column_indices[0]] == torrent_id:
-                self.liststore.remove(row.iter)
-                # Force an update of the torrentview
-                self.update()
-                break
+        row = self.rows.pop(torrent_id, None)
+        if row is not None:
+            self.liststore.remove(row)
+            self.prev_status.pop(torrent_id, None)
+            # Force an update of the torrentview
+            self.update()
 
     def mark_dirty(self, torrent_id = None):
-        for row in self.liststore:
-            if not torrent_id or row[self.columns["torrent_id"].column_indices[0]] == torrent_id:
-                #log.debug("marking %s dirty", torrent_id)
-                row[self.columns["dirty"].column_indices[0]] = True
-                if torrent_id: break
+        dirty_column = self.columns["dirty"].column_indices[0]
+        if torrent_id:
+            rows = [self.rows[torrent_id]] if torrent_id in self.rows else []
+        else:
+            rows = self.rows.values()
+        for row in rows:
+            self.liststore.set_value(row, dirty_column, True)
 
     def get_selected_torrent(self):
         """Returns a torrent_id or None.  If multiple torrents are selected,
@@ -703,10 +825,9 @@ def on_torrentremoved_event(self, torrent_id):
 
     def on_torrentstatechanged_event(self, torrent_id, state):
         # Update the torrents state
-        for row in self.liststore:
-            if not torrent_id == row[self.columns["torrent_id"].column_indices[0]]:
-                continue
-
+        row = self.rows.get(torrent_id)
+        if row is not None:
+            row = self.liststore[row]
             for name in self.columns_to_update:
                 if not self.columns[name].status_field:
                     continue
@@ -52,6 +52,9 @@ class SessionProxy(component.Component):
     the status of the torrents and will try to satisfy client requests from the
     cache.
 
+    The keys requested for all the torrents are subscribed to, so the daemon
+    pushes their changes and they no longer need to be polled.
+
     """
     def __init__(self):
         log.debug("SessionProxy init..")
@@ -67,9 +70,21 @@ def __init__(self):
         # Holds the time of the last key update.. {torrent_id: {key1, time, ...}, ...}
         self.cache_times = {}
 
+        # The minimum time in seconds between the daemon's status updates
+        self.subscription_interval = 1
+        # The keys the daemon keeps up to date, and the active subscription
+        self.subscribed_keys = set()
+        self.subscription_id = None
+        # The keys asked for and the subscriptions waiting on their first update
+        self.subscription_keys = set()
+        self.pending_subscriptions = {}
+        # The time of the last update of the active subscription
+        self.last_update = 0
+
         client.register_event_handler("TorrentStateChangedEvent", self.on_torrent_state_changed)
         client.register_event_handler("TorrentRemovedEvent", self.on_torrent_removed)
         client.register_event_handler("TorrentAddedEvent", self.on_torrent_added)
+        client.register_event_handler("TorrentsStatusUpdateEvent", self.on_torrents_status_update)
 
     def start(self):
         def on_torrent_status(status):
@@ -87,7 +102,66 @@ def stop(self):
         client.deregister_event_handler("TorrentStateChangedEvent", self.on_torrent_state_changed)
         client.deregister_event_handler("TorrentRemovedEvent", self.on_torrent_removed)
         client.deregister_event_handler("TorrentAddedEvent", self.on_torrent_added)
+        client.deregister_event_handler("TorrentsStatusUpdateEvent", self.on_torrents_status_update)
+        if self.subscription_id is not None and client.connected():
+            client.core.unsubscribe_torrents_status(self.subscription_id)
         self.torrents = {}
+        self.subscribed_keys = set()
+        self.subscription_id = None
+        self.subscription_keys = set()
+        self.pending_subscriptions = {}
+        self.last_update = 0
+
+    def subscribe(self, keys):
+        """
+        Makes sure the daemon pushes the changes of these keys.
+
+        A new subscription for all the keys asked for so far replaces the
+        current one once its first update arrives.  Daemons without
+        subscriptions never reply, so the keys just keep being polled.
+
+        :param keys: the status keys
+        :type keys: list of strings
+
+        """
+        # Subscribing to every key would push far more than any view shows
+        if not keys or client.is_classicmode():
+            return
+
+        keys = set(keys)
+        if keys <= self.subscription_keys:
+            return
+        self.subscription_keys |= keys
+        subscription_keys = set(self.subscription_keys)
+
+        def on_subscribed(subscription_id):
+            self.pending_subscriptions[subscription_id] = subscription_keys
+
+        client.core.subscribe_torrents_status(
+            {}, list(subscription_keys), self.subscription_interval
+        ).addCallback(on_subscribed)
+
+    def is_subscribed(self, torrent_id, keys):
+        """
+        Checks if the cached keys of a torrent are kept up to date by the
+        daemon.  The daemon sends an update every interval, so if none has
+        arrived for `cache_time` the keys are polled again.
+
+        :param torrent_id: the torrent_id
+        :type torrent_id: string
+        :param keys: the status keys
+        :type keys: list of strings
+
+        :rtype: bool
+
+        """
+        if not keys or time.time() - self.last_update > self.cache_time:
+            return False
+        status = self.torrents[torrent_id][1]
+        for key in keys:
+            if key not in self.subscribed_keys or key not in status:
+                return False
+        return True
 
     def create_status_dict(self, torrent_ids, keys):
         """
@@ -134,7 +208,9 @@ def get_torrent_status(self, torrent_id, keys):
                 keys = self.torrents[torrent_id][1].keys()
 
             for key in keys:
-                if time.time() - self.cache_times[torrent_id][key] > self.cache_time:
+                if self.is_subscribed(torrent_id, [key]):
+                    continue
+                if time.time() - self.cache_times[torrent_id].get(key, 0.0) > self.cache_time:
                     keys_to_get.append(key)
 
             if not keys_to_get:
@@ -202,6 +278,8 @@ def find_torrents_to_fetch(torrent_ids):
             t = time.time()
             for torrent_id in torrent_ids:
                 torrent = self.torrents[torrent_id]
+                if self.is_subscribed(torrent_id, keys):
+                    continue
                 if t - torrent[0] > self.cache_time:
                     to_fetch.append(torrent_id)
                 else:
@@ -215,6 +293,11 @@ def find_torrents_to_fetch(torrent_ids):
         #-----------------------------------------------------------------------
 
         if not filter_dict:
+            # The daemon pushes the changes of the keys asked for every
+            # torrent.  The keys asked for only some torrents, ie, the rows
+            # in view, keep being polled for just those torrents.
+            self.subscribe(keys)
+
             # This means we want all the torrents status
             # We get a list of any torrent_ids with expired status dicts
             to_fetch = find_torrents_to_fetch(self.torrents.keys())
@@ -241,6 +324,31 @@ def find_torrents_to_fetch(torrent_ids):
             d = client.core.get_torrents_status(filter_dict, keys, True)
             return d.addCallback(on_status, None, keys)
 
+    def on_torrents_status_update(self, subscription_id, status, removed):
+        if subscription_id in self.pending_subscriptions:
+            keys = self.pending_subscriptions.pop(subscription_id)
+            if self.subscription_id is not None and self.subscription_id > subscription_id:
+                # A newer subscription is already active
+                client.core.unsubscribe_torrents_status(subscription_id)
+                return
+            if self.subscription_id is not None:
+                client.core.unsubscribe_torrents_status(self.subscription_id)
+            self.subscription_id = subscription_id
+            self.subscribed_keys = keys
+        elif subscription_id != self.subscription_id:
+            return
+
+        # Torrents that are removed are handled by on_torrent_removed
+        t = time.time()
+        self.last_update = t
+        for torrent_id, value in status.iteritems():
+            if torrent_id not in self.torrents:
+                self.torrents[torrent_id] = [t, {}]
+                self.cache_times[torrent_id] = {}
+            self.torrents[torrent_id][1].update(value)
+            for key in value:
+                self.cache_times[torrent_id][key] = t
+
     def on_torrent_state_changed(self, torrent_id, state):
         if torrent_id in self.torrents:
             self.torrents[torrent_id][1]["state"] = state
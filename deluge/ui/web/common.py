@@ -50,14 +50,17 @@ def escape(text):
     text = text.replace('\n', '\\n')
     return text
 
-def compress(contents, request):
-    request.setHeader("content-encoding", "gzip")
+def gzip(contents):
     compress = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS + 16,
         zlib.DEF_MEM_LEVEL,0)
     contents = compress.compress(contents)
     contents += compress.flush()
     return contents
 
+def compress(contents, request):
+    request.setHeader("content-encoding", "gzip")
+    return gzip(contents)
+
 try:
     # This is beeing done like this in order to allow tests to use the above
     # `compress` without requiring Mako to be instaled
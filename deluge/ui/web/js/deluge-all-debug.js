@@ -8985,6 +8985,46 @@ Deluge.Toolbar = Ext.extend(Ext.Toolbar, {
 		store.sort(sortState.field, sortState.direction);
 	},
 
+	/**
+	 * Applies the changes since the last update.
+	 * @param {Object} torrents The changed keys of the changed torrents.
+	 * @param {Array} removed The ids of the torrents to remove.
+	 */
+	updateDelta: function(torrents, removed) {
+		var store = this.getStore();
+		var newTorrents = [];
+
+		for (var t in torrents) {
+			var torrent = torrents[t];
+			var record = store.getById(t);
+
+			if (record) {
+				record.beginEdit();
+				for (var k in torrent) {
+					record.set(k, torrent[k]);
+				}
+				record.endEdit();
+			} else {
+				record = new Deluge.data.Torrent(torrent);
+				record.id = t;
+				this.torrents[t] = 1;
+				newTorrents.push(record);
+			}
+		}
+		store.add(newTorrents);
+
+		Ext.each(removed, function(torrentId) {
+			var record = store.getById(torrentId);
+			if (record) store.remove(record);
+			delete this.torrents[torrentId];
+		}, this);
+		store.commitChanges();
+
+		var sortState = store.getSortState()
+		if (!sortState) return;
+		store.sort(sortState.field, sortState.direction);
+	},
+
 	// private
 	onDisconnect: function() {
 		this.getStore().removeAll();
@@ -9050,6 +9090,14 @@ deluge.ui = {
 
 	filters: null,
 
+	// The revision of the last update, the server only sends what changed
+	// since then.
+	revision: 0,
+
+	// Identifies this page to the server, so that every open tab keeps its
+	// own revision.
+	clientId: Math.random().toString(36).substring(2),
+
 	/**
 	 * @description Create all the interface components, the json-rpc client
 	 * and set up various events that the UI will utilise.
@@ -9122,7 +9170,7 @@ deluge.ui = {
 
 	update: function() {
 		var filters = deluge.sidebar.getFilterStates();
-		deluge.client.web.update_ui(Deluge.Keys.Grid, filters, {
+		deluge.client.web.update_ui(Deluge.Keys.Grid, filters, this.revision, this.clientId, {
 			success: this.onUpdate,
 			failure: this.onUpdateError,
 			scope: this
@@ -9178,9 +9226,16 @@ deluge.ui = {
 				' (Down: ' + fspeed(data['stats'].download_rate, true) + 
 				' Up: ' + fspeed(data['stats'].upload_rate, true) + ')';
 		}
-		deluge.torrents.update(data['torrents']);
+		this.revision = data['revision'];
+		if (data['delta']) {
+			deluge.torrents.updateDelta(data['torrents'], data['removed']);
+		} else {
+			deluge.torrents.update(data['torrents']);
+		}
 		deluge.statusbar.update(data['stats']);
-		deluge.sidebar.update(data['filters']);
+		if (data['filters']) {
+			deluge.sidebar.update(data['filters']);
+		}
 		this.errorCount = 0;
 	},
 
@@ -9262,6 +9317,7 @@ deluge.ui = {
 		if (this.running) {
 			clearInterval(this.running);
 			this.running = false;
+			this.revision = 0;
 			deluge.torrents.getStore().removeAll();
 		}
 	}
@@ -355,6 +355,46 @@
         store.sort(sortState.field, sortState.direction);
     },
 
+    /**
+     * Applies the changes since the last update.
+     * @param {Object} torrents The changed keys of the changed torrents.
+     * @param {Array} removed The ids of the torrents to remove.
+     */
+    updateDelta: function(torrents, removed) {
+        var store = this.getStore();
+        var newTorrents = [];
+
+        for (var t in torrents) {
+            var torrent = torrents[t];
+            var record = store.getById(t);
+
+            if (record) {
+                record.beginEdit();
+                for (var k in torrent) {
+                    record.set(k, torrent[k]);
+                }
+                record.endEdit();
+            } else {
+                record = new Deluge.data.Torrent(torrent);
+                record.id = t;
+                this.torrents[t] = 1;
+                newTorrents.push(record);
+            }
+        }
+        store.add(newTorrents);
+
+        Ext.each(removed, function(torrentId) {
+            var record = store.getById(torrentId);
+            if (record) store.remove(record);
+            delete this.torrents[torrentId];
+        }, this);
+        store.commitChanges();
+
+        var sortState = store.getSortState()
+        if (!sortState) return;
+        store.sort(sortState.field, sortState.direction);
+    },
+
     // private
     onDisconnect: function() {
         this.getStore().removeAll();
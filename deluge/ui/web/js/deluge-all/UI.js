@@ -42,6 +42,14 @@ deluge.ui = {
 
     filters: null,
 
+    // The revision of the last update, the server only sends what changed
+    // since then.
+    revision: 0,
+
+    // Identifies this page to the server, so that every open tab keeps its
+    // own revision.
+    clientId: Math.random().toString(36).substring(2),
+
     /**
      * @description Create all the interface components, the json-rpc client
      * and set up various events that the UI will utilise.
@@ -117,7 +125,7 @@ deluge.ui = {
         this.oldFilters = this.filters;
         this.filters = filters;
 
-        deluge.client.web.update_ui(Deluge.Keys.Grid, filters, {
+        deluge.client.web.update_ui(Deluge.Keys.Grid, filters, this.revision, this.clientId, {
             success: this.onUpdate,
             failure: this.onUpdateError,
             scope: this
@@ -173,13 +181,18 @@ deluge.ui = {
                 ' (Down: ' + fspeed(data['stats'].download_rate, true) +
                 ' Up: ' + fspeed(data['stats'].upload_rate, true) + ')';
         }
-        if (Ext.areObjectsEqual(this.filters, this.oldFilters)) {
+        this.revision = data['revision'];
+        if (data['delta']) {
+            deluge.torrents.updateDelta(data['torrents'], data['removed']);
+        } else if (Ext.areObjectsEqual(this.filters, this.oldFilters)) {
             deluge.torrents.update(data['torrents']);
         } else {
             deluge.torrents.update(data['torrents'], true);
         }
         deluge.statusbar.update(data['stats']);
-        deluge.sidebar.update(data['filters']);
+        if (data['filters']) {
+            deluge.sidebar.update(data['filters']);
+        }
         this.errorCount = 0;
     },
 
@@ -261,6 +274,7 @@ deluge.ui = {
         if (this.running) {
             clearInterval(this.running);
             this.running = false;
+            this.revision = 0;
             deluge.torrents.getStore().removeAll();
         }
     }
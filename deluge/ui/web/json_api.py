@@ -64,6 +64,9 @@
 AUTH_LEVEL_DEFAULT = None
 AuthError = None
 
+# The seconds update_ui keeps what it sent to a browser that stopped asking
+UI_STATE_TIMEOUT = 300
+
 class JSONComponent(component.Component):
     def __init__(self, name, interval=1, depend=None):
         super(JSONComponent, self).__init__(name, interval, depend)
@@ -333,18 +336,32 @@ def register_object(self, obj, name=None):
 HOSTS_INFO = 4
 
 FILES_KEYS = ["files", "file_progress", "file_priorities"]
+# The number of torrents get_torrent_files keeps the file tree of
+FILE_TREES_CACHED = 5
 
 class EventQueue(object):
     """
     This class subscribes to events from the core and stores them until all
     the subscribed listeners have received the events.
+
+    A listener asking for its events when none are queued is kept waiting
+    until an event arrives for it or :attr:`timeout` seconds pass.
     """
 
+    # The number of seconds a request for events is held open
+    timeout = 300
+    # The number of events kept for a listener that is not asking for them,
+    # the oldest ones are dropped first
+    max_queued = 1000
+
     def __init__(self):
         self.__events = {}
         self.__handlers = {}
         self.__queue = {}
+        # The waiting requests {listener_id: (deferred, delayed_call)}
         self.__requests = {}
+        # The listeners that are about to be sent the events queued for them
+        self.__wakeups = {}
 
     def add_listener(self, listener_id, event):
         """
@@ -359,9 +376,7 @@ def add_listener(self, listener_id, event):
 
             def on_event(*args):
                 for listener in self.__events[event]:
-                    if listener not in self.__queue:
-                        self.__queue[listener] = []
-                    self.__queue[listener].append((event, args))
+                    self.__queue_event(listener, (event, args))
 
             client.register_event_handler(event, on_event)
             self.__handlers[event] = on_event
@@ -369,6 +384,27 @@ def on_event(*args):
         elif listener_id not in self.__events[event]:
             self.__events[event].append(listener_id)
 
+    def __queue_event(self, listener_id, event):
+        queue = self.__queue.setdefault(listener_id, [])
+        queue.append(event)
+        if len(queue) > self.max_queued:
+            del queue[:-self.max_queued]
+
+        # Wait for the rest of this reactor iteration so the events that
+        # arrive together are sent together.
+        if listener_id in self.__requests and listener_id not in self.__wakeups:
+            self.__wakeups[listener_id] = reactor.callLater(
+                0, self.__send_events, listener_id)
+
+    def __send_events(self, listener_id):
+        self.__wakeups.pop(listener_id, None)
+        if listener_id not in self.__requests:
+            return
+        d, timeout = self.__requests.pop(listener_id)
+        if timeout.active():
+            timeout.cancel()
+        d.callback(self.__queue.pop(listener_id, None))
+
     def get_events(self, listener_id):
         """
         Retrieve the pending events for the listener.
@@ -377,30 +413,20 @@ def get_events(self, listener_id):
         :type listener_id: string
 	    """
 
+        # Only the newest request for a listener is kept waiting
+        if listener_id in self.__requests:
+            self.__send_events(listener_id)
+
         # Check to see if we have anything to return immediately
         if listener_id in self.__queue:
-            queue = self.__queue[listener_id]
-            del self.__queue[listener_id]
-            return queue
+            return self.__queue.pop(listener_id)
 
-        # Create a deferred to and check again in 100ms
+        # Wait for an event to be queued for this listener
         d = Deferred()
-        reactor.callLater(0.1, self._get_events, listener_id, 0, d)
+        timeout = reactor.callLater(self.timeout, self.__send_events, listener_id)
+        self.__requests[listener_id] = (d, timeout)
         return d
 
-    def _get_events(self, listener_id, count, d):
-        if listener_id in self.__queue:
-            queue = self.__queue[listener_id]
-            del self.__queue[listener_id]
-            d.callback(queue)
-        else:
-            # Prevent this loop going on indefinitely incase a client leaves
-            # the page or disconnects uncleanly.
-            if count >= 3000:
-                d.callback(None)
-            else:
-                reactor.callLater(0.1, self._get_events, listener_id, count + 1, d)
-
     def remove_listener(self, listener_id, event):
         """
         Remove a listener from the event queue.
@@ -428,6 +454,11 @@ def __init__(self):
         self.host_list = ConfigManager("hostlist.conf.1.2", DEFAULT_HOSTS)
         self.core_config = CoreConfig()
         self.event_queue = EventQueue()
+        # What update_ui last sent to each browser page, see update_ui
+        self.ui_states = {}
+        # The file trees of the torrents last asked for
+        self.file_trees = {}
+        self.file_trees_order = []
         try:
             self.sessionproxy = component.get("SessionProxy")
         except KeyError:
@@ -453,6 +484,9 @@ def start(self):
     def stop(self):
         self.core_config.stop()
         self.sessionproxy.stop()
+        self.ui_states = {}
+        self.file_trees = {}
+        self.file_trees_order = []
 
     @export
     def connect(self, host_id):
@@ -491,17 +525,32 @@ def disconnect(self):
         return True
 
     @export
-    def update_ui(self, keys, filter_dict):
+    def update_ui(self, keys, filter_dict, revision=None, client_id=None):
         """
         Gather the information required for updating the web interface.
 
+        When a revision is passed, the response has a new "revision" and if
+        the passed one is the last revision sent to this page of the browser
+        session, it only contains what changed since then: "delta" is True, "torrents"
+        has the changed keys of the changed torrents, "removed" the ids of the
+        torrents no longer matching the filter and "filters" is None if the
+        filter tree has not changed.
+
         :param keys: the information about the torrents to gather
         :type keys: list
         :param filter_dict: the filters to apply when selecting torrents.
         :type filter_dict: dictionary
+        :param revision: the revision of the last response received
+        :type revision: int
+        :param client_id: an id of the page, so that pages open in more than
+            one tab of a browser session each keep their own revision
+        :type client_id: string
         :returns: The torrent and ui information.
         :rtype: dictionary
         """
+        if revision is not None:
+            state_id = (__request__.session_id, client_id)
+            started = time.time()
         d = Deferred()
         ui_info = {
             "connected": client.connected(),
@@ -539,6 +588,9 @@ def got_torrents(torrents):
             ui_info["torrents"] = torrents
 
         def on_complete(result):
+            if revision is not None:
+                self._make_ui_delta(state_id, revision, started, keys,
+                                    filter_dict, ui_info)
             d.callback(ui_info)
 
         d1 = component.get("SessionProxy").get_torrents_status(filter_dict, keys)
@@ -567,49 +619,81 @@ def on_complete(result):
         dl.addCallback(on_complete)
         return d
 
-    def _on_got_files(self, torrent, d):
-        files = torrent.get("files")
-        file_progress = torrent.get("file_progress")
-        file_priorities = torrent.get("file_priorities")
-
-        paths = []
-        info = {}
-        for index, torrent_file in enumerate(files):
-            path = torrent_file["path"]
-            paths.append(path)
-            torrent_file["progress"] = file_progress[index]
-            torrent_file["priority"] = file_priorities[index]
-            torrent_file["index"] = index
-            torrent_file["path"] = path
-            info[path] = torrent_file
-
-            # update the directory info
-            dirname = os.path.dirname(path)
-            while dirname:
-                dirinfo = info.setdefault(dirname, {})
-                dirinfo["size"] = dirinfo.get("size", 0) + torrent_file["size"]
-                if "priority" not in dirinfo:
-                    dirinfo["priority"] = torrent_file["priority"]
-                else:
-                    if dirinfo["priority"] != torrent_file["priority"]:
-                        dirinfo["priority"] = 9
-
-                progresses = dirinfo.setdefault("progresses", [])
-                progresses.append(torrent_file["size"] * (torrent_file["progress"] / 100.0))
-                dirinfo["progress"] = float(sum(progresses)) / dirinfo["size"] * 100
-                dirinfo["path"] = dirname
-                dirname = os.path.dirname(dirname)
-
-        def walk(path, item):
-            if item["type"] == "dir":
-                item.update(info[path])
-                return item
-            else:
-                item.update(info[path])
-                return item
+    def _make_ui_delta(self, state_id, revision, started, keys, filter_dict,
+                       ui_info):
+        """
+        Replaces the torrents and filters in ui_info with what changed since
+        the revision the browser page has, see update_ui.
+        """
+        # Forget about the browsers that have gone away
+        for sid, state in self.ui_states.items():
+            if started - state["time"] > UI_STATE_TIMEOUT:
+                del self.ui_states[sid]
+
+        torrents = ui_info["torrents"]
+        if torrents is None:
+            # Without the torrents there is nothing to compare to next time
+            self.ui_states.pop(state_id, None)
+            return
+
+        state = self.ui_states.get(state_id)
+        ui_info["delta"] = bool(state and state["revision"] == revision and
+                                state["keys"] == keys and
+                                state["filter_dict"] == filter_dict)
+        new_revision = state["revision"] + 1 if state else 1
+        ui_info["revision"] = new_revision
+        ui_info["removed"] = []
+
+        if ui_info["delta"]:
+            # The SessionProxy stamps every key it stores, the keys not
+            # stored since the last revision was gathered cannot have changed.
+            since = state["time"]
+            cache_times = self.sessionproxy.cache_times
+            sent_torrents = state["torrents"]
+            changed = {}
+            for torrent_id, status in torrents.iteritems():
+                sent = sent_torrents.get(torrent_id)
+                if sent is None:
+                    changed[torrent_id] = status
+                    continue
+                times = cache_times.get(torrent_id, {})
+                diff = dict((key, value) for key, value in status.iteritems()
+                    if times.get(key, since) >= since and
+                       (key not in sent or sent[key] != value))
+                if diff:
+                    changed[torrent_id] = diff
+            ui_info["removed"] = [torrent_id for torrent_id in sent_torrents
+                                  if torrent_id not in torrents]
+            ui_info["torrents"] = changed
+            if ui_info["filters"] == state["filters"]:
+                ui_info["filters"] = None
+            filters = state["filters"] if ui_info["filters"] is None else ui_info["filters"]
+        else:
+            filters = ui_info["filters"]
+
+        self.ui_states[state_id] = {
+            "revision": new_revision,
+            "time": started,
+            "keys": keys,
+            "filter_dict": filter_dict,
+            "torrents": torrents,
+            "filters": filters
+        }
 
-        file_tree = uicommon.FileTree2(paths)
-        file_tree.walk(walk)
+    def _on_got_files(self, torrent, d, torrent_id):
+        files = torrent.get("files")
+        file_tree = self.file_trees.get(torrent_id)
+        if file_tree is None or file_tree.paths != [f["path"] for f in files]:
+            # A file was renamed, or these are the first files requested
+            file_tree = uicommon.TorrentFileTree(files)
+            self.file_trees[torrent_id] = file_tree
+            if torrent_id in self.file_trees_order:
+                self.file_trees_order.remove(torrent_id)
+            self.file_trees_order.append(torrent_id)
+            while len(self.file_trees_order) > FILE_TREES_CACHED:
+                del self.file_trees[self.file_trees_order.pop(0)]
+
+        file_tree.update(torrent.get("file_progress"), torrent.get("file_priorities"))
         d.callback(file_tree.get_tree())
 
     @export
@@ -628,7 +712,7 @@ def get_torrent_files(self, torrent_id):
         """
         main_deferred = Deferred()
         d = component.get("SessionProxy").get_torrent_status(torrent_id, FILES_KEYS)
-        d.addCallback(self._on_got_files, main_deferred)
+        d.addCallback(self._on_got_files, main_deferred, torrent_id)
         return main_deferred
 
     @export
@@ -53,7 +53,7 @@
 from deluge.ui import common as uicommon
 from deluge.ui.tracker_icons import TrackerIcons
 from deluge.ui.web.auth import Auth
-from deluge.ui.web.common import Template, compress
+from deluge.ui.web.common import Template, compress, gzip
 from deluge.ui.web.json_api import JSON, WebApi
 from deluge.ui.web.pluginmanager import PluginManager
 
@@ -218,6 +218,110 @@ def render(self, request):
             request.setResponseCode(http.NOT_FOUND)
             return ""
 
+class StaticFile(object):
+    """
+    A static file along with its gzipped contents and the headers used to
+    validate cached copies, so they are only worked out when the file
+    changes rather than on every request.
+
+    :param path: The path of the file
+    :type path: string
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mime_type = mimetypes.guess_type(path)[0]
+        self.stat = None
+        self.load()
+
+    def load(self):
+        stat = os.stat(self.path)
+        data = open(self.path, "rb").read()
+        self.stat = (stat.st_mtime, stat.st_size)
+        self.data = data
+        self.gzipped = gzip(data)
+        self.etag = hashlib.sha1(data).hexdigest()
+        self.last_modified = int(stat.st_mtime)
+
+    def is_modified(self):
+        """
+        Checks if the file has changed since it was loaded.
+
+        :returns: True if the file was changed or removed
+        :rtype: bool
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return True
+        return (stat.st_mtime, stat.st_size) != self.stat
+
+    def render(self, request):
+        """
+        Writes the headers of the file to the request and returns its body,
+        an empty body if the client already has the current version.
+        """
+        request.setHeader("content-type", self.mime_type)
+        # Clients have to check with us that their copy is still current
+        request.setHeader("cache-control", "public, no-cache")
+        request.setHeader("vary", "accept-encoding")
+
+        gzipped = "gzip" in (request.getHeader("accept-encoding") or "")
+        if gzipped:
+            etag = '"%s-gzip"' % self.etag
+        else:
+            etag = '"%s"' % self.etag
+
+        if request.setETag(etag) == http.CACHED:
+            return ""
+        if request.getHeader("if-none-match"):
+            # The etag takes precedence over the modification time
+            request.setHeader("last-modified",
+                              http.datetimeToString(self.last_modified))
+        elif request.setLastModified(self.last_modified) == http.CACHED:
+            return ""
+
+        if gzipped:
+            request.setHeader("content-encoding", "gzip")
+            return self.gzipped
+        return self.data
+
+class StaticFileCache(object):
+    """
+    Keeps the :class:`StaticFile` of every file served, reloading a file
+    when it changes on disk.
+    """
+
+    def __init__(self):
+        self.__files = {}
+
+    def get(self, path):
+        """
+        Returns the cached file for path.
+
+        :param path: The path of the file
+        :type path: string
+        :returns: the file or None if it does not exist
+        :rtype: StaticFile
+        """
+        static_file = self.__files.get(path)
+        if static_file is not None and not static_file.is_modified():
+            return static_file
+
+        try:
+            if not os.path.isfile(path):
+                raise IOError("%s is not a file" % path)
+            static_file = StaticFile(path)
+        except (IOError, OSError):
+            self.__files.pop(path, None)
+            return None
+
+        log.debug("Caching static file: '%s'", path)
+        self.__files[path] = static_file
+        return static_file
+
+static_files = StaticFileCache()
+
 class LookupResource(resource.Resource, component.Component):
 
     def __init__(self, name, *directories):
@@ -254,12 +358,10 @@ def render(self, request):
 
         filename = os.path.basename(request.path)
         for directory in self.__paths[path]:
-            if os.path.join(directory, filename):
-                path = os.path.join(directory, filename)
-                log.debug("Serving path: '%s'", path)
-                mime_type = mimetypes.guess_type(path)
-                request.setHeader("content-type", mime_type[0])
-                return compress(open(path, "rb").read(), request)
+            static_file = static_files.get(os.path.join(directory, filename))
+            if static_file:
+                log.debug("Serving path: '%s'", static_file.path)
+                return static_file.render(request)
 
         request.setResponseCode(http.NOT_FOUND)
         return "<h1>404 - Not Found</h1>"
@@ -283,6 +385,8 @@ def __init__(self):
                 "order": []
             }
         }
+        # The results of get_scripts, {type: (scripts, mtimes)}
+        self.__cache = {}
 
     def add_script(self, path, filepath, type=None):
         """
@@ -300,6 +404,7 @@ def add_script(self, path, filepath, type=None):
 
         self.__scripts[type]["scripts"][path] = filepath
         self.__scripts[type]["order"].append(path)
+        self.__cache.pop(type, None)
 
     def add_script_folder(self, path, filepath, type=None, recurse=True):
         """
@@ -319,6 +424,7 @@ def add_script_folder(self, path, filepath, type=None, recurse=True):
 
         self.__scripts[type]["scripts"][path] = (filepath, recurse)
         self.__scripts[type]["order"].append(path)
+        self.__cache.pop(type, None)
 
     def remove_script(self, path, type=None):
         """
@@ -334,6 +440,7 @@ def remove_script(self, path, type=None):
 
         del self.__scripts[type]["scripts"][path]
         self.__scripts[type]["order"].remove(path)
+        self.__cache.pop(type, None)
 
     def get_scripts(self, type=None):
         """
@@ -343,10 +450,22 @@ def get_scripts(self, type=None):
         :keyword type: The type of scripts to get (normal, debug, dev)
         :param type: string
         """
-        scripts = []
         if type not in ("dev", "debug", "normal"):
             type = 'normal'
 
+        # The folders only have to be walked again if a script was added to
+        # or removed from one, which changes the mtime of the folder, or if
+        # an .order file changed.
+        if type in self.__cache:
+            scripts, mtimes = self.__cache[type]
+            try:
+                if all(os.path.getmtime(p) == m for p, m in mtimes.iteritems()):
+                    return list(scripts)
+            except OSError:
+                pass
+
+        scripts = []
+        mtimes = {}
         _scripts = self.__scripts[type]["scripts"]
         _order = self.__scripts[type]["order"]
 
@@ -358,11 +477,13 @@ def get_scripts(self, type=None):
                 filepath, recurse = filepath
                 if recurse:
                     for dirpath, dirnames, filenames in os.walk(filepath, False):
+                        mtimes[dirpath] = os.path.getmtime(dirpath)
                         files = fnmatch.filter(filenames, "*.js")
                         files.sort()
 
                         order_file = os.path.join(dirpath, '.order')
                         if os.path.isfile(order_file):
+                            mtimes[order_file] = os.path.getmtime(order_file)
                             for line in open(order_file, 'rb'):
                                 line = line.strip()
                                 if not line or line[0] == '#':
@@ -386,7 +507,9 @@ def get_scripts(self, type=None):
                     files = fnmatch.filter(os.listdir('.'), "*.js")
             else:
                 scripts.append("js/" + path)
-        return scripts
+
+        self.__cache[type] = (scripts, mtimes)
+        return list(scripts)
 
     def getChild(self, path, request):
         if hasattr(request, "lookup_path"):
@@ -410,13 +533,12 @@ def render(self, request):
 
                 path = filepath + request.lookup_path[len(pattern):]
 
-                if not os.path.isfile(path):
+                static_file = static_files.get(path)
+                if not static_file:
                     continue
 
                 log.debug("Serving path: '%s'", path)
-                mime_type = mimetypes.guess_type(path)
-                request.setHeader("content-type", mime_type[0])
-                return compress(open(path, "rb").read(), request)
+                return static_file.render(request)
 
         request.setResponseCode(http.NOT_FOUND)
         return "<h1>404 - Not Found</h1>"
@@ -598,7 +720,7 @@ def __init__(self):
 
                 # Save our config and if it saved successfully then rename the
                 # old configuration file.
-                if self.config.save():
+                if self.config.save(sync=True):
                     config_dir = os.path.dirname(old_config.config_file)
                     backup_path = os.path.join(config_dir, 'web.conf.old')
                     os.rename(old_config.config_file, backup_path)
@@ -36,6 +36,7 @@
 from distutils.command.build import build as _build
 from distutils.command.build_ext import build_ext as _build_ext
 from distutils.command.clean import clean as _clean
+from distutils.errors import CCompilerError, DistutilsError
 try:
     from sphinx.setup_command import BuildDoc
 except ImportError:
@@ -203,7 +204,15 @@ def remove_from_cflags(flags):
 for rem in to_remove:
     _sources.remove(rem)
 
-_ext_modules = []
+# The optional C implementation of rencode, deluge.rencode falls back to the
+# pure Python module if this is not built.
+_rencode = Extension(
+    '_rencode',
+    extra_compile_args = ["-O2"] if not windows_check() else ["/O2"],
+    sources = ['deluge/_rencode.c']
+)
+
+_ext_modules = [_rencode]
 
 # Check for a system libtorrent and if found, then do not build the libtorrent extension
 build_libtorrent = True
@@ -236,7 +245,7 @@ def remove_from_cflags(flags):
             sources = _sources
         )
 
-        _ext_modules = [libtorrent]
+        _ext_modules.append(libtorrent)
 
 class build_trans(cmd.Command):
     description = 'Compile .po files into .mo files'
@@ -366,14 +375,25 @@ def run(self):
         # Run all sub-commands (at least those that need to be run)
         _build.run(self)
 
+class build_ext(_build_ext):
+    def build_extension(self, ext):
+        if ext.name != '_rencode':
+            return _build_ext.build_extension(self, ext)
+
+        # The rencode extension is only a speedup so do not fail the build
+        try:
+            _build_ext.build_extension(self, ext)
+        except (CCompilerError, DistutilsError), e:
+            print("Unable to build the rencode extension, using the pure Python module: %s" % e)
+
 class build_debug(build):
     sub_commands = [x for x in build.sub_commands if x[0] != 'build_ext'] + [('build_ext_debug', None)]
 
-class build_ext_debug(_build_ext):
+class build_ext_debug(build_ext):
 
     def run(self):
         if not self.distribution.ext_modules:
-            return _build_ext.run(self)
+            return build_ext.run(self)
 
         lt_ext = None
         for ext in self.distribution.ext_modules:
@@ -381,13 +401,13 @@ def run(self):
                 lt_ext = ext
 
         if not lt_ext:
-            return _build_ext.run(self)
+            return build_ext.run(self)
 
         lt_ext.extra_compile_args.remove('-DNDEBUG')
         lt_ext.extra_compile_args.remove('-O2')
         lt_ext.extra_compile_args.append('-g')
         remove_from_cflags(["-DNDEBUG", "-O2"])
-        return _build_ext.run(self)
+        return build_ext.run(self)
 
 class clean_plugins(cmd.Command):
     description = "Cleans the plugin folders"
@@ -444,6 +464,7 @@ def run(self):
     'build_plugins': build_plugins,
     'build_docs': build_docs,
     'build_debug': build_debug,
+    'build_ext': build_ext,
     'build_ext_debug': build_ext_debug,
     'clean_plugins': clean_plugins,
     'clean': clean,